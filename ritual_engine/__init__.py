@@ -1,9 +1,33 @@
-from . import guardian_compiler
-from . import guardian_sysenv
-from . import llm_funcs
-from . import sql
-from . import work 
-from . import gen
-from . import rituals
-
-# etc
\ No newline at end of file
+import importlib
+
+# Submodules are imported on first attribute access (PEP 562) so that
+# `import ritual_engine` stays cheap for CLI invocations and worker processes.
+_SUBMODULES = {
+    "npc_compiler": "ritual_engine.npc_compiler",
+    "npc_sysenv": "ritual_engine.npc_sysenv",
+    "codex": "ritual_engine.codex",
+    "llm_funcs": "ritual_engine.llm_funcs",
+    "serve": "ritual_engine.serve",
+    "sql": "ritual_engine.sql",
+    "work": "ritual_engine.work",
+    "gen": "ritual_engine.gen",
+    "data": "ritual_engine.data",
+    "vault": "ritual_engine.vault",
+    "mix": "ritual_engine.mix",
+    "rituals": "ritual_engine.rituals",
+    # Names from before the Guardian rename
+    "guardian_compiler": "ritual_engine.npc_compiler",
+    "guardian_sysenv": "ritual_engine.npc_sysenv",
+}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        module = importlib.import_module(_SUBMODULES[name])
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES))
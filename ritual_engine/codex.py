@@ -1,21 +1,29 @@
+import asyncio
+import copy
+import os
+import re
 import subprocess
 import json
 import PIL
+from concurrent.futures import ThreadPoolExecutor
 
 from typing import List, Dict, Any, Optional, Union
 
 
 from jinja2 import Environment, FileSystemLoader, Undefined
 
-from sqlalchemy import create_engine
 
 from ritual_engine.npc_sysenv import (
     render_markdown,
     lookup_provider,
     request_user_input, 
-    get_system_message
+    get_system_message,
+    get_volatile_context,
 )
-from ritual_engine.gen.response import get_litellm_response
+from ritual_engine.gen.response import get_litellm_response, aget_litellm_response
+from ritual_engine.gen.cache import repeated_call_cache
+from ritual_engine.gen.jinx_index import get_jinx_index
+from ritual_engine.npc_compiler import parse_jinx_arguments
 from ritual_engine.gen.image_gen import generate_image, edit_image
 from ritual_engine.gen.video_gen import generate_video_diffusers
 
@@ -105,34 +113,21 @@ def gen_video(
 
 
 
-def get_llm_response(
+def _prepare_llm_call(
     prompt: str,
-    model: str=None,
+    model: str = None,
     provider: str = None,
     images: List[str] = None,
     npc: Any = None,
-    team: Any = None,
     messages: List[Dict[str, str]] = None,
     api_url: str = None,
-    api_key: str = None,
-    context=None,    
-    stream: bool = False,
+    context=None,
     attachments: List[str] = None,
-    **kwargs,
 ):
-    """This function generates a response using the specified provider and model.
-    Args:
-        prompt (str): The prompt for generating the response.
-    Keyword Args:
-        provider (str): The provider to use for generating the response.
-        model (str): The model to use for generating the response.
-        images (List[Dict[str, str]]): The list of images.
-        npc (Any): The Guardian object.
-        messages (List[Dict[str, str]]): The list of messages.
-        api_url (str): The URL of the API endpoint.
-        attachments (List[str]): List of file paths to include as attachments
+    """Resolves model/provider from the Guardian and assembles the message list
+    shared by get_llm_response and aget_llm_response.
     Returns:
-        Any: The response generated by the specified provider and model.
+        tuple: (model, provider, api_url, messages)
     """
     # Determine provider and model from Guardian if needed
     if model is not None and provider is not None:
@@ -159,6 +154,9 @@ def get_llm_response(
         context_str = f'User Provided Context: {context}'
     else:
         context_str = ''
+    if npc:
+        # Kept out of the system message so the prefix stays cacheable
+        context_str += get_volatile_context()
     if messages is None or len(messages) == 0:
         messages = [{"role": "system", "content": system_message}]
         if prompt:
@@ -170,6 +168,50 @@ def get_llm_response(
     elif prompt:
         messages.append({"role": "user", "content": prompt + context_str})
 
+    return model, provider, api_url, messages
+
+
+def get_llm_response(
+    prompt: str,
+    model: str=None,
+    provider: str = None,
+    images: List[str] = None,
+    npc: Any = None,
+    team: Any = None,
+    messages: List[Dict[str, str]] = None,
+    api_url: str = None,
+    api_key: str = None,
+    context=None,    
+    stream: bool = False,
+    attachments: List[str] = None,
+    **kwargs,
+):
+    """This function generates a response using the specified provider and model.
+    Args:
+        prompt (str): The prompt for generating the response.
+    Keyword Args:
+        provider (str): The provider to use for generating the response.
+        model (str): The model to use for generating the response.
+        images (List[Dict[str, str]]): The list of images.
+        npc (Any): The Guardian object.
+        messages (List[Dict[str, str]]): The list of messages.
+        api_url (str): The URL of the API endpoint.
+        attachments (List[str]): List of file paths to include as attachments
+    Returns:
+        Any: The response generated by the specified provider and model.
+    """
+    model, provider, api_url, messages = _prepare_llm_call(
+        prompt,
+        model=model,
+        provider=provider,
+        images=images,
+        npc=npc,
+        messages=messages,
+        api_url=api_url,
+        context=context,
+        attachments=attachments,
+    )
+
     response = get_litellm_response(
         prompt,
         messages=messages,
@@ -181,6 +223,60 @@ def get_llm_response(
         attachments=attachments,
         stream=stream,
         context = context, 
+        npc=npc,
+        **kwargs,
+    )
+    return response
+
+
+async def aget_llm_response(
+    prompt: str,
+    model: str=None,
+    provider: str = None,
+    images: List[str] = None,
+    npc: Any = None,
+    team: Any = None,
+    messages: List[Dict[str, str]] = None,
+    api_url: str = None,
+    api_key: str = None,
+    context=None,
+    stream: bool = False,
+    attachments: List[str] = None,
+    **kwargs,
+):
+    """Asyncio variant of get_llm_response.
+    Args:
+        prompt (str): The prompt for generating the response.
+    Keyword Args:
+        Same as get_llm_response.
+    Returns:
+        Dict[str, Any]: The same result dict as get_llm_response. When stream=True,
+        the 'response' entry is an async iterator of chunks.
+    """
+    model, provider, api_url, messages = _prepare_llm_call(
+        prompt,
+        model=model,
+        provider=provider,
+        images=images,
+        npc=npc,
+        messages=messages,
+        api_url=api_url,
+        context=context,
+        attachments=attachments,
+    )
+
+    response = await aget_litellm_response(
+        prompt,
+        messages=messages,
+        model=model,
+        provider=provider,
+        api_url=api_url,
+        api_key=api_key,
+        images=images,
+        attachments=attachments,
+        stream=stream,
+        context=context,
+        npc=npc,
         **kwargs,
     )
     return response
@@ -188,6 +284,86 @@ def get_llm_response(
 
 
 
+def _batch_item_kwargs(kwargs):
+    """Per-item copy of the shared kwargs so batched calls never share a mutable message list."""
+    item_kwargs = dict(kwargs)
+    if item_kwargs.get("messages") is not None:
+        item_kwargs["messages"] = copy.deepcopy(item_kwargs["messages"])
+    return item_kwargs
+
+
+def _batch_error(prompt, error):
+    return {
+        "response": None,
+        "messages": [],
+        "prompt": prompt,
+        "error": f"{type(error).__name__}: {error}",
+    }
+
+
+def get_llm_responses(
+    prompts: List[str],
+    model: str = None,
+    provider: str = None,
+    npc: Any = None,
+    max_concurrency: int = 8,
+    **kwargs,
+) -> List[Dict[str, Any]]:
+    """Runs get_llm_response over a list of prompts on a bounded thread pool.
+    Args:
+        prompts (List[str]): The prompts to send.
+    Keyword Args:
+        model (str): The model to use for every prompt.
+        provider (str): The provider to use for every prompt.
+        npc (Any): The Guardian object.
+        max_concurrency (int): Maximum number of requests in flight.
+        **kwargs: Passed through to get_llm_response (format, messages, ...).
+    Returns:
+        List[Dict[str, Any]]: One result dict per prompt, in input order. A failed
+        item gets 'response' None and an 'error' string instead of aborting the batch.
+    """
+    if not prompts:
+        return []
+
+    def _call(prompt):
+        try:
+            return get_llm_response(
+                prompt, model=model, provider=provider, npc=npc, **_batch_item_kwargs(kwargs)
+            )
+        except Exception as e:
+            return _batch_error(prompt, e)
+
+    max_workers = max(1, min(max_concurrency, len(prompts)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_call, prompts))
+
+
+async def aget_llm_responses(
+    prompts: List[str],
+    model: str = None,
+    provider: str = None,
+    npc: Any = None,
+    max_concurrency: int = 8,
+    **kwargs,
+) -> List[Dict[str, Any]]:
+    """Asyncio variant of get_llm_responses bounded by a semaphore.
+    Returns:
+        List[Dict[str, Any]]: One result dict per prompt, in input order.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def _call(prompt):
+        async with semaphore:
+            try:
+                return await aget_llm_response(
+                    prompt, model=model, provider=provider, npc=npc, **_batch_item_kwargs(kwargs)
+                )
+            except Exception as e:
+                return _batch_error(prompt, e)
+
+    return list(await asyncio.gather(*(_call(prompt) for prompt in prompts)))
+
+
 def execute_llm_command(
     command: str,
     model: Optional[str] = None,
@@ -366,6 +542,15 @@ def handle_jinx_call(
             jinx = npc.jinxs_dict[jinx_name]
         render_markdown(f"jinx found: {jinx.jinx_name}")
         jinja_env = Environment(loader=FileSystemLoader("."), undefined=Undefined)
+        # A command addressed to the jinx with all its required arguments needs no model
+        parsed_inputs = parse_jinx_arguments(command, jinx) if attempt == 0 else {}
+        if parsed_inputs:
+            return _run_jinx_with_inputs(
+                command, jinx, _with_input_defaults(jinx, parsed_inputs), jinja_env, model=model, provider=provider,
+                api_url=api_url, api_key=api_key, messages=messages, npc=npc,
+                stream=stream, n_attempts=n_attempts, attempt=attempt, context=context,
+            )
+
         example_format = {}
         for inp in jinx.inputs:
             if isinstance(inp, str):
@@ -417,7 +602,8 @@ def handle_jinx_call(
             api_url=api_url,
             api_key=api_key,
             npc=npc,
-            context=context
+            context=context,
+            cache=repeated_call_cache(),
         )
 
         try:
@@ -470,85 +656,106 @@ def handle_jinx_call(
                 "messages": messages,
             }
 
-        
-        render_markdown( "\n".join(['\n - ' + str(key) + ': ' +str(val) for key, val in input_values.items()]))
+        return _run_jinx_with_inputs(
+            command, jinx, _with_input_defaults(jinx, input_values), jinja_env, model=model, provider=provider,
+            api_url=api_url, api_key=api_key, messages=messages, npc=npc,
+            stream=stream, n_attempts=n_attempts, attempt=attempt, context=context,
+        )
 
-        try:
-            jinx_output = jinx.execute(
-                input_values,
-                jinja_env,
-                npc=npc,
 
-                messages=messages,
-            )
-            if 'llm_response' in jinx_output and 'messages' in jinx_output:
-                if len(jinx_output['llm_response'])>0:                
-                    messages = jinx_output['messages']
-        except Exception as e:
-            print(f"An error occurred while executing the jinx: {e}")
-            print(f"trying again, attempt {attempt+1}")
-            print('command', command)
-            if attempt < n_attempts:
-                jinx_output = handle_jinx_call(
-                    command,
-                    jinx_name,
-                    model=model,
-                    provider=provider,
-                    messages=messages,
-                    npc=npc,
-                    api_url=api_url,
-                    api_key=api_key,
-                    stream=stream,
-                    attempt=attempt + 1,
-                    n_attempts=n_attempts,
-                    context=f""" \n \n \n "jinx failed: {e}  \n \n \n here was the previous attempt: {input_values}""",
-                )
-            else:
-                user_input = input(
-                    "the jinx execution has failed after three tries, can you add more context to help or would you like to run again?"
-                )
-                return handle_jinx_call(
-                    command + " " + user_input,
-                    jinx_name,
-                    model=model,
-                    provider=provider,
-                    messages=messages,
-                    npc=npc,
-                    api_url=api_url,
-                    api_key=api_key,
-                    stream=stream,
-                    attempt=attempt + 1,
-                    n_attempts=n_attempts,
-                    context=context,
-                )
-        # process the jinx call
-        #print(messages)
-        if not stream and messages[-1]['role'] != 'assistant':
-            # if the jinx has already added a message to the output from a final prompt we dont want to double that
-            
-            render_markdown(f""" ## jinx OUTPUT FROM CALLING {jinx_name} \n \n output:{jinx_output['output']}""" )
+def _with_input_defaults(jinx, input_values):
+    input_values = dict(input_values)
+    for inp in jinx.inputs:
+        if isinstance(inp, dict):
+            for key, default in inp.items():
+                input_values.setdefault(key, default)
+    return input_values
 
-            
-            response = get_llm_response(f"""
-                The user had the following request: {command}. 
-                Here were the jinx outputs from calling {jinx_name}: {jinx_output}
-                
-                Given the jinx outputs and the user request, please format a simple answer that 
-                provides the answer without requiring the user to carry out any further steps.
-                """,
+
+def _run_jinx_with_inputs(
+    command, jinx, input_values, jinja_env, model=None, provider=None, api_url=None,
+    api_key=None, messages=None, npc=None, stream=False, n_attempts=3, attempt=0, context=None,
+):
+    """Executes jinx with resolved inputs (retrying through handle_jinx_call on failure) and formats the answer."""
+    jinx_name = jinx.jinx_name
+    render_markdown( "\n".join(['\n - ' + str(key) + ': ' +str(val) for key, val in input_values.items()]))
+
+    try:
+        jinx_output = jinx.execute(
+            input_values,
+            jinja_env,
+            npc=npc,
+
+            messages=messages,
+        )
+        if 'llm_response' in jinx_output and 'messages' in jinx_output:
+            if len(jinx_output['llm_response'])>0:                
+                messages = jinx_output['messages']
+    except Exception as e:
+        print(f"An error occurred while executing the jinx: {e}")
+        print(f"trying again, attempt {attempt+1}")
+        print('command', command)
+        if attempt < n_attempts:
+            jinx_output = handle_jinx_call(
+                command,
+                jinx_name,
                 model=model,
                 provider=provider,
+                messages=messages,
+                npc=npc,
                 api_url=api_url,
                 api_key=api_key,
-                npc=npc,
+                stream=stream,
+                attempt=attempt + 1,
+                n_attempts=n_attempts,
+                context=f""" \n \n \n "jinx failed: {e}  \n \n \n here was the previous attempt: {input_values}""",
+            )
+        else:
+            user_input = input(
+                "the jinx execution has failed after three tries, can you add more context to help or would you like to run again?"
+            )
+            return handle_jinx_call(
+                command + " " + user_input,
+                jinx_name,
+                model=model,
+                provider=provider,
                 messages=messages,
-                context=context, 
+                npc=npc,
+                api_url=api_url,
+                api_key=api_key,
                 stream=stream,
+                attempt=attempt + 1,
+                n_attempts=n_attempts,
+                context=context,
             )
-            messages = response['messages']
-            response = response.get("response", {})
-            return {'messages':messages, 'output':response}
-        return {'messages': messages, 'output': jinx_output}
+    # process the jinx call
+    #print(messages)
+    if not stream and (not messages or messages[-1]['role'] != 'assistant'):
+        # if the jinx has already added a message to the output from a final prompt we dont want to double that
+        
+        render_markdown(f""" ## jinx OUTPUT FROM CALLING {jinx_name} \n \n output:{jinx_output['output']}""" )
+
+        
+        response = get_llm_response(f"""
+            The user had the following request: {command}. 
+            Here were the jinx outputs from calling {jinx_name}: {jinx_output}
+            
+            Given the jinx outputs and the user request, please format a simple answer that 
+            provides the answer without requiring the user to carry out any further steps.
+            """,
+            model=model,
+            provider=provider,
+            api_url=api_url,
+            api_key=api_key,
+            npc=npc,
+            messages=messages,
+            context=context, 
+            stream=stream,
+        )
+        messages = response['messages']
+        response = response.get("response", {})
+        return {'messages':messages, 'output':response}
+    return {'messages': messages, 'output': jinx_output}
 
 
 def handle_request_input(
@@ -592,6 +799,133 @@ def handle_request_input(
     return user_input
 
 
+# "auto" tries function calling and remembers models that reject it; "off" always uses the JSON routing prompt
+NATIVE_JINX_TOOLS = os.environ.get("NPCSH_NATIVE_TOOLS", "auto")
+_models_without_tools = set()
+_TOOLS_REJECTED = re.compile(
+    r"(does not|doesn't|do not) support (tools|tool|function)"
+    r"|(tools|tool_choice|function[ _]calling|functions) (is |are )?not supported",
+    re.IGNORECASE,
+)
+
+
+def _rejects_tools(error):
+    """True when a provider error says the model does not take tools, as opposed to a transient failure"""
+    if any(cls.__name__ == "UnsupportedParamsError" for cls in type(error).__mro__):
+        return True
+    return bool(_TOOLS_REJECTED.search(str(error)))
+
+
+def _native_tools_supported(model, provider):
+    if NATIVE_JINX_TOOLS == "off" or not model or (provider, model) in _models_without_tools:
+        return False
+    if NATIVE_JINX_TOOLS == "on" or provider == "ollama":
+        return True
+    try:
+        import litellm
+
+        name = model if "/" in model or not provider else f"{provider}/{model}"
+        return bool(litellm.supports_function_calling(model=name))
+    except Exception:
+        return False
+
+
+def jinx_tools(jinxs, npc, messages=None):
+    """
+    Tool schemas and a tool_map for get_llm_response built from jinxs; each tool
+    runs its jinx with the arguments the model chose and returns the jinx output.
+    Jinxs whose names collapse to the same tool name get a numeric suffix.
+    """
+    tools = []
+    tool_map = {}
+    for jinx in jinxs.values():
+        def run(_jinx=jinx, **input_values):
+            for inp in _jinx.inputs:
+                if isinstance(inp, dict):
+                    for name, default in inp.items():
+                        input_values.setdefault(name, default)
+            render_markdown(f"jinx found: {_jinx.jinx_name}")
+            jinx_output = _jinx.execute(
+                input_values,
+                npc.jinxs_dict,
+                jinja_env=getattr(npc, "jinja_env", None),
+                npc=npc,
+                messages=messages,
+            )
+            return jinx_output.get("output")
+
+        schema = jinx.to_tool_schema()
+        name = base = schema["function"]["name"]
+        n = 2
+        while name in tool_map:
+            suffix = f"_{n}"
+            name = base[:64 - len(suffix)] + suffix
+            n += 1
+        schema["function"]["name"] = name
+        tools.append(schema)
+        tool_map[name] = run
+    return tools, tool_map
+
+
+def _check_llm_command_with_tools(
+    command, candidate_jinxs, model, provider, api_url, api_key, npc, messages, images, stream, context
+):
+    """
+    Picks a jinx and its inputs with one function-calling request. Returns None
+    when the request fails so the caller can fall back to the prompt flow; only
+    a provider rejecting tools turns function calling off for the model.
+    """
+    tools, tool_map = jinx_tools(candidate_jinxs, npc, messages)
+    try:
+        result = get_llm_response(
+            command,
+            model=model,
+            provider=provider,
+            api_url=api_url,
+            api_key=api_key,
+            npc=npc,
+            messages=messages,
+            images=images,
+            tools=tools,
+            tool_map=tool_map,
+            stream=stream,
+            context=context,
+        )
+    except Exception as e:
+        result = {"error": e}
+    if result.get("error") and not result.get("tool_results"):
+        print(f"Native tool calling failed for {provider}/{model}, using the routing prompt: {result['error']}")
+        if _rejects_tools(result["error"]):
+            _models_without_tools.add((provider or getattr(npc, "provider", None), model or getattr(npc, "model", None)))
+        return None
+
+    tool_results = result.get("tool_results") or []
+    if not tool_results:
+        return {'messages': result.get('messages', messages), 'output': result.get('response', '')}
+
+    jinx_names = ", ".join(r["tool_name"] for r in tool_results)
+    jinx_output = {r["tool_name"]: r["result"] for r in tool_results}
+    if len(tool_results) == 1:
+        jinx_output = tool_results[0]["result"]
+    response = get_llm_response(f"""
+        The user had the following request: {command}. 
+        Here were the jinx outputs from calling {jinx_names}: {jinx_output}
+        
+        Given the jinx outputs and the user request, please format a simple answer that 
+        provides the answer without requiring the user to carry out any further steps.
+        """,
+        model=model,
+        provider=provider,
+        api_url=api_url,
+        api_key=api_key,
+        npc=npc,
+        messages=messages,
+        context=context,
+        stream=stream,
+    )
+    return {'messages': response.get('messages', messages), 'output': response.get('response', '')}
+
+
 def check_llm_command(
     command: str,
     model: str = None, 
@@ -608,6 +942,9 @@ def check_llm_command(
     stream=False,
     context=None,    
     shell = False,
+    control_model: str = None,
+    control_provider: str = None,
+    jinx_top_k: int = None,
 ):
     """This function checks an LLM command.
     Args:
@@ -618,6 +955,10 @@ def check_llm_command(
         npc (Any): The Guardian object.
         messages (List[Dict[str, str]]): The message history.
         stream (bool): Whether to stream the response.
+        control_model (str): Model for choosing the action (defaults to the team's control model).
+        control_provider (str): Provider for control_model.
+        jinx_top_k (int): How many of the Guardian's jinxs to list, picked by embedding
+            similarity to the command (defaults to NPCSH_JINX_TOP_K; 0 lists all).
     Returns:
         Any: The result of checking the LLM command or a generator if stream=True.
     """
@@ -646,6 +987,22 @@ def check_llm_command(
             'messages': result.get('messages', messages),
             'output': result.get('response', '')
         }
+
+    # Jinx selection and input extraction in one function-calling round trip; with a
+    # team the routing prompt is kept so requests can still be passed to other Guardians
+    native_model = model or getattr(npc, "model", None)
+    native_provider = provider or getattr(npc, "provider", None)
+    if (
+        npc is not None and npc.jinxs_dict and jinxs is None and team is None
+        and _native_tools_supported(native_model, native_provider)
+    ):
+        candidate_jinxs = get_jinx_index().select(command, npc.jinxs_dict, k=jinx_top_k)
+        result = _check_llm_command_with_tools(
+            command, candidate_jinxs, model, provider, api_url, api_key,
+            npc, messages, images, stream, context,
+        )
+        if result is not None:
+            return result
             
     prompt += f"""
     Determine the nature of the user's request:
@@ -672,7 +1029,9 @@ def check_llm_command(
             jinx_component += "Available jinxs: \n"
             jinxs_set = {}
             if npc.jinxs_dict is not None:
-                for jinx_name, jinx in npc.jinxs_dict.items():
+                # Large libraries: only list the jinxs closest to the command
+                candidate_jinxs = get_jinx_index().select(command, npc.jinxs_dict, k=jinx_top_k)
+                for jinx_name, jinx in candidate_jinxs.items():
                     if jinx_name not in jinxs_set:
                         jinxs_set[jinx_name] = jinx.description
             for jinx_name, jinx_description in jinxs_set.items():
@@ -777,16 +1136,21 @@ def check_llm_command(
 
         """
     
+    # Routing is a small JSON classification; a team control-plane model handles it when configured
+    if control_model is None and team is not None:
+        control_model = getattr(team, "control_model", None)
+        control_provider = getattr(team, "control_provider", None)
+    if control_model:
+        routing_llm = {"model": control_model, "provider": control_provider or lookup_provider(control_model)}
+    else:
+        routing_llm = {"model": model, "provider": provider, "api_url": api_url, "api_key": api_key}
     action_response = get_llm_response(
         prompt,
-        model=model,
-        provider=provider,
-        api_url=api_url,
-        api_key=api_key,
         npc=npc,
         format="json",
         messages=[],
         context=None,
+        **routing_llm,
     )
 
     if "Error" in action_response:
@@ -1,6 +1,3 @@
-# Import statements
-import numpy as np
-
 # Define sample primary directives for Guardians
 sample_primary_directives = [
     ("Research Assistant", "Help users find and analyze information"),
@@ -10,7 +10,6 @@ import json
 import subprocess
 
 try:
-    import torch
     import pyaudio
     import wave
     from typing import Optional, List, Dict, Any
@@ -40,13 +39,16 @@ try:
     tts_queue = queue.PriorityQueue()
     cleanup_files = []
 
-    # Initialize pygame mixer
-    pygame.mixer.quit()
-    pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
 except:
     print("audio dependencies not installed")
 
 
+def _ensure_mixer():
+    """Initializes pygame's mixer on first playback rather than at import time."""
+    if not pygame.mixer.get_init():
+        pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+
+
 def convert_mp3_to_wav(mp3_file, wav_file):
     try:
         # Ensure the output file doesn't exist before conversion
@@ -145,6 +147,7 @@ def cleanup_temp_files():
 def interrupt_speech():
     global should_stop_speaking
     should_stop_speaking = True
+    _ensure_mixer()
     pygame.mixer.music.stop()
     pygame.mixer.music.unload()
 
@@ -189,6 +192,9 @@ def run_transcription(audio_np):
             wf.setsampwidth(2)
             wf.setframerate(RATE)
             wf.writeframes((audio_np * 32768).astype(np.int16).tobytes())
+
+        import torch
+
         whisper_model = WhisperModel("large-v3", device="cuda" if torch.cuda.is_available() else "cpu")
         segments, info = whisper_model.transcribe(temp_file, language="en", beam_size=5)
         transcription = " ".join([segment.text for segment in segments])
@@ -263,6 +269,7 @@ def cleanup_temp_files():
 def interrupt_speech():
     global should_stop_speaking, response_generator, is_speaking, tts_sequence
     should_stop_speaking = True
+    _ensure_mixer()
     pygame.mixer.music.stop()
     pygame.mixer.music.unload()
 
@@ -291,6 +298,7 @@ def audio_callback(in_data, frame_count, time_info, status):
 def play_audio_from_queue():
     global is_speaking, cleanup_files, should_stop_speaking
     next_sequence = 0
+    _ensure_mixer()
 
     while True:
         if should_stop_speaking:
@@ -0,0 +1,252 @@
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Union
+
+
+# Opt-in for the library's own repeated deterministic calls: jinx input
+# extraction, the orchestrate relevance check and extract_facts
+CACHE_REPEATED_CALLS = os.environ.get("NPCSH_LLM_CACHE", "").lower() in ("1", "true", "yes", "on")
+
+
+def make_cache_key(
+    provider: str = None,
+    model: str = None,
+    messages: List[Dict[str, Any]] = None,
+    format: Any = None,
+    tools: list = None,
+    temperature: float = None,
+    prompt: str = None,
+    options: Dict[str, Any] = None,
+) -> str:
+    """
+    Builds a content-addressed key for an LLM request.
+    Args:
+        provider, model, messages, format, tools, temperature, prompt: request fields
+        options: other request settings that change the response (credentials,
+            endpoint, max_tokens, stop, top_p, ...)
+    Returns:
+        str: sha256 hex digest of the canonical JSON form of the request
+    """
+    if isinstance(format, type) and hasattr(format, "model_json_schema"):
+        format = format.model_json_schema()
+    payload = {
+        "provider": provider,
+        "model": model,
+        "messages": messages or [],
+        "format": format,
+        "tools": tools or [],
+        "temperature": temperature,
+        "prompt": prompt,
+    }
+    if options:
+        payload["options"] = options
+    canonical = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM result dicts: an in-memory LRU in front of an
+    on-disk SQLite table with TTL and size-based eviction.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "~/npcsh_llm_cache.db",
+        max_memory_entries: int = 512,
+        ttl: Optional[float] = 7 * 24 * 3600,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+        use_disk: bool = True,
+    ):
+        self.db_path = os.path.expanduser(db_path) if db_path else None
+        self.max_memory_entries = max_memory_entries
+        self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
+        self.use_disk = use_disk and self.db_path is not None
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+        if self.use_disk:
+            self._init_db()
+
+    def _init_db(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_response_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_response_cache (last_access)"
+            )
+            conn.commit()
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl is not None and (time.time() - created_at) > self.ttl
+
+    def _remember(self, key: str, value: Dict[str, Any], created_at: float):
+        """Insert into the LRU tier; caller must hold the lock."""
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns a copy of the cached result for key, or None on miss."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._expired(created_at):
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return copy.deepcopy(value)
+                del self._memory[key]
+
+        if self.use_disk:
+            now = time.time()
+            with sqlite3.connect(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT value, created_at FROM llm_response_cache WHERE cache_key = ?",
+                    (key,),
+                ).fetchone()
+                if row is not None:
+                    value_str, created_at = row
+                    if self._expired(created_at):
+                        conn.execute("DELETE FROM llm_response_cache WHERE cache_key = ?", (key,))
+                    else:
+                        conn.execute(
+                            "UPDATE llm_response_cache SET last_access = ? WHERE cache_key = ?",
+                            (now, key),
+                        )
+                        value = json.loads(value_str)
+                        with self._lock:
+                            self._remember(key, value, created_at)
+                            self.stats["disk_hits"] += 1
+                        return copy.deepcopy(value)
+                conn.commit()
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Stores a JSON-serializable result dict under key in both tiers."""
+        value_str = json.dumps(value, default=str)
+        value = json.loads(value_str)
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self.stats["writes"] += 1
+
+        if not self.use_disk:
+            return
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO llm_response_cache
+                   (cache_key, value, size, created_at, last_access)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (key, value_str, len(value_str), now, now),
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        """Drops expired rows, then least recently used rows until under max_disk_bytes."""
+        if self.ttl is not None:
+            cursor = conn.execute(
+                "DELETE FROM llm_response_cache WHERE created_at < ?",
+                (time.time() - self.ttl,),
+            )
+            self._count_evictions(cursor.rowcount)
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_response_cache").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        rows = conn.execute(
+            "SELECT cache_key, size FROM llm_response_cache ORDER BY last_access ASC"
+        ).fetchall()
+        stale = []
+        for cache_key, size in rows:
+            if total <= self.max_disk_bytes:
+                break
+            stale.append((cache_key,))
+            total -= size
+        conn.executemany("DELETE FROM llm_response_cache WHERE cache_key = ?", stale)
+        self._count_evictions(len(stale))
+
+    def _count_evictions(self, n: int):
+        if n and n > 0:
+            with self._lock:
+                self.stats["evictions"] += n
+
+    def clear(self):
+        """Empties both tiers."""
+        with self._lock:
+            self._memory.clear()
+        if self.use_disk:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("DELETE FROM llm_response_cache")
+                conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters plus the current hit rate."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache(**kwargs) -> ResponseCache:
+    """Returns the process-wide ResponseCache, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(**kwargs)
+        return _default_cache
+
+
+def resolve_cache(cache: Union[bool, ResponseCache, None]) -> Optional[ResponseCache]:
+    """Maps the `cache` argument of the response functions to a cache instance (or None)."""
+    if cache is None or cache is False:
+        return None
+    if cache is True:
+        return get_response_cache()
+    return cache
+
+
+def repeated_call_cache() -> Optional[bool]:
+    """The cache argument for the library's repeated calls: True when NPCSH_LLM_CACHE is on, else None."""
+    return True if CACHE_REPEATED_CALLS else None
+
+
+def cacheable_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Strips the provider objects from a result dict so it can be stored."""
+    return {
+        "response": result.get("response"),
+        "messages": result.get("messages", []),
+        "tool_calls": [],
+        "tool_results": result.get("tool_results", []),
+    }
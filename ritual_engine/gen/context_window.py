@@ -0,0 +1,186 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+
+def _litellm():
+    """litellm is imported on first use; it takes seconds to import."""
+    try:
+        import litellm
+    except (ImportError, OSError):
+        return None
+    return litellm
+
+# Per-message framing overhead used by chat formats (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+DEFAULT_MAX_TOKENS = 8192
+
+
+def message_text(message: Dict[str, Any]) -> str:
+    """Returns the text content of a message, joining the text parts of multimodal content."""
+    content = message.get("content")
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(
+            part.get("text", "") for part in content
+            if isinstance(part, dict) and part.get("type") == "text"
+        )
+    return str(content)
+
+
+class ContextWindowManager:
+    """
+    Keeps a message history inside a model's context window.
+
+    Token counts are computed once per message and cached by message_id
+    (or by a hash of role and content when a message has no id). fit()
+    always keeps the system prompt and the latest message, then keeps as many
+    of the most recent turns as fit the model budget. Older turns are dropped,
+    or condensed into a single summary message when a summarizer is given.
+    """
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        reserve_tokens: int = 1024,
+        model_budgets: Optional[Dict[str, int]] = None,
+        summarizer: Optional[Callable[[List[Dict[str, Any]]], str]] = None,
+        cache_size: int = 10000,
+    ):
+        """
+        Args:
+            max_tokens: context size to use for every model (looked up per model when None)
+            reserve_tokens: tokens left free for the completion
+            model_budgets: {model: context_tokens} overrides
+            summarizer: callable turning evicted messages into a summary string
+            cache_size: number of per-message token counts to keep
+        """
+        self.max_tokens = max_tokens
+        self.reserve_tokens = reserve_tokens
+        self.model_budgets = dict(model_budgets or {})
+        self.summarizer = summarizer
+        self.cache_size = cache_size
+        self._counts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _message_key(self, message: Dict[str, Any], model: Optional[str]) -> str:
+        message_id = message.get("message_id") or message.get("id")
+        if message_id is None:
+            digest = hashlib.sha1(
+                (str(message.get("role")) + "\x00" + message_text(message)).encode("utf-8")
+            ).hexdigest()
+            message_id = f"sha1:{digest}"
+        return f"{model}:{message_id}"
+
+    def _count_text(self, text: str, model: Optional[str]) -> int:
+        litellm = _litellm() if model else None
+        if litellm is not None:
+            try:
+                return litellm.token_counter(model=model, text=text)
+            except Exception:
+                pass
+        # Roughly 4 characters per token for English text
+        return (len(text) + 3) // 4
+
+    def count_tokens(self, message: Dict[str, Any], model: Optional[str] = None) -> int:
+        """Token count for one message, served from the cache after the first call."""
+        key = self._message_key(message, model)
+        with self._lock:
+            if key in self._counts:
+                self._counts.move_to_end(key)
+                return self._counts[key]
+        count = self._count_text(message_text(message), model) + MESSAGE_OVERHEAD_TOKENS
+        with self._lock:
+            self._counts[key] = count
+            while len(self._counts) > self.cache_size:
+                self._counts.popitem(last=False)
+        return count
+
+    def count_messages(self, messages: List[Dict[str, Any]], model: Optional[str] = None) -> int:
+        return sum(self.count_tokens(m, model) for m in messages)
+
+    def budget_for(self, model: Optional[str] = None) -> int:
+        """Prompt token budget for a model: its context size minus reserve_tokens."""
+        if model in self.model_budgets:
+            context_tokens = self.model_budgets[model]
+        elif self.max_tokens is not None:
+            context_tokens = self.max_tokens
+        else:
+            context_tokens = None
+            litellm = _litellm() if model else None
+            if litellm is not None:
+                try:
+                    context_tokens = litellm.get_max_tokens(model)
+                except Exception:
+                    context_tokens = None
+            context_tokens = context_tokens or DEFAULT_MAX_TOKENS
+        return max(context_tokens - self.reserve_tokens, 0)
+
+    def fit(
+        self,
+        messages: List[Dict[str, Any]],
+        model: Optional[str] = None,
+        budget: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns messages trimmed to the budget. The same list object is
+        returned untouched when it already fits.
+        """
+        if not messages:
+            return messages
+        if budget is None:
+            budget = self.budget_for(model)
+
+        counts = [self.count_tokens(m, model) for m in messages]
+        if sum(counts) <= budget:
+            return messages
+
+        head = 1 if messages[0].get("role") == "system" else 0
+        used = sum(counts[:head]) + counts[-1]
+        keep_from = len(messages) - 1
+        for i in range(len(messages) - 2, head - 1, -1):
+            if used + counts[i] > budget:
+                break
+            used += counts[i]
+            keep_from = i
+
+        evicted = messages[head:keep_from]
+        kept = messages[:head] + messages[keep_from:]
+        if evicted and self.summarizer is not None:
+            summary = self._summarize(evicted, budget - used, model)
+            if summary is not None:
+                kept = messages[:head] + [summary] + messages[keep_from:]
+        return kept
+
+    def _summarize(self, evicted, room: int, model: Optional[str]):
+        try:
+            summary_text = self.summarizer(evicted)
+        except Exception as e:
+            print(f"Error summarizing evicted context: {e}")
+            return None
+        if not summary_text:
+            return None
+        summary = {
+            "role": "system",
+            "content": f"Summary of earlier conversation:\n{summary_text}",
+        }
+        if self.count_tokens(summary, model) > room:
+            return None
+        return summary
+
+
+_default_manager = None
+_default_manager_lock = threading.Lock()
+
+
+def get_context_window_manager(**kwargs) -> ContextWindowManager:
+    """Returns the process-wide ContextWindowManager, creating it on first use."""
+    global _default_manager
+    with _default_manager_lock:
+        if _default_manager is None:
+            _default_manager = ContextWindowManager(**kwargs)
+        return _default_manager
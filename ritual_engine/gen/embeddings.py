@@ -8,12 +8,6 @@ from typing import List, Dict, Optional
 import numpy as np
 from datetime import datetime
 
-try:
-    from openai import OpenAI
-    import anthropic
-except: 
-    pass
-
 def get_ollama_embeddings(
     texts: List[str], model: str = "nomic-embed-text"
 ) -> List[List[float]]:
@@ -31,6 +25,8 @@ def get_openai_embeddings(
     texts: List[str], model: str = "text-embedding-3-small"
 ) -> List[List[float]]:
     """Generate embeddings using OpenAI."""
+    from openai import OpenAI
+
     client = OpenAI()
     response = client.embeddings.create(input=texts, model=model)
     return [embedding.embedding for embedding in response.data]
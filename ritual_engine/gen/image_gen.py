@@ -6,7 +6,6 @@ from typing import Union, List, Optional
 import PIL
 from PIL import Image
 
-from litellm import image_generation
 
 
 
@@ -238,6 +237,8 @@ def generate_image(
             raise ValueError("Image editing not supported with litellm provider")
         
         # Generate image using litellm
+        from litellm import image_generation
+
         result = image_generation(
             prompt=prompt,
             model=f"{provider}/{model}",
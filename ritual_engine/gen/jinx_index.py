@@ -0,0 +1,105 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# Jinxs listed in a routing prompt; 0 lists them all
+JINX_TOP_K = int(os.environ.get("NPCSH_JINX_TOP_K", "8"))
+
+
+def _embedding_settings():
+    # GuardianSH_* are the names the settings page writes to ~/.npcshrc
+    model = os.environ.get("NPCSH_EMBEDDING_MODEL") or os.environ.get("GuardianSH_EMBEDDING_MODEL") or "nomic-embed-text"
+    provider = os.environ.get("NPCSH_EMBEDDING_PROVIDER") or os.environ.get("GuardianSH_EMBEDDING_PROVIDER") or "ollama"
+    return model, provider
+
+
+def jinx_text(jinx) -> str:
+    return f"{jinx.jinx_name}: {jinx.description or ''}"
+
+
+class JinxIndex:
+    """
+    Embedding index over jinx names and descriptions, used to list only the
+    jinxs relevant to a command in the routing prompt.
+
+    A description is embedded once per process, keyed by its text, so every
+    Guardian sharing the registry's jinxs shares the vectors; a request
+    costs one embedding of the command. If embedding fails, select() returns
+    the full set and the index stays off for retry_after seconds.
+    """
+
+    def __init__(
+        self,
+        model: str = None,
+        provider: str = None,
+        embed: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        retry_after: float = 300.0,
+    ):
+        default_model, default_provider = _embedding_settings()
+        self.model = model or default_model
+        self.provider = provider or default_provider
+        self._embed = embed
+        self.retry_after = retry_after
+        self._vectors: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._disabled_until = 0.0
+        self.stats = {"selections": 0, "fallbacks": 0, "embedded": 0}
+
+    def embed(self, texts: List[str]):
+        if self._embed is not None:
+            return self._embed(texts)
+        from ritual_engine.gen.embeddings import get_embeddings
+
+        return get_embeddings(texts, self.model, self.provider)
+
+    def _vectors_for(self, texts: List[str]):
+        import numpy as np
+
+        keys = [hashlib.sha1(text.encode("utf-8")).hexdigest() for text in texts]
+        with self._lock:
+            missing = [(key, text) for key, text in zip(keys, texts) if key not in self._vectors]
+        if missing:
+            embedded = self.embed([text for _, text in missing])
+            with self._lock:
+                for (key, _), vector in zip(missing, embedded):
+                    vector = np.asarray(vector, dtype=np.float32)
+                    self._vectors[key] = vector / (np.linalg.norm(vector) or 1.0)
+                self.stats["embedded"] += len(missing)
+        with self._lock:
+            return np.stack([self._vectors[key] for key in keys])
+
+    def select(self, command: str, jinxs: Dict[str, object], k: int = None) -> Dict[str, object]:
+        """The k jinxs whose descriptions are closest to command, in their original order"""
+        k = JINX_TOP_K if k is None else k
+        if not jinxs or k <= 0 or len(jinxs) <= k or time.monotonic() < self._disabled_until:
+            return jinxs
+        import numpy as np
+
+        names = list(jinxs)
+        try:
+            matrix = self._vectors_for([jinx_text(jinxs[name]) for name in names])
+            query = np.asarray(self.embed([command])[0], dtype=np.float32)
+        except Exception as e:
+            print(f"Jinx pre-selection unavailable, listing all jinxs: {e}")
+            self._disabled_until = time.monotonic() + self.retry_after
+            self.stats["fallbacks"] += 1
+            return jinxs
+        scores = matrix @ (query / (np.linalg.norm(query) or 1.0))
+        top = set(np.argsort(-scores)[:k].tolist())
+        self.stats["selections"] += 1
+        return {name: jinxs[name] for i, name in enumerate(names) if i in top}
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_jinx_index() -> JinxIndex:
+    """Returns the process-wide JinxIndex for the configured embedding model."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = JinxIndex()
+        return _default_index
@@ -0,0 +1,177 @@
+import json
+import re
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+_WHITESPACE = " \t\r\n"
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class _Frame:
+    __slots__ = ("container", "path", "key", "expect_key")
+
+    def __init__(self, container, path):
+        self.container = container
+        self.path = path
+        self.key = None
+        self.expect_key = isinstance(container, dict)
+
+
+class IncrementalJSONParser:
+    """
+    Incremental JSON tokenizer for streamed LLM output.
+
+    Text is fed in arbitrary chunks and every character is scanned once;
+    values are built in place instead of re-parsing the buffer. feed() returns
+    (path, value) events for each value completed by that chunk, where path is
+    a tuple of object keys and array indices from the root, e.g.
+    ("fact_list", 2). Containers are attached to their parent as soon as they
+    open, so `partial` always holds the document parsed so far.
+
+    Anything before the first '{' or '[' (such as a ```json fence) and after
+    the root closes is ignored.
+    """
+
+    def __init__(self):
+        self._stack: List[_Frame] = []
+        self._string: Optional[List[str]] = None
+        self._escape = False
+        self._literal: Optional[List[str]] = None
+        self.partial = None
+        self.done = False
+
+    @property
+    def result(self):
+        """The root value once the document is complete, else None."""
+        return self.partial if self.done else None
+
+    def feed(self, text: str) -> List[Tuple[tuple, Any]]:
+        events = []
+        i, n = 0, len(text)
+        while i < n and not self.done:
+            if self._string is not None:
+                i = self._scan_string(text, i, events)
+                continue
+
+            c = text[i]
+            if self._literal is not None:
+                if c in _WHITESPACE or c in ",]}":
+                    self._complete_literal(events)
+                else:
+                    self._literal.append(c)
+                    i += 1
+                    continue
+
+            if not self._stack:
+                if c == "{":
+                    self._open({}, events)
+                elif c == "[":
+                    self._open([], events)
+                i += 1
+                continue
+
+            if c in _WHITESPACE or c == ":":
+                pass
+            elif c == "{":
+                self._open({}, events)
+            elif c == "[":
+                self._open([], events)
+            elif c in "]}":
+                self._close(events)
+            elif c == ",":
+                frame = self._stack[-1]
+                frame.expect_key = isinstance(frame.container, dict)
+            elif c == '"':
+                self._string = []
+            else:
+                self._literal = [c]
+            i += 1
+        return events
+
+    def _scan_string(self, text: str, start: int, events) -> int:
+        """Consumes string content from start; returns the index after the closing quote or len(text)."""
+        pos, n = start, len(text)
+        while True:
+            if self._escape:
+                if pos >= n:
+                    break
+                self._escape = False
+                pos += 1
+                continue
+            match = _STRING_SPECIAL.search(text, pos)
+            if match is None:
+                break
+            if match.group() == "\\":
+                self._escape = True
+                pos = match.end()
+                continue
+            self._string.append(text[start:match.start()])
+            raw = "".join(self._string)
+            self._string = None
+            self._complete_string(raw, events)
+            return match.end()
+        self._string.append(text[start:])
+        return n
+
+    def _complete_string(self, raw: str, events):
+        value = json.loads('"' + raw + '"', strict=False)
+        frame = self._stack[-1]
+        if frame.expect_key:
+            frame.key = value
+            frame.expect_key = False
+        else:
+            self._add_value(value, events)
+
+    def _complete_literal(self, events):
+        raw = "".join(self._literal)
+        self._literal = None
+        self._add_value(json.loads(raw), events)
+
+    def _child_path(self, value) -> tuple:
+        """Attaches value to the current container and returns its path."""
+        frame = self._stack[-1]
+        if isinstance(frame.container, dict):
+            frame.container[frame.key] = value
+            return frame.path + (frame.key,)
+        frame.container.append(value)
+        return frame.path + (len(frame.container) - 1,)
+
+    def _add_value(self, value, events):
+        events.append((self._child_path(value), value))
+
+    def _open(self, container, events):
+        if self._stack:
+            path = self._child_path(container)
+        else:
+            path = ()
+            self.partial = container
+        self._stack.append(_Frame(container, path))
+
+    def _close(self, events):
+        frame = self._stack.pop()
+        events.append((frame.path, frame.container))
+        if not self._stack:
+            self.done = True
+
+
+def iter_json_stream(
+    chunks: Iterable[str],
+    path: Optional[tuple] = None,
+) -> Iterator[Tuple[tuple, Any]]:
+    """
+    Feeds text chunks through an IncrementalJSONParser.
+    Args:
+        chunks: iterable of text fragments
+        path: when given, only yield values whose parent is at this path,
+              e.g. ("fact_list",) yields each fact as soon as it closes
+    Yields:
+        (path, value) for every completed value (filtered by path)
+    """
+    parser = IncrementalJSONParser()
+    for chunk in chunks:
+        if not chunk:
+            continue
+        for value_path, value in parser.feed(chunk):
+            if path is None or value_path[:-1] == tuple(path):
+                yield value_path, value
+        if parser.done:
+            break
@@ -0,0 +1,303 @@
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+_hooks: List[Callable[[Dict[str, Any]], None]] = []
+_hooks_lock = threading.Lock()
+_env_configured = False
+_labels = contextvars.ContextVar("llm_metrics_labels", default={})
+
+
+def add_llm_hook(hook: Callable[[Dict[str, Any]], None]):
+    """
+    Registers a callable that receives one record dict per LLM call:
+    timestamp, npc, jinx, provider, model, stream, wall_time, ttft,
+    prompt_tokens, completion_tokens, tokens_per_sec, cost, cache_hit,
+    coalesced and error.
+    """
+    with _hooks_lock:
+        if hook not in _hooks:
+            _hooks.append(hook)
+    return hook
+
+
+def remove_llm_hook(hook: Callable[[Dict[str, Any]], None]):
+    with _hooks_lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+def llm_hooks_enabled() -> bool:
+    _configure_from_env()
+    return bool(_hooks)
+
+
+@contextmanager
+def llm_metrics_labels(**labels):
+    """Attaches labels (e.g. jinx="sql_executor") to every call recorded inside the block."""
+    token = _labels.set({**_labels.get(), **labels})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+def emit_llm_record(record: Dict[str, Any]):
+    _configure_from_env()
+    with _hooks_lock:
+        hooks = list(_hooks)
+    for hook in hooks:
+        try:
+            hook(record)
+        except Exception as e:
+            print(f"Error in LLM metrics hook {hook}: {e}")
+
+
+def _field(obj, name):
+    """Reads name from a dict-like or attribute-style provider object."""
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    value = getattr(obj, name, None)
+    if value is None and hasattr(obj, "get"):
+        try:
+            value = obj.get(name)
+        except Exception:
+            value = None
+    return value
+
+
+def _usage_tokens(raw) -> tuple:
+    """(prompt_tokens, completion_tokens) from a litellm response/chunk or an ollama response."""
+    usage = _field(raw, "usage")
+    if usage is not None:
+        return _field(usage, "prompt_tokens"), _field(usage, "completion_tokens")
+    return _field(raw, "prompt_eval_count"), _field(raw, "eval_count")
+
+
+class LLMCallTimer:
+    """
+    Measures one LLM call and emits its record to the registered hooks.
+    For streams the record is emitted when the stream is exhausted, with the
+    time to first chunk as ttft.
+    """
+
+    def __init__(self, npc=None, provider: str = None, model: str = None, stream: bool = False):
+        name = getattr(npc, "name", npc)
+        self.record = {
+            "timestamp": datetime.now().isoformat(),
+            "npc": name,
+            "jinx": None,
+            "provider": provider,
+            "model": model,
+            "stream": bool(stream),
+            "wall_time": None,
+            "ttft": None,
+            "prompt_tokens": None,
+            "completion_tokens": None,
+            "tokens_per_sec": None,
+            "cost": None,
+            "cache_hit": False,
+            "coalesced": False,
+            "error": None,
+        }
+        self.record.update(_labels.get())
+        self.start = time.perf_counter()
+
+    def finish(self, result: Optional[Dict[str, Any]] = None, error: Exception = None):
+        """Completes the record from a result dict (or an exception) and emits it."""
+        if result is not None and self.record["stream"] and not result.get("cache_hit"):
+            response = result.get("response")
+            if hasattr(response, "__aiter__"):
+                result["response"] = self._awrap_stream(response)
+                return result
+            if hasattr(response, "__iter__") and not isinstance(response, (str, bytes, dict, list)):
+                result["response"] = self._wrap_stream(response)
+                return result
+
+        if result is not None:
+            raw = result.get("raw_response")
+            prompt_tokens, completion_tokens = _usage_tokens(raw)
+            self.record["prompt_tokens"] = prompt_tokens
+            self.record["completion_tokens"] = completion_tokens
+            self.record["cache_hit"] = bool(result.get("cache_hit"))
+            self.record["coalesced"] = bool(result.get("coalesced"))
+            if result.get("error"):
+                self.record["error"] = str(result["error"])
+            if raw is not None and _field(raw, "usage") is not None:
+                try:
+                    from litellm import completion_cost
+
+                    self.record["cost"] = completion_cost(completion_response=raw)
+                except Exception:
+                    pass
+        if error is not None:
+            self.record["error"] = f"{type(error).__name__}: {error}"
+        self._emit()
+        return result
+
+    def _emit(self, generation_start: Optional[float] = None):
+        wall_time = time.perf_counter() - self.start
+        self.record["wall_time"] = wall_time
+        completion_tokens = self.record["completion_tokens"]
+        generation_time = wall_time - (generation_start or 0.0)
+        if completion_tokens and generation_time > 0:
+            self.record["tokens_per_sec"] = completion_tokens / generation_time
+        emit_llm_record(self.record)
+
+    def _observe_chunk(self, chunk, chunks: int):
+        if self.record["ttft"] is None:
+            self.record["ttft"] = time.perf_counter() - self.start
+        prompt_tokens, completion_tokens = _usage_tokens(chunk)
+        if prompt_tokens is not None:
+            self.record["prompt_tokens"] = prompt_tokens
+        if completion_tokens is not None:
+            self.record["completion_tokens"] = completion_tokens
+        elif self.record["completion_tokens"] is None or chunks > self.record["completion_tokens"]:
+            # Without reported usage, each chunk is roughly one token
+            self.record["completion_tokens"] = chunks
+
+    def _wrap_stream(self, stream):
+        chunks = 0
+        try:
+            for chunk in stream:
+                chunks += 1
+                self._observe_chunk(chunk, chunks)
+                yield chunk
+        except Exception as e:
+            self.record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._emit(self.record["ttft"])
+
+    async def _awrap_stream(self, stream):
+        chunks = 0
+        try:
+            async for chunk in stream:
+                chunks += 1
+                self._observe_chunk(chunk, chunks)
+                yield chunk
+        except Exception as e:
+            self.record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._emit(self.record["ttft"])
+
+
+METRICS_COLUMNS = [
+    "timestamp", "npc", "jinx", "provider", "model", "stream", "wall_time", "ttft",
+    "prompt_tokens", "completion_tokens", "tokens_per_sec", "cost", "cache_hit",
+    "coalesced", "error",
+]
+
+
+class SQLiteMetricsSink:
+    """Hook that appends each record to the llm_call_metrics table."""
+
+    def __init__(self, db_path: str = "~/npcsh_history.db"):
+        self.db_path = os.path.expanduser(db_path)
+        self._lock = threading.Lock()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_call_metrics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT,
+                    npc TEXT,
+                    jinx TEXT,
+                    provider TEXT,
+                    model TEXT,
+                    stream INTEGER,
+                    wall_time REAL,
+                    ttft REAL,
+                    prompt_tokens INTEGER,
+                    completion_tokens INTEGER,
+                    tokens_per_sec REAL,
+                    cost REAL,
+                    cache_hit INTEGER,
+                    coalesced INTEGER,
+                    error TEXT
+                )
+                """
+            )
+            conn.commit()
+
+    def __call__(self, record: Dict[str, Any]):
+        row = [record.get(column) for column in METRICS_COLUMNS]
+        placeholders = ", ".join("?" for _ in METRICS_COLUMNS)
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                f"INSERT INTO llm_call_metrics ({', '.join(METRICS_COLUMNS)}) VALUES ({placeholders})",
+                row,
+            )
+            conn.commit()
+
+    def summary(self, group_by=("npc", "provider", "model")) -> List[Dict[str, Any]]:
+        """Per-group call counts, latency, token totals, cache hits and errors, slowest first."""
+        columns = [column for column in group_by if column in METRICS_COLUMNS]
+        group = ", ".join(columns)
+        select = (group + ", ") if columns else ""
+        query = f"""
+            SELECT {select}
+                COUNT(*) AS calls,
+                AVG(wall_time) AS avg_wall_time,
+                MAX(wall_time) AS max_wall_time,
+                AVG(ttft) AS avg_ttft,
+                SUM(prompt_tokens) AS prompt_tokens,
+                SUM(completion_tokens) AS completion_tokens,
+                AVG(tokens_per_sec) AS avg_tokens_per_sec,
+                SUM(cost) AS cost,
+                SUM(cache_hit) AS cache_hits,
+                SUM(error IS NOT NULL) AS errors
+            FROM llm_call_metrics
+            {"GROUP BY " + group if columns else ""}
+            ORDER BY avg_wall_time DESC
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(query).fetchall()]
+
+
+class JSONLMetricsSink:
+    """Hook that appends each record as one JSON line."""
+
+    def __init__(self, path: str = "~/npcsh_llm_metrics.jsonl"):
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+
+    def __call__(self, record: Dict[str, Any]):
+        line = json.dumps(record, default=str)
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+def _configure_from_env():
+    """
+    NPCSH_LLM_METRICS=sqlite records to ~/npcsh_history.db; any other value is a
+    JSONL path. Read on the first LLM call rather than at import.
+    """
+    global _env_configured
+    if _env_configured:
+        return
+    with _hooks_lock:
+        if _env_configured:
+            return
+        _env_configured = True
+    target = os.environ.get("NPCSH_LLM_METRICS")
+    if not target:
+        return
+    try:
+        if target == "sqlite":
+            add_llm_hook(SQLiteMetricsSink())
+        else:
+            add_llm_hook(JSONLMetricsSink(target))
+    except Exception as e:
+        print(f"Could not enable LLM metrics sink {target}: {e}")
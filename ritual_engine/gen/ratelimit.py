@@ -0,0 +1,276 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from ritual_engine.gen.context_window import get_context_window_manager
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `per_minute` tokens per minute.
+
+    reserve() takes tokens immediately and lets the level go negative, returning
+    how long the caller must wait before its reservation is covered. Callers
+    therefore queue up in the order they reserved, whether they wait with
+    time.sleep or asyncio.sleep.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float = 1) -> float:
+        """Reserves amount tokens and returns the number of seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # A single request larger than the bucket would otherwise never fit
+            self.level -= min(amount, self.capacity)
+            wait = 0.0 if self.level >= 0 else -self.level / self.rate
+            return max(wait, self.blocked_until - now)
+
+    def refund(self, amount: float):
+        """Returns tokens (or takes more, for a negative amount) after the fact."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.level = min(self.capacity, self.level + amount)
+
+    def block(self, seconds: float):
+        """Holds every caller for at least `seconds`, e.g. after a Retry-After."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for a provider's 429: its status code, or a RateLimitError (litellm, openai)."""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    if getattr(getattr(error, "response", None), "status_code", None) == 429:
+        return True
+    return any(cls.__name__ == "RateLimitError" for cls in type(error).__mro__)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Reads Retry-After (or retry-after-ms) from a provider error, if present."""
+    value = getattr(error, "retry_after", None)
+    if value is not None:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            pass
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or getattr(error, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms") is not None:
+            return float(headers.get("retry-after-ms")) / 1000.0
+        if headers.get("retry-after") is not None:
+            return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        # HTTP-date form of Retry-After; fall back to backoff
+        return None
+    return None
+
+
+class RateLimiter:
+    """
+    Shared requests-per-minute and tokens-per-minute limits per (provider, model),
+    with jittered exponential backoff on 429 responses.
+
+    Limits are looked up by (provider, model), then provider, then the defaults.
+    A limit of None means unlimited. The same instance serves threads (call)
+    and coroutines (acall); waiting happens before the request is sent, so
+    callers queue instead of failing.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[Any, Dict[str, float]]] = None,
+        default_rpm: Optional[float] = None,
+        default_tpm: Optional[float] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        """
+        Args:
+            limits: {(provider, model) or provider: {"rpm": ..., "tpm": ...}}
+            default_rpm: requests per minute for unlisted models
+            default_tpm: tokens per minute for unlisted models
+            max_retries: retries after a rate-limit error before re-raising
+            base_delay: first backoff delay in seconds
+            max_delay: upper bound for a single backoff delay
+        """
+        self.limits = dict(limits or {})
+        self.default_rpm = default_rpm
+        self.default_tpm = default_tpm
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._buckets: Dict[Tuple[str, str], Tuple[Optional[TokenBucket], Optional[TokenBucket]]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"waits": 0, "wait_seconds": 0.0, "retries": 0}
+
+    def _limits_for(self, provider: str, model: str) -> Dict[str, Optional[float]]:
+        limits = self.limits.get((provider, model)) or self.limits.get(provider) or {}
+        return {
+            "rpm": limits.get("rpm", self.default_rpm),
+            "tpm": limits.get("tpm", self.default_tpm),
+        }
+
+    def _buckets_for(self, provider: str, model: str):
+        key = (provider, model)
+        with self._lock:
+            if key not in self._buckets:
+                limits = self._limits_for(provider, model)
+                self._buckets[key] = (
+                    TokenBucket(limits["rpm"]) if limits["rpm"] else None,
+                    TokenBucket(limits["tpm"]) if limits["tpm"] else None,
+                )
+            return self._buckets[key]
+
+    def _reserve(self, provider: str, model: str, tokens: int) -> float:
+        request_bucket, token_bucket = self._buckets_for(provider, model)
+        wait = 0.0
+        if request_bucket is not None:
+            wait = max(wait, request_bucket.reserve(1))
+        if token_bucket is not None and tokens:
+            wait = max(wait, token_bucket.reserve(tokens))
+        if wait > 0:
+            with self._lock:
+                self.stats["waits"] += 1
+                self.stats["wait_seconds"] += wait
+        return wait
+
+    def _resolve_tokens(self, provider: str, model: str, tokens) -> int:
+        """tokens may be a callable; it is only evaluated when a tokens-per-minute limit applies."""
+        if not callable(tokens):
+            return tokens
+        _, token_bucket = self._buckets_for(provider, model)
+        return tokens() if token_bucket is not None else 0
+
+    def _record_usage(self, provider: str, model: str, estimated: int, response):
+        """Corrects the token bucket with the usage the provider reported."""
+        _, token_bucket = self._buckets_for(provider, model)
+        usage = getattr(response, "usage", None)
+        actual = getattr(usage, "total_tokens", None) if usage is not None else None
+        if token_bucket is not None and actual:
+            token_bucket.refund(estimated - actual)
+
+    def _backoff(self, provider: str, model: str, error: Exception, attempt: int) -> float:
+        delay = retry_after_seconds(error)
+        if delay is None:
+            # Full jitter keeps many waiting callers from retrying in lockstep
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        else:
+            request_bucket, token_bucket = self._buckets_for(provider, model)
+            for bucket in (request_bucket, token_bucket):
+                if bucket is not None:
+                    bucket.block(delay)
+        with self._lock:
+            self.stats["retries"] += 1
+        return delay
+
+    def call(
+        self,
+        fn: Callable,
+        args: tuple = (),
+        kwargs: Optional[Dict[str, Any]] = None,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        tokens: Union[int, Callable[[], int]] = 0,
+    ):
+        """
+        Calls fn(*args, **kwargs) once the limits for (provider, model) allow, retrying
+        on 429s. tokens is the request size, or a callable returning it.
+        """
+        tokens = self._resolve_tokens(provider, model, tokens)
+        attempt = 0
+        while True:
+            wait = self._reserve(provider, model, tokens)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                response = fn(*args, **(kwargs or {}))
+            except Exception as e:
+                if attempt >= self.max_retries or not is_rate_limit_error(e):
+                    raise
+                time.sleep(self._backoff(provider, model, e, attempt))
+                attempt += 1
+                continue
+            self._record_usage(provider, model, tokens, response)
+            return response
+
+    async def acall(
+        self,
+        fn: Callable,
+        args: tuple = (),
+        kwargs: Optional[Dict[str, Any]] = None,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        tokens: Union[int, Callable[[], int]] = 0,
+    ):
+        """Async counterpart of call() for coroutine functions such as acompletion."""
+        tokens = self._resolve_tokens(provider, model, tokens)
+        attempt = 0
+        while True:
+            wait = self._reserve(provider, model, tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                response = await fn(*args, **(kwargs or {}))
+            except Exception as e:
+                if attempt >= self.max_retries or not is_rate_limit_error(e):
+                    raise
+                await asyncio.sleep(self._backoff(provider, model, e, attempt))
+                attempt += 1
+                continue
+            self._record_usage(provider, model, tokens, response)
+            return response
+
+
+def estimate_request_tokens(api_params: Dict[str, Any]) -> int:
+    """Prompt tokens plus the requested completion size, for the tokens-per-minute bucket."""
+    model = api_params.get("model")
+    prompt_tokens = get_context_window_manager().count_messages(
+        api_params.get("messages") or [], model=model
+    )
+    return prompt_tokens + int(api_params.get("max_tokens") or 0)
+
+
+def _env_float(name: str) -> Optional[float]:
+    value = os.environ.get(name)
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(**kwargs) -> RateLimiter:
+    """
+    Returns the process-wide RateLimiter, creating it on first use. Default
+    limits come from NPCSH_RATE_LIMIT_RPM and NPCSH_RATE_LIMIT_TPM.
+    """
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            kwargs.setdefault("default_rpm", _env_float("NPCSH_RATE_LIMIT_RPM"))
+            kwargs.setdefault("default_tpm", _env_float("NPCSH_RATE_LIMIT_TPM"))
+            _default_limiter = RateLimiter(**kwargs)
+        return _default_limiter
@@ -0,0 +1,291 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+from ritual_engine.gen.context_window import message_text
+from ritual_engine.npc_sysenv import strip_volatile_context
+
+_TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+class _Record(SimpleNamespace):
+    """Attribute-style stand-in for litellm response objects; dict() mirrors pydantic."""
+
+    def dict(self):
+        return _as_dict(self)
+
+    model_dump = dict
+
+
+def _as_dict(value):
+    if isinstance(value, SimpleNamespace):
+        return {k: _as_dict(v) for k, v in vars(value).items()}
+    if isinstance(value, list):
+        return [_as_dict(v) for v in value]
+    return value
+
+
+def _last_user_text(messages: List[Dict[str, Any]]) -> str:
+    """The last user message without its date and time line"""
+    return next(
+        (message_text(m) for m in reversed(strip_volatile_context(messages)) if m.get("role") == "user"), ""
+    )
+
+
+def cassette_key(messages: List[Dict[str, Any]], format: Any = None) -> str:
+    """
+    Key for a recorded exchange: the last user message, without the date and
+    time line appended to it, and whether structured output was requested.
+    """
+    payload = json.dumps({"user": _last_user_text(messages), "json": bool(format)}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _response_text(response) -> str:
+    if response is None:
+        return ""
+    if isinstance(response, str):
+        return response
+    return json.dumps(response)
+
+
+class CassetteRecorder:
+    """Appends live exchanges to a JSONL cassette that ReplayProvider can serve."""
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+
+    def record(self, messages, format, result: Dict[str, Any]):
+        raw = result.get("raw_response")
+        usage = getattr(raw, "usage", None)
+        entry = {
+            "key": cassette_key(messages, format),
+            "prompt": _last_user_text(messages),
+            "response": _response_text(result.get("response")),
+            "prompt_tokens": getattr(usage, "prompt_tokens", None),
+            "completion_tokens": getattr(usage, "completion_tokens", None),
+        }
+        with self._lock, open(self.path, "a") as f:
+            f.write(json.dumps(entry, default=str) + "\n")
+
+
+class ReplayProvider:
+    """
+    Offline stand-in for litellm's completion/acompletion, used for provider="replay".
+
+    Responses come from a JSONL cassette (matched by cassette_key, falling back
+    to playing unmatched entries in order) or from a synthetic generator.
+    Latency is simulated as `latency` seconds before the first token plus
+    `tokens_per_sec` pacing afterwards. Streams yield OpenAI-style chunks, or
+    ollama-style dicts when chunk_format="ollama".
+    """
+
+    def __init__(
+        self,
+        cassette: Optional[str] = None,
+        generator: Optional[Callable[[List[Dict[str, Any]]], str]] = None,
+        latency: float = 0.0,
+        tokens_per_sec: Optional[float] = None,
+        chunk_format: str = "openai",
+    ):
+        """
+        Args:
+            cassette: path to a JSONL file written by CassetteRecorder
+            generator: callable(messages) -> response text for unmatched requests
+            latency: seconds before the first token
+            tokens_per_sec: generation speed; None means no pacing
+            chunk_format: "openai" or "ollama" stream chunk shape
+        """
+        self.generator = generator
+        self.latency = latency
+        self.tokens_per_sec = tokens_per_sec
+        self.chunk_format = chunk_format
+        self._by_key: Dict[str, List[Dict[str, Any]]] = {}
+        self._sequence: List[Dict[str, Any]] = []
+        self._position = 0
+        self._lock = threading.Lock()
+        if cassette:
+            self.load(cassette)
+
+    def load(self, path: str):
+        with open(os.path.expanduser(path)) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                self._sequence.append(entry)
+                self._by_key.setdefault(entry.get("key"), []).append(entry)
+
+    def _next_entry(self, messages, format) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            matches = self._by_key.get(cassette_key(messages, format))
+            if matches:
+                # Cycle through repeated recordings of the same request
+                entry = matches.pop(0)
+                matches.append(entry)
+                return entry
+            if self._sequence:
+                entry = self._sequence[self._position % len(self._sequence)]
+                self._position += 1
+                return entry
+        return None
+
+    def _synthetic_text(self, messages, format) -> str:
+        if self.generator is not None:
+            return self.generator(messages)
+        if format:
+            return "{}"
+        last_user = next(
+            (message_text(m) for m in reversed(messages or []) if m.get("role") == "user"), ""
+        )
+        return f"Replay response to: {last_user[:200]}"
+
+    def _exchange(self, messages, format):
+        entry = self._next_entry(messages, format)
+        text = entry["response"] if entry else self._synthetic_text(messages, format)
+        tokens = _TOKEN_PATTERN.findall(text) or [""]
+        prompt_tokens = (entry or {}).get("prompt_tokens") or sum(
+            len(message_text(m)) // 4 + 1 for m in messages or []
+        )
+        completion_tokens = (entry or {}).get("completion_tokens") or len(tokens)
+        usage = _Record(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+        return text, tokens, usage
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.tokens_per_sec if self.tokens_per_sec else 0.0
+
+    def _response(self, model, text, usage):
+        message = _Record(role="assistant", content=text, tool_calls=None)
+        return _Record(
+            id=f"replay-{uuid.uuid4().hex}",
+            object="chat.completion",
+            created=int(time.time()),
+            model=model,
+            choices=[_Record(index=0, message=message, finish_reason="stop")],
+            usage=usage,
+        )
+
+    def _chunk(self, chunk_id, model, content, finish_reason=None, usage=None):
+        if self.chunk_format == "ollama":
+            chunk = {
+                "model": model,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "message": {"role": "assistant", "content": content},
+                "done": finish_reason is not None,
+            }
+            if finish_reason is not None:
+                chunk["done_reason"] = finish_reason
+                chunk["prompt_eval_count"] = usage.prompt_tokens
+                chunk["eval_count"] = usage.completion_tokens
+            return chunk
+        delta = _Record(role="assistant", content=content, tool_calls=None)
+        chunk = _Record(
+            id=chunk_id,
+            object="chat.completion.chunk",
+            created=int(time.time()),
+            model=model,
+            choices=[_Record(index=0, delta=delta, finish_reason=finish_reason)],
+        )
+        if usage is not None:
+            chunk.usage = usage
+        return chunk
+
+    def _stream(self, model, tokens, usage):
+        chunk_id = f"replay-{uuid.uuid4().hex}"
+        delay = self._token_delay()
+        time.sleep(self.latency)
+        for i, token in enumerate(tokens):
+            if i and delay:
+                time.sleep(delay)
+            yield self._chunk(chunk_id, model, token)
+        yield self._chunk(chunk_id, model, "", finish_reason="stop", usage=usage)
+
+    async def _astream(self, model, tokens, usage):
+        chunk_id = f"replay-{uuid.uuid4().hex}"
+        delay = self._token_delay()
+        await asyncio.sleep(self.latency)
+        for i, token in enumerate(tokens):
+            if i and delay:
+                await asyncio.sleep(delay)
+            yield self._chunk(chunk_id, model, token)
+        yield self._chunk(chunk_id, model, "", finish_reason="stop", usage=usage)
+
+    def completion(self, model=None, messages=None, stream=False, response_format=None, **kwargs):
+        """Same call shape as litellm.completion."""
+        format = "json" if response_format else None
+        text, tokens, usage = self._exchange(messages, format)
+        if stream:
+            return self._stream(model, tokens, usage)
+        time.sleep(self.latency + self._token_delay() * len(tokens))
+        return self._response(model, text, usage)
+
+    async def acompletion(self, model=None, messages=None, stream=False, response_format=None, **kwargs):
+        """Same call shape as litellm.acompletion."""
+        format = "json" if response_format else None
+        text, tokens, usage = self._exchange(messages, format)
+        if stream:
+            return self._astream(model, tokens, usage)
+        await asyncio.sleep(self.latency + self._token_delay() * len(tokens))
+        return self._response(model, text, usage)
+
+
+def _env_float(name: str, default: Optional[float] = None) -> Optional[float]:
+    value = os.environ.get(name)
+    try:
+        return float(value) if value else default
+    except ValueError:
+        return default
+
+
+_default_replay = None
+_default_recorder = None
+_default_replay_lock = threading.Lock()
+
+
+def get_replay_provider(**kwargs) -> ReplayProvider:
+    """
+    Returns the process-wide ReplayProvider. Defaults come from
+    NPCSH_REPLAY_CASSETTE, NPCSH_REPLAY_LATENCY, NPCSH_REPLAY_TOKENS_PER_SEC
+    and NPCSH_REPLAY_CHUNK_FORMAT.
+    """
+    global _default_replay
+    with _default_replay_lock:
+        if _default_replay is None:
+            kwargs.setdefault("cassette", os.environ.get("NPCSH_REPLAY_CASSETTE"))
+            kwargs.setdefault("latency", _env_float("NPCSH_REPLAY_LATENCY", 0.0))
+            kwargs.setdefault("tokens_per_sec", _env_float("NPCSH_REPLAY_TOKENS_PER_SEC"))
+            kwargs.setdefault("chunk_format", os.environ.get("NPCSH_REPLAY_CHUNK_FORMAT", "openai"))
+            _default_replay = ReplayProvider(**kwargs)
+        return _default_replay
+
+
+def set_replay_provider(provider: Optional[ReplayProvider]):
+    """Installs the ReplayProvider served for provider="replay" (None resets to the default)."""
+    global _default_replay
+    with _default_replay_lock:
+        _default_replay = provider
+
+
+def get_cassette_recorder() -> Optional[CassetteRecorder]:
+    """Returns a recorder for NPCSH_LLM_RECORD (a JSONL path), or None when recording is off."""
+    global _default_recorder
+    path = os.environ.get("NPCSH_LLM_RECORD")
+    if not path:
+        return None
+    with _default_replay_lock:
+        if _default_recorder is None or _default_recorder.path != os.path.expanduser(path):
+            _default_recorder = CassetteRecorder(path)
+        return _default_recorder
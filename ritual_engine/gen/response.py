@@ -1,61 +1,128 @@
 from typing import Any, Dict, List, Union
 from pydantic import BaseModel
 from ritual_engine.data.image import compress_image
-from ritual_engine.npc_sysenv import get_system_message, lookup_provider, render_markdown
+from ritual_engine.npc_sysenv import (
+    PROMPT_CACHE_PROVIDERS,
+    add_prompt_cache_markers,
+    ensure_env_loaded,
+    get_system_message,
+    lookup_provider,
+    render_markdown,
+    strip_volatile_context,
+)
+from ritual_engine.gen.cache import cacheable_result, make_cache_key, resolve_cache
+from ritual_engine.gen.json_stream import iter_json_stream
+from ritual_engine.gen.metrics import LLMCallTimer, llm_hooks_enabled
+from ritual_engine.gen.ratelimit import estimate_request_tokens, get_rate_limiter
+from ritual_engine.gen.replay import get_cassette_recorder, get_replay_provider
+from ritual_engine.gen.singleflight import get_single_flight
+import asyncio
 import base64
+import copy
 import json
+import time
 import uuid
 import os 
-try: 
-    import ollama
-except ImportError:
-    pass
-except OSError:
-    # Handle case where ollama is not installed or not available
-    print("Ollama is not installed or not available. Please install it to use this feature.")
-try:
-    from litellm import completion
-except ImportError:
-    pass
-except OSError:
-    # Handle case where litellm is not installed or not available
-    pass
-
-def handle_streaming_json(api_params):
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+# litellm and ollama are slow to import, so they are loaded on the first call
+def completion(*args, **kwargs):
+    from litellm import completion as litellm_completion
+    return litellm_completion(*args, **kwargs)
+
+
+async def acompletion(*args, **kwargs):
+    from litellm import acompletion as litellm_acompletion
+    return await litellm_acompletion(*args, **kwargs)
+
+def _limiter_key(api_params, provider=None, model=None):
+    """(provider, model) for the rate limiter; litellm model names carry a provider/ prefix."""
+    if model is None:
+        model = api_params.get("model") or ""
+        prefix, sep, rest = model.partition("/")
+        if sep and provider in (None, prefix):
+            provider, model = prefix, rest
+    return provider, model
+
+
+def _limited_completion(api_params, provider=None, model=None):
+    """Sends a litellm completion through the shared rate limiter, waiting out 429s."""
+    if provider == "replay":
+        return get_replay_provider().completion(**api_params)
+    provider, model = _limiter_key(api_params, provider, model)
+    # The request is only tokenized when a tokens-per-minute limit applies
+    return get_rate_limiter().call(
+        completion, kwargs=api_params, provider=provider,
+        model=model, tokens=lambda: estimate_request_tokens(api_params),
+    )
+
+
+async def _alimited_completion(api_params, provider=None, model=None):
+    if provider == "replay":
+        return await get_replay_provider().acompletion(**api_params)
+    provider, model = _limiter_key(api_params, provider, model)
+    return await get_rate_limiter().acall(
+        acompletion, kwargs=api_params, provider=provider,
+        model=model, tokens=lambda: estimate_request_tokens(api_params),
+    )
+
+
+def _limited_ollama_chat(chat, api_params, options):
+    """Sends an ollama chat (sync or async client method) through the shared rate limiter."""
+    limiter = get_rate_limiter()
+    limited = limiter.acall if asyncio.iscoroutinefunction(chat) else limiter.call
+    return limited(
+        chat, kwargs={**api_params, "options": options}, provider="ollama",
+        model=api_params.get("model"), tokens=lambda: estimate_request_tokens(api_params),
+    )
+
+
+def iter_stream_text(stream):
     """
-    Handles streaming responses when JSON format is requested from LiteLLM.
+    Yields the text content of each chunk of an ollama or litellm stream.
     """
-    json_buffer = ""
-    stream = completion(**api_params)
     for chunk in stream:
-        content = chunk.choices[0].delta.content
+        if hasattr(chunk, "choices"):
+            content = "".join(c.delta.content or "" for c in chunk.choices)
+        else:
+            content = chunk["message"]["content"] if "message" in chunk else ""
         if content:
-            json_buffer += content
-            try:
-                json.loads(json_buffer)
-                yield chunk
-            except json.JSONDecodeError:
-                pass
+            yield content
 
 
-        
-def get_ollama_response(
+def handle_streaming_json(api_params, path=None, provider=None, model=None):
+    """
+    Handles streaming responses when JSON format is requested from LiteLLM.
+    Parses the stream incrementally and yields (path, value) for each value as
+    soon as it closes; pass path=("fact_list",) to receive only the elements
+    of that array. The final event is ((), document). provider and model key
+    the rate limiter and default to the provider/ prefix of api_params["model"].
+    """
+    stream = _limited_completion({**api_params, "stream": True}, provider, model)
+    yield from iter_json_stream(iter_stream_text(stream), path=path)
+
+
+def _prepare_ollama_request(
     prompt: str,
     model: str,
     images: List[str] = None,
     tools: list = None,
     tool_choice: Dict = None,
-    tool_map: Dict = None,
     format: Union[str, BaseModel] = None,
     messages: List[Dict[str, str]] = None,
     stream: bool = False,
     attachments: List[str] = None,
     **kwargs,
-) -> Dict[str, Any]:
+):
     """
-    Generates a response using the Ollama API, supporting both streaming and non-streaming.
+    Builds the ollama api params, options and result skeleton shared by the
+    sync and async ollama paths.
     """
-
+    ensure_env_loaded()
+    if messages is None:
+        messages = []
+    original_prompt = prompt
 
     image_paths = []
     if images:
@@ -99,7 +166,10 @@ def get_ollama_response(
     if prompt:
         if messages and messages[-1]["role"] == "user":
             if isinstance(messages[-1]["content"], str):
-                messages[-1]["content"] = prompt
+                content = messages[-1]["content"]
+                # Keep the context and date line _prepare_llm_call appended after the prompt
+                suffix = content[len(original_prompt):] if content.startswith(original_prompt) else ""
+                messages[-1]["content"] = prompt + suffix
             elif isinstance(messages[-1]["content"], list):
                 for i, item in enumerate(messages[-1]["content"]):
                     if item.get("type") == "text":
@@ -109,7 +179,7 @@ def get_ollama_response(
                     messages[-1]["content"].append({"type": "text", "text": prompt})
         else:
             messages.append({"role": "user", "content": prompt})
-    if format == "json" and not stream:
+    if format == "json":
         json_instruction = """If you are a returning a json object, begin directly with the opening {.
             If you are returning a json array, begin directly with the opening [.
             Do not include any additional markdown formatting or leading
@@ -146,18 +216,10 @@ def get_ollama_response(
         api_params["tools"] = tools
     if tool_choice:
         api_params["tool_choice"] = tool_choice
-    options = {}
-    for key, value in kwargs.items():
-        if key in [
-            "stop", "temperature", "top_p", "max_tokens", "max_completion_tokens",
-            "tools", "tool_choice", "extra_headers", "parallel_tool_calls",
-            "response_format", "user",
-        ]:
-            options[key] = value
 
-    if isinstance(format, type) and not stream:
+    if isinstance(format, type):
         api_params["format"] = format.model_json_schema()
-    elif isinstance(format, str) and format == "json" and not stream:
+    elif isinstance(format, str) and format == "json":
         api_params["format"] = "json"
     
 
@@ -179,14 +241,14 @@ def get_ollama_response(
         "tool_calls": [], 
         "tool_results": []
     }
-    
-    # Handle streaming
-    if stream:
-        result["response"] = ollama.chat(**api_params, options=options)
-        return result
-    
-    # Non-streaming case
-    res = ollama.chat(**api_params, options = options)
+    return api_params, options, result
+
+
+def _finalize_ollama_response(res, result, tools, tool_map, format, messages):
+    """
+    Fills the result dict from a non-streaming ollama response. Returns the
+    payload for process_tool_calls when the model asked for tools, else None.
+    """
     result["raw_response"] = res
     
     # Extract the response content
@@ -199,13 +261,12 @@ def get_ollama_response(
 
     if tools and hasattr(res.get('message', {}), 'tool_calls') and res['message']['tool_calls']:
         if tool_map:
-            response_for_processing = {
+            return {
                 "response": res['message'].get('content'),
                 "raw_response": res,
                 "messages": messages,
                 "tool_calls": res['message']['tool_calls']
             }
-            return process_tool_calls(response_for_processing, tool_map, model, 'ollama', messages, stream)
 
     # Handle JSON format if specified
     if format == "json":
@@ -222,25 +283,114 @@ def get_ollama_response(
         except json.JSONDecodeError:
             result["error"] = f"Invalid JSON response: {response_content}"
 
+    return None
+
+
+def get_ollama_response(
+    prompt: str,
+    model: str,
+    images: List[str] = None,
+    tools: list = None,
+    tool_choice: Dict = None,
+    tool_map: Dict = None,
+    format: Union[str, BaseModel] = None,
+    messages: List[Dict[str, str]] = None,
+    stream: bool = False,
+    attachments: List[str] = None,
+    tool_executor=None,
+    tool_timeout=None,
+    **kwargs,
+) -> Dict[str, Any]:
+    """
+    Generates a response using the Ollama API, supporting both streaming and non-streaming.
+    """
+    if messages is None:
+        messages = []
+    api_params, options, result = _prepare_ollama_request(
+        prompt, model, images=images, tools=tools, tool_choice=tool_choice,
+        format=format, messages=messages, stream=stream, attachments=attachments, **kwargs
+    )
+    
+    import ollama
+
+    # Handle streaming
+    if stream:
+        result["response"] = _limited_ollama_chat(ollama.chat, api_params, options)
+        return result
+    
+    # Non-streaming case
+    res = _limited_ollama_chat(ollama.chat, api_params, options)
+    pending_tools = _finalize_ollama_response(res, result, tools, tool_map, format, messages)
+    if pending_tools is not None:
+        return process_tool_calls(
+            pending_tools, tool_map, model, 'ollama', messages, stream,
+            tool_executor=tool_executor, tool_timeout=tool_timeout,
+        )
     return result
 
 
-def get_litellm_response(
+async def aget_ollama_response(
+    prompt: str,
+    model: str,
+    images: List[str] = None,
+    tools: list = None,
+    tool_choice: Dict = None,
+    tool_map: Dict = None,
+    format: Union[str, BaseModel] = None,
+    messages: List[Dict[str, str]] = None,
+    stream: bool = False,
+    attachments: List[str] = None,
+    tool_executor=None,
+    tool_timeout=None,
+    **kwargs,
+) -> Dict[str, Any]:
+    """
+    Async counterpart of get_ollama_response built on ollama's AsyncClient.
+    When streaming, result["response"] is an async iterator of ollama chunks.
+    """
+    if messages is None:
+        messages = []
+    api_params, options, result = _prepare_ollama_request(
+        prompt, model, images=images, tools=tools, tool_choice=tool_choice,
+        format=format, messages=messages, stream=stream, attachments=attachments, **kwargs
+    )
+    from ollama import AsyncClient
+
+    client = AsyncClient()
+
+    if stream:
+        result["response"] = await _limited_ollama_chat(client.chat, api_params, options)
+        return result
+
+    res = await _limited_ollama_chat(client.chat, api_params, options)
+    pending_tools = _finalize_ollama_response(res, result, tools, tool_map, format, messages)
+    if pending_tools is not None:
+        return await aprocess_tool_calls(
+            pending_tools, tool_map, model, 'ollama', messages, stream,
+            tool_executor=tool_executor, tool_timeout=tool_timeout,
+        )
+    return result
+
+
+def _prepare_litellm_request(
     prompt: str = None,
     model: str = None,
     provider: str = None,
     images: List[str] = None,
     tools: list = None,
     tool_choice: Dict = None,
-    tool_map: Dict = None,
     format: Union[str, BaseModel] = None,
     messages: List[Dict[str, str]] = None,
     api_key: str = None,
     api_url: str = None,
     stream: bool = False,
-    attachments: List[str] = None,
     **kwargs,
-) -> Dict[str, Any]:
+):
+    """
+    Builds the litellm api params and result skeleton shared by the sync and
+    async litellm paths.
+    """
+    ensure_env_loaded()
     result = {
         "response": None,
         "messages": messages.copy() if messages else [],
@@ -248,15 +398,8 @@ def get_litellm_response(
         "tool_calls": [], 
         "tool_results":[],
     }
-    
-    if provider == "ollama":
-        kwargs["tool_map"] = tool_map
-        return get_ollama_response(
-            prompt, model, images=images, tools=tools, tool_choice=tool_choice,
-            format=format, messages=messages, stream=stream, attachments=attachments, context = context, **kwargs
-        )
 
-    if format == "json" and not stream:
+    if format == "json":
         json_instruction = """If you are a returning a json object, begin directly with the opening {.
             If you are returning a json array, begin directly with the opening [.
             Do not include any additional markdown formatting or leading
@@ -298,7 +441,7 @@ def get_litellm_response(
         api_params["api_base"] = api_url
         provider = "openai"
     
-    if format == "json" and not stream:
+    if format == "json":
         api_params["response_format"] = {"type": "json_object"}
     elif isinstance(format, BaseModel):
         api_params["response_format"] = format
@@ -308,6 +451,10 @@ def get_litellm_response(
         provider = os.environ.get("GuardianSH_CHAT_PROVIDER", "openai")
 
     api_params["model"] = f"{provider}/{model}" if "/" not in model else model
+    if provider in PROMPT_CACHE_PROVIDERS:
+        # Mark the stable system prefix so the provider can cache it; the
+        # history in result["messages"] keeps plain string content
+        api_params["messages"] = add_prompt_cache_markers(result["messages"])
     if api_key is not None: 
         api_params["api_key"] = api_key
     if tools: 
@@ -323,24 +470,20 @@ def get_litellm_response(
                 "response_format", "user",
             ]:
                 api_params[key] = value
-    
-    if tools and tool_map:
-        resp = completion(**{**api_params, "stream": False})
-        result["raw_response"] = resp
-        if hasattr(resp.choices[0].message, 'tool_calls') and resp.choices[0].message.tool_calls:
-            result["tool_calls"] = resp.choices[0].message.tool_calls
-            return process_tool_calls(result, tool_map, model, provider, messages, stream)
-    
-    api_params["stream"] = stream
-    resp = completion(**api_params)
 
+    return api_params, result, model, provider
+
+
+def _finalize_litellm_response(resp, result, format, stream):
+    """Fills the result dict from a litellm response (or stream wrapper)."""
     if stream:
         result["response"] = resp
-    else:
-        result["raw_response"] = resp
-        llm_response = resp.choices[0].message.content
-        result["response"] = llm_response
-        result["messages"].append({"role": "assistant", "content": llm_response})
+        return result
+
+    result["raw_response"] = resp
+    llm_response = resp.choices[0].message.content
+    result["response"] = llm_response
+    result["messages"].append({"role": "assistant", "content": llm_response})
 
     # Handle JSON format requests
     if format == "json":
@@ -360,93 +503,489 @@ def get_litellm_response(
             print(f"JSON parsing error: {str(e)}")
             print(f"Raw response: {llm_response}")
             result["error"] = "Invalid JSON response"
+
+    return result
+
+
+# Request options besides temperature that change what the model returns
+_KEYED_OPTIONS = (
+    "max_tokens", "max_completion_tokens", "stop", "top_p", "response_format",
+    "extra_headers", "parallel_tool_calls", "user",
+)
+
+
+def _request_key(
+    prompt, model, provider, messages, format, tools, tool_map, stream, kwargs,
+    images=None, attachments=None, api_key=None, api_url=None, tool_choice=None,
+):
+    """
+    Content key for a request, shared by the response cache and request
+    coalescing. None for streaming and tool-executing calls, which must not
+    be shared between callers, and for calls with images or attachments,
+    whose files may change under the same path.
+    """
+    if stream or tool_map or images or attachments:
+        return None
+    options = {name: kwargs[name] for name in _KEYED_OPTIONS if kwargs.get(name) is not None}
+    options.update(api_key=api_key, api_url=api_url, tool_choice=tool_choice)
+    return make_cache_key(
+        provider, model, strip_volatile_context(messages), format, tools, kwargs.get("temperature"), prompt,
+        options=options,
+    )
+
+
+def _lookup_cached_response(cache, request_key):
+    """Returns (response_cache, cached_result); the cache is None when off."""
+    response_cache = resolve_cache(cache)
+    if response_cache is None or request_key is None:
+        return response_cache, None
+    cached = response_cache.get(request_key)
+    if cached is not None:
+        cached["raw_response"] = None
+        cached["cache_hit"] = True
+    return response_cache, cached
+
+
+def _share_result(result):
+    """Copy of a coalesced result for a waiting caller, so callers never share message lists."""
+    shared = dict(result)
+    shared["messages"] = copy.deepcopy(result.get("messages", []))
+    shared["coalesced"] = True
+    return shared
+
+
+def get_litellm_response(
+    prompt: str = None,
+    model: str = None,
+    provider: str = None,
+    images: List[str] = None,
+    tools: list = None,
+    tool_choice: Dict = None,
+    tool_map: Dict = None,
+    format: Union[str, BaseModel] = None,
+    messages: List[Dict[str, str]] = None,
+    api_key: str = None,
+    api_url: str = None,
+    stream: bool = False,
+    attachments: List[str] = None,
+    cache=None,
+    coalesce: bool = True,
+    npc=None,
+    **kwargs,
+) -> Dict[str, Any]:
+    """
+    Generates a response through litellm (or ollama directly).
+    Pass cache=True (or a ResponseCache) to serve repeated non-streaming,
+    tool-free requests from the response cache. With coalesce (the default),
+    an identical request already in flight is awaited instead of sent again;
+    pass coalesce=False when repeated prompts should get independent samples.
+    When LLM hooks are registered (see gen/metrics.py) each call is timed and
+    recorded against npc, provider and model. provider="replay" serves
+    offline responses from gen/replay.py; set NPCSH_LLM_RECORD to a JSONL path
+    to record live exchanges for it.
+    """
+    timer = LLMCallTimer(npc, provider, model, stream) if llm_hooks_enabled() else None
+    request_key = _request_key(
+        prompt, model, provider, messages, format, tools, tool_map, stream, kwargs,
+        images=images, attachments=attachments, api_key=api_key, api_url=api_url,
+        tool_choice=tool_choice,
+    )
+    response_cache, cached = _lookup_cached_response(cache, request_key)
+
+    def call():
+        result = _get_litellm_response(
+            prompt, model=model, provider=provider, images=images, tools=tools,
+            tool_choice=tool_choice, tool_map=tool_map, format=format, messages=messages,
+            api_key=api_key, api_url=api_url, stream=stream, attachments=attachments, **kwargs
+        )
+        if request_key is not None and not result.get("error"):
+            if response_cache is not None:
+                response_cache.set(request_key, cacheable_result(result))
+            recorder = get_cassette_recorder()
+            if recorder is not None and provider != "replay":
+                recorder.record(result["messages"][:-1], format, result)
+        return result
+
+    try:
+        if cached is not None:
+            result = cached
+        elif coalesce and request_key is not None:
+            result = get_single_flight().do(request_key, call, share=_share_result)
+        else:
+            result = call()
+    except Exception as e:
+        if timer is not None:
+            timer.finish(error=e)
+        raise
+    return timer.finish(result) if timer is not None else result
+
+
+def _get_litellm_response(
+    prompt: str = None,
+    model: str = None,
+    provider: str = None,
+    images: List[str] = None,
+    tools: list = None,
+    tool_choice: Dict = None,
+    tool_map: Dict = None,
+    format: Union[str, BaseModel] = None,
+    messages: List[Dict[str, str]] = None,
+    api_key: str = None,
+    api_url: str = None,
+    stream: bool = False,
+    attachments: List[str] = None,
+    tool_executor=None,
+    tool_timeout=None,
+    **kwargs,
+) -> Dict[str, Any]:
+    if provider == "ollama":
+        kwargs["tool_map"] = tool_map
+        return get_ollama_response(
+            prompt, model, images=images, tools=tools, tool_choice=tool_choice,
+            format=format, messages=messages, stream=stream, attachments=attachments,
+            tool_executor=tool_executor, tool_timeout=tool_timeout, **kwargs
+        )
+
+    api_params, result, model, provider = _prepare_litellm_request(
+        prompt, model=model, provider=provider, images=images, tools=tools,
+        tool_choice=tool_choice, format=format, messages=messages,
+        api_key=api_key, api_url=api_url, stream=stream, **kwargs
+    )
     
+    if tools and tool_map:
+        resp = _limited_completion({**api_params, "stream": False}, provider, model)
+        result["raw_response"] = resp
+        if hasattr(resp.choices[0].message, 'tool_calls') and resp.choices[0].message.tool_calls:
+            result["tool_calls"] = resp.choices[0].message.tool_calls
+            return process_tool_calls(
+                result, tool_map, model, provider, messages, stream,
+                tool_executor=tool_executor, tool_timeout=tool_timeout,
+            )
+        if not stream:
+            # The model answered directly; no need to ask again
+            return _finalize_litellm_response(resp, result, format, stream)
     
+    api_params["stream"] = stream
+    resp = _limited_completion(api_params, provider, model)
+
+    return _finalize_litellm_response(resp, result, format, stream)
+
+
+async def aget_litellm_response(
+    prompt: str = None,
+    model: str = None,
+    provider: str = None,
+    images: List[str] = None,
+    tools: list = None,
+    tool_choice: Dict = None,
+    tool_map: Dict = None,
+    format: Union[str, BaseModel] = None,
+    messages: List[Dict[str, str]] = None,
+    api_key: str = None,
+    api_url: str = None,
+    stream: bool = False,
+    attachments: List[str] = None,
+    cache=None,
+    coalesce: bool = True,
+    npc=None,
+    **kwargs,
+) -> Dict[str, Any]:
+    """
+    Async counterpart of get_litellm_response built on litellm's acompletion.
+    Returns the same result dict; when streaming, result["response"] is an
+    async iterator of chunks.
+    """
+    timer = LLMCallTimer(npc, provider, model, stream) if llm_hooks_enabled() else None
+    request_key = _request_key(
+        prompt, model, provider, messages, format, tools, tool_map, stream, kwargs,
+        images=images, attachments=attachments, api_key=api_key, api_url=api_url,
+        tool_choice=tool_choice,
+    )
+    response_cache, cached = _lookup_cached_response(cache, request_key)
+
+    async def call():
+        result = await _aget_litellm_response(
+            prompt, model=model, provider=provider, images=images, tools=tools,
+            tool_choice=tool_choice, tool_map=tool_map, format=format, messages=messages,
+            api_key=api_key, api_url=api_url, stream=stream, attachments=attachments, **kwargs
+        )
+        if request_key is not None and not result.get("error"):
+            if response_cache is not None:
+                response_cache.set(request_key, cacheable_result(result))
+            recorder = get_cassette_recorder()
+            if recorder is not None and provider != "replay":
+                recorder.record(result["messages"][:-1], format, result)
+        return result
+
+    try:
+        if cached is not None:
+            result = cached
+        elif coalesce and request_key is not None:
+            result = await get_single_flight().ado(request_key, call, share=_share_result)
+        else:
+            result = await call()
+    except Exception as e:
+        if timer is not None:
+            timer.finish(error=e)
+        raise
+    return timer.finish(result) if timer is not None else result
+
+
+async def _aget_litellm_response(
+    prompt: str = None,
+    model: str = None,
+    provider: str = None,
+    images: List[str] = None,
+    tools: list = None,
+    tool_choice: Dict = None,
+    tool_map: Dict = None,
+    format: Union[str, BaseModel] = None,
+    messages: List[Dict[str, str]] = None,
+    api_key: str = None,
+    api_url: str = None,
+    stream: bool = False,
+    attachments: List[str] = None,
+    tool_executor=None,
+    tool_timeout=None,
+    **kwargs,
+) -> Dict[str, Any]:
+    if provider == "ollama":
+        kwargs["tool_map"] = tool_map
+        return await aget_ollama_response(
+            prompt, model, images=images, tools=tools, tool_choice=tool_choice,
+            format=format, messages=messages, stream=stream, attachments=attachments,
+            tool_executor=tool_executor, tool_timeout=tool_timeout, **kwargs
+        )
+
+    api_params, result, model, provider = _prepare_litellm_request(
+        prompt, model=model, provider=provider, images=images, tools=tools,
+        tool_choice=tool_choice, format=format, messages=messages,
+        api_key=api_key, api_url=api_url, stream=stream, **kwargs
+    )
+
+    if tools and tool_map:
+        resp = await _alimited_completion({**api_params, "stream": False}, provider, model)
+        result["raw_response"] = resp
+        if hasattr(resp.choices[0].message, 'tool_calls') and resp.choices[0].message.tool_calls:
+            result["tool_calls"] = resp.choices[0].message.tool_calls
+            return await aprocess_tool_calls(
+                result, tool_map, model, provider, messages, stream,
+                tool_executor=tool_executor, tool_timeout=tool_timeout,
+            )
+        if not stream:
+            # The model answered directly; no need to ask again
+            return _finalize_litellm_response(resp, result, format, stream)
+
+    api_params["stream"] = stream
+    resp = await _alimited_completion(api_params, provider, model)
+
+    return _finalize_litellm_response(resp, result, format, stream)
+
+
+def _parse_tool_call(tool_call):
+    """
+    Returns (tool_id, tool_name, arguments, arguments_json) for a dict or object
+    tool call, or None. arguments_json reuses the model's own argument string
+    when it parsed cleanly so it is not serialized a second time.
+    """
+    if isinstance(tool_call, dict):
+        tool_id = tool_call.get("id", str(uuid.uuid4()))
+        tool_name = tool_call.get("function", {}).get("name")
+        arguments_str = tool_call.get("function", {}).get("arguments", "{}")
+    else:
+        tool_id = getattr(tool_call, "id", str(uuid.uuid4()))
+        if hasattr(tool_call, "function"):
+            func_obj = tool_call.function
+            tool_name = getattr(func_obj, "name", None)
+            arguments_str = getattr(func_obj, "arguments", "{}")
+        else:
+            return None
+
+    try:
+        if isinstance(arguments_str, str):
+            arguments = json.loads(arguments_str)
+            arguments_json = arguments_str
+        else:
+            arguments = arguments_str
+            arguments_json = json.dumps(arguments, default=str)
+    except json.JSONDecodeError:
+        arguments = {"raw_arguments": arguments_str}
+        arguments_json = json.dumps(arguments)
+    return tool_id, tool_name, arguments, arguments_json
+
+
+def _to_jsonable(value):
+    """Converts a tool result to JSON-native types in one walk (non-native values become str)."""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): _to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    return str(value)
+
+
+def _record_tool_result(result, tool_id, tool_name, arguments, arguments_json, tool_result):
+    """Appends a tool result and its assistant/tool message pair to result."""
+    try:
+        serializable_result = _to_jsonable(tool_result)
+        tool_result_str = json.dumps(serializable_result)
+    except Exception as e_serialize:
+        tool_result_str = f"Error serializing result for {tool_name}: {str(e_serialize)}"
+        serializable_result = {"error": tool_result_str}
+    
+    result["tool_results"].append({
+        "tool_call_id": tool_id,
+        "tool_name": tool_name,
+        "arguments": arguments,
+        "result": serializable_result
+    })
+    
+    result["messages"].append({
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [
+            {
+                "id": tool_id,
+                "type": "function",
+                "function": {
+                    "name": tool_name,
+                    "arguments": arguments_json
+                }
+            }
+        ]
+    })
+    
+    result["messages"].append({
+        "role": "tool",
+        "tool_call_id": tool_id,
+        "content": tool_result_str
+    })
 
-    return result
 
+def _tool_timeout_for(tool_timeout, tool_name):
+    """tool_timeout may be a number of seconds for every tool or a {tool_name: seconds} dict."""
+    if isinstance(tool_timeout, dict):
+        return tool_timeout.get(tool_name)
+    return tool_timeout
 
-def process_tool_calls(response_dict, tool_map, model, provider, messages, stream=False):
+
+def _invoke_tool(tool, tool_name, arguments):
+    try:
+        return tool(**arguments)
+    except Exception as e:
+        return f"Error executing tool '{tool_name}': {str(e)}"
+
+
+def _prepare_tool_calls(response_dict, tool_map, messages):
+    """Copies the response dict and returns it with the parsed calls that map to a known tool."""
     result = response_dict.copy()
     result["tool_results"] = []
     
     if "messages" not in result:
         result["messages"] = messages if messages else []
-    
-    tool_calls = result.get("tool_calls", [])
-    
-    if not tool_calls:
+
+    calls = []
+    for tool_call in result.get("tool_calls", []) or []:
+        parsed = _parse_tool_call(tool_call)
+        if parsed is not None and parsed[1] in tool_map:
+            calls.append(parsed)
+    return result, calls
+
+
+def process_tool_calls(
+    response_dict,
+    tool_map,
+    model,
+    provider,
+    messages,
+    stream=False,
+    tool_executor=None,
+    tool_timeout=None,
+):
+    """
+    Executes the tool calls in a model response and appends their results.
+    Independent calls run concurrently on tool_executor (a private thread pool
+    when None); results are recorded in the order the model emitted them.
+    tool_timeout is seconds per tool, either a number or a {tool_name: seconds}
+    dict. A tool that times out is reported as an error; its thread is left to
+    finish in the background.
+    """
+    result, calls = _prepare_tool_calls(response_dict, tool_map, messages)
+    if not calls:
         return result
 
-    for tool_call in tool_calls:
-        tool_id = str(uuid.uuid4())
-        tool_name = None
-        arguments = {}
+    if len(calls) == 1 and tool_executor is None and tool_timeout is None:
+        tool_id, tool_name, arguments, arguments_json = calls[0]
+        tool_result = _invoke_tool(tool_map[tool_name], tool_name, arguments)
+        _record_tool_result(result, tool_id, tool_name, arguments, arguments_json, tool_result)
+        return result
 
-        if isinstance(tool_call, dict):
-            tool_id = tool_call.get("id", str(uuid.uuid4()))
-            tool_name = tool_call.get("function", {}).get("name")
-            arguments_str = tool_call.get("function", {}).get("arguments", "{}")
-        else:
-            tool_id = getattr(tool_call, "id", str(uuid.uuid4()))
-            if hasattr(tool_call, "function"):
-                func_obj = tool_call.function
-                tool_name = getattr(func_obj, "name", None)
-                arguments_str = getattr(func_obj, "arguments", "{}")
-            else:
-                continue
+    executor = tool_executor or ThreadPoolExecutor(max_workers=min(len(calls), 8))
+    try:
+        submitted_at = time.monotonic()
+        futures = [
+            executor.submit(_invoke_tool, tool_map[tool_name], tool_name, arguments)
+            for _, tool_name, arguments, _ in calls
+        ]
+        for (tool_id, tool_name, arguments, arguments_json), future in zip(calls, futures):
+            timeout = _tool_timeout_for(tool_timeout, tool_name)
+            try:
+                if timeout is None:
+                    tool_result = future.result()
+                else:
+                    remaining = max(0.0, submitted_at + timeout - time.monotonic())
+                    tool_result = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                future.cancel()
+                tool_result = f"Error executing tool '{tool_name}': timed out after {timeout}s"
+            _record_tool_result(result, tool_id, tool_name, arguments, arguments_json, tool_result)
+    finally:
+        if tool_executor is None:
+            executor.shutdown(wait=False)
 
-        try:
-            arguments = json.loads(arguments_str) if isinstance(arguments_str, str) else arguments_str
-        except json.JSONDecodeError:
-            arguments = {"raw_arguments": arguments_str}
+    return result
 
-        if tool_name in tool_map:
-            tool_result = None
-            tool_result_str = ""
-            serializable_result = None
 
-            try:
-                tool_result = tool_map[tool_name](**arguments)
-            except Exception as e:
-                tool_result = f"Error executing tool '{tool_name}': {str(e)}"
+async def aprocess_tool_calls(
+    response_dict,
+    tool_map,
+    model,
+    provider,
+    messages,
+    stream=False,
+    tool_executor=None,
+    tool_timeout=None,
+):
+    """
+    Async counterpart of process_tool_calls. Coroutine tools are awaited,
+    plain callables run on tool_executor (the loop's default executor when
+    None). All calls run concurrently and are recorded in their original order.
+    """
+    result, calls = _prepare_tool_calls(response_dict, tool_map, messages)
+    if not calls:
+        return result
 
-            try:
-                tool_result_str = json.dumps(tool_result, default=str)
-                try:
-                    serializable_result = json.loads(tool_result_str)
-                except json.JSONDecodeError:
-                    serializable_result = {"result": tool_result_str}
-            except Exception as e_serialize:
-                tool_result_str = f"Error serializing result for {tool_name}: {str(e_serialize)}"
-                serializable_result = {"error": tool_result_str}
-            
-            result["tool_results"].append({
-                "tool_call_id": tool_id,
-                "tool_name": tool_name,
-                "arguments": arguments,
-                "result": serializable_result
-            })
-            
-            result["messages"].append({
-                "role": "assistant",
-                "content": None,
-                "tool_calls": [
-                    {
-                        "id": tool_id,
-                        "type": "function",
-                        "function": {
-                            "name": tool_name,
-                            "arguments": json.dumps(arguments)
-                        }
-                    }
-                ]
-            })
-            
-            result["messages"].append({
-                "role": "tool",
-                "tool_call_id": tool_id,
-                "content": tool_result_str
-            })
-    
-    return result
\ No newline at end of file
+    loop = asyncio.get_running_loop()
+
+    async def _run(tool_name, arguments):
+        tool = tool_map[tool_name]
+        if asyncio.iscoroutinefunction(tool):
+            call = tool(**arguments)
+        else:
+            call = loop.run_in_executor(tool_executor, lambda: tool(**arguments))
+        timeout = _tool_timeout_for(tool_timeout, tool_name)
+        try:
+            return await asyncio.wait_for(call, timeout=timeout)
+        except asyncio.TimeoutError:
+            return f"Error executing tool '{tool_name}': timed out after {timeout}s"
+        except Exception as e:
+            return f"Error executing tool '{tool_name}': {str(e)}"
+
+    tool_results = await asyncio.gather(
+        *(_run(tool_name, arguments) for _, tool_name, arguments, _ in calls)
+    )
+    for (tool_id, tool_name, arguments, arguments_json), tool_result in zip(calls, tool_results):
+        _record_tool_result(result, tool_id, tool_name, arguments, arguments_json, tool_result)
+
+    return result
@@ -0,0 +1,125 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = []
+
+
+def _resolve(future, result, error):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls.
+
+    The first caller for a key (the leader) runs the call; callers arriving
+    with the same key before it finishes wait for the leader's result instead
+    of issuing their own. Keys are shared between the thread path (do) and the
+    async path (ado), so a coroutine can wait on a call led by a thread and
+    vice versa. Nothing is kept once the call completes.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "coalesced": 0}
+
+    def _join(self, key: str):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.stats["coalesced"] += 1
+                return call, False
+            call = _Call()
+            self._calls[key] = call
+            self.stats["calls"] += 1
+            return call, True
+
+    def _finish(self, key: str, call: _Call, result, error):
+        with self._lock:
+            self._calls.pop(key, None)
+            call.result = result
+            call.error = error
+            call.event.set()
+            waiters, call.waiters = call.waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future, result, error)
+
+    def do(
+        self,
+        key: str,
+        fn: Callable[[], Any],
+        share: Optional[Callable[[Any], Any]] = None,
+    ):
+        """
+        Runs fn() unless a call with the same key is in flight, in which case
+        its result is returned (passed through share() when given, so waiting
+        callers do not mutate the leader's result). Leader exceptions are
+        re-raised in every waiting caller.
+        """
+        call, leader = self._join(key)
+        if leader:
+            try:
+                result = fn()
+            except BaseException as e:
+                self._finish(key, call, None, e)
+                raise
+            self._finish(key, call, result, None)
+            return result
+        call.event.wait()
+        if call.error is not None:
+            raise call.error
+        return share(call.result) if share else call.result
+
+    async def ado(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        share: Optional[Callable[[Any], Any]] = None,
+    ):
+        """Async counterpart of do(); fn returns the awaitable to run as leader."""
+        call, leader = self._join(key)
+        if leader:
+            try:
+                result = await fn()
+            except BaseException as e:
+                self._finish(key, call, None, e)
+                raise
+            self._finish(key, call, result, None)
+            return result
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if not call.event.is_set():
+                call.waiters.append((loop, future))
+            else:
+                _resolve(future, call.result, call.error)
+        result = await future
+        return share(result) if share else result
+
+
+_default_single_flight = None
+_default_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Returns the process-wide SingleFlight used by the LLM call layer."""
+    global _default_single_flight
+    with _default_single_flight_lock:
+        if _default_single_flight is None:
+            _default_single_flight = SingleFlight()
+        return _default_single_flight
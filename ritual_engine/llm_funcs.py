@@ -0,0 +1,9 @@
+"""Compatibility module: the LLM helpers live in ritual_engine.codex."""
+from ritual_engine.codex import *  # noqa: F401,F403
+from ritual_engine.gen.embeddings import get_embeddings  # noqa: F401
+from ritual_engine.gen.response import (  # noqa: F401
+    aget_litellm_response,
+    aget_ollama_response,
+    get_litellm_response,
+    get_ollama_response,
+)
@@ -3,9 +3,6 @@ from pyexpat.errors import messages
 import yaml
 import json
 import sqlite3
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
 import re
 import random
 from datetime import datetime
@@ -13,33 +10,146 @@ import hashlib
 import pathlib
 import fnmatch
 import subprocess
+import threading
+import time
+import copy
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Any, Dict, List, Optional, Union
-from jinja2 import Environment, FileSystemLoader, Template, Undefined
-from sqlalchemy import create_engine, text
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    FunctionLoader,
+    Template,
+    Undefined,
+    meta,
+)
 import ritual_engine.rituals as npy 
 
 
 from ritual_engine.npc_sysenv import (
     ensure_dirs_exist, 
     init_db_tables,
-    get_system_message
+    get_system_message,
+    lookup_provider,
     )
-from ritual_engine.memory.command_history import CommandHistory
+from ritual_engine.vault.command_history import CommandHistory
+from ritual_engine.gen.cache import repeated_call_cache
+from ritual_engine.gen.context_window import get_context_window_manager
+from ritual_engine.gen.metrics import llm_metrics_labels
+from ritual_engine.work.python_pool import get_python_worker_pool, python_workers_enabled
 
 class SilentUndefined(Undefined):
     def _fail_with_undefined_error(self, *args, **kwargs):
         return ""
 
+
+ORCHESTRATE_MAX_ITERATIONS = int(os.environ.get("NPCSH_ORCHESTRATE_MAX_ITERATIONS", "5"))
+ORCHESTRATE_MAX_SECONDS = float(os.environ.get("NPCSH_ORCHESTRATE_MAX_SECONDS", "600"))
+ORCHESTRATE_MAX_WORKERS = int(os.environ.get("NPCSH_ORCHESTRATE_MAX_WORKERS", "4"))
+TEAM_HISTORY_MAX_ITEMS = int(os.environ.get("NPCSH_TEAM_HISTORY_MAX_ITEMS", "20"))
+TEAM_MESSAGES_MAX_ITEMS = int(os.environ.get("NPCSH_TEAM_MESSAGES_MAX_ITEMS", "50"))
+# "extractive" (default) or "llm" (summaries written by the team's control model)
+TEAM_HISTORY_SUMMARY = os.environ.get("NPCSH_TEAM_HISTORY_SUMMARY", "extractive")
+
 # ---------------------------------------------------------------------------
-# Utility Functions
+# Step template and bytecode caches
 # ---------------------------------------------------------------------------
 
+JINJA_CACHE_DIR = os.environ.get("NPCSH_JINJA_CACHE_DIR", "~/.npcsh/jinja_cache")
+COMPILED_CODE_CACHE_SIZE = int(os.environ.get("NPCSH_JINX_CODE_CACHE_SIZE", "512"))
+JINX_MAX_WORKERS = int(os.environ.get("NPCSH_JINX_MAX_WORKERS", "4"))
+
+# Context keys every step overwrites; reading one means "after the previous steps"
+_SHARED_STEP_KEYS = {"output", "llm_response", "results", "messages"}
+# Steps using the Guardian object have to stay in process
+_NPC_ACCESS = re.compile(r"\bnpc\b")
+
+_TEMPLATE_SYNTAX = ("{{", "{%", "{#")
+# Templates that pull in other files must be compiled by the caller's environment,
+# which carries the Guardian's npc/jinx directories as its loader.
+_LOADER_TAGS = re.compile(r"{%-?\s*(include|import|from|extends)\b")
+
+_step_sources: Dict[str, str] = {}
+_template_env = None
+_template_env_lock = threading.Lock()
+_compiled_code: "OrderedDict[str, Any]" = OrderedDict()
+_compiled_code_lock = threading.Lock()
+
+
+def jinja_bytecode_cache():
+    """Bytecode cache shared by every process using the same NPCSH_JINJA_CACHE_DIR (None if unwritable)."""
+    directory = os.path.expanduser(JINJA_CACHE_DIR)
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError:
+        return None
+    return FileSystemBytecodeCache(directory)
+
+
+def get_template_env():
+    """
+    Returns the environment jinx step templates are compiled in. Templates are
+    looked up by the hash of their source, so identical steps share one compiled
+    template and the bytecode cache lets new processes skip Jinja's parser.
+    """
+    global _template_env
+    with _template_env_lock:
+        if _template_env is None:
+            _template_env = Environment(
+                loader=FunctionLoader(_step_sources.get),
+                undefined=SilentUndefined,
+                bytecode_cache=jinja_bytecode_cache(),
+                cache_size=-1,
+            )
+        return _template_env
+
 
+def compile_step_template(source):
+    """
+    Compiles a step's code or engine string once. Returns None when the string has
+    no Jinja syntax (it renders to itself) or needs the caller's loader.
+    """
+    if not isinstance(source, str) or not any(tag in source for tag in _TEMPLATE_SYNTAX):
+        return None
+    if _LOADER_TAGS.search(source):
+        return None
+    key = hashlib.sha1(source.encode("utf-8")).hexdigest()
+    _step_sources[key] = source
+    return get_template_env().get_template(key)
 
 
+def _template_variables(source):
+    """Names a step template reads from the context."""
+    if not isinstance(source, str) or not any(tag in source for tag in _TEMPLATE_SYNTAX):
+        return set()
+    try:
+        return meta.find_undeclared_variables(get_template_env().parse(source))
+    except Exception:
+        return set(re.findall(r"[A-Za-z_][A-Za-z0-9_]*", source))
+
+
+def compile_step_code(source, filename="<jinx>"):
+    """Returns the code object for rendered python, compiling each distinct source only once."""
+    key = hashlib.sha1(source.encode("utf-8")).hexdigest()
+    with _compiled_code_lock:
+        code = _compiled_code.get(key)
+        if code is not None:
+            _compiled_code.move_to_end(key)
+            return code
+    code = compile(source, filename, "exec")
+    with _compiled_code_lock:
+        _compiled_code[key] = code
+        while len(_compiled_code) > COMPILED_CODE_CACHE_SIZE:
+            _compiled_code.popitem(last=False)
+    return code
 
-import math
-from PIL import Image
+
+# ---------------------------------------------------------------------------
+# Utility Functions
+# ---------------------------------------------------------------------------
 
 
 class Jinx:
@@ -77,6 +187,61 @@ class Jinx:
         self.inputs = jinx_data.get("inputs", [])
         self.description = jinx_data.get("description", "")
         self.steps = self._parse_steps(jinx_data.get("steps", []))
+        self.cache = self._parse_cache(jinx_data.get("cache"))
+        self._compile_templates()
+
+    def _parse_cache(self, cache):
+        """
+        `cache: {ttl: seconds, key: [inputs]}` declares the jinx pure: results are
+        reused for ttl seconds (forever when omitted) for the same key inputs (all
+        inputs when omitted). `cache: true` caches on all inputs without expiry.
+        """
+        if not cache:
+            return None
+        if cache is True:
+            cache = {}
+        if not isinstance(cache, dict):
+            raise ValueError(f"Invalid cache declaration for jinx {self.jinx_name}: {cache}")
+        names = [inp if isinstance(inp, str) else list(inp.keys())[0] for inp in self.inputs]
+        key = cache.get("key")
+        if isinstance(key, str):
+            key = [key]
+        unknown = [name for name in key or [] if name not in names]
+        if unknown:
+            raise ValueError(f"Cache key of jinx {self.jinx_name} names unknown inputs: {unknown}")
+        ttl = cache.get("ttl")
+        return {"ttl": float(ttl) if ttl is not None else None, "key": list(key) if key else names}
+
+    def cache_key(self, input_values):
+        """Result cache key for input_values, tied to the jinx's current definition"""
+        if self.cache is None:
+            return None
+        definition = {**self.to_dict(), "cache": None}
+        values = {name: input_values.get(name) for name in self.cache["key"]}
+        payload = json.dumps([definition, values], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _compile_templates(self):
+        """Compile each step's code and engine templates once, keyed by step name"""
+        self._templates = {}
+        for step in self.steps:
+            try:
+                self._templates[step["name"]] = (
+                    step["code"],
+                    compile_step_template(step["code"]),
+                    step["engine"],
+                    compile_step_template(step["engine"]),
+                )
+            except Exception as e:
+                # Left to the caller's environment, which reports the error on render
+                print(f"Error compiling templates for step {step['name']}: {e}")
+
+    def _render(self, template, source, jinja_env, context):
+        if template is not None:
+            return template.render(**context)
+        if isinstance(source, str) and any(tag in source for tag in _TEMPLATE_SYNTAX):
+            return jinja_env.from_string(source).render(**context)
+        return source
             
     def _parse_steps(self, steps):
         """Parse steps from jinx definition"""
@@ -88,6 +253,11 @@ class Jinx:
                     "engine": step.get("engine", "natural"),
                     "code": step.get("code", "")
                 }
+                if "depends_on" in step:
+                    depends_on = step["depends_on"] or []
+                    if isinstance(depends_on, str):
+                        depends_on = [depends_on]
+                    parsed_step["depends_on"] = list(depends_on)
                 parsed_steps.append(parsed_step)
             else:
                 raise ValueError(f"Invalid step format: {step}")
@@ -114,17 +284,132 @@ class Jinx:
             "output": None
         })
         
-        # Process each step in sequence
+        cache_key = self.cache_key(input_values) if JINX_CACHE_DB else None
+        if cache_key:
+            cached = load_cached_jinx_result(cache_key)
+            if cached is not None:
+                context.update(cached)
+                context["cache_hit"] = True
+                return context
+
+        # LLM calls are recorded against this jinx
+        with llm_metrics_labels(jinx=self.jinx_name):
+            dependencies = self.step_dependencies()
+            if JINX_MAX_WORKERS > 1 and any(
+                deps != set(range(i)) for i, deps in enumerate(dependencies)
+            ):
+                context = self._execute_graph(context, dependencies, jinja_env, npc, messages)
+            else:
+                for i, step in enumerate(self.steps):
+                    context = self._execute_step(
+                        step, 
+                        context,
+                        jinja_env, 
+                        npc=npc, 
+                        messages=messages, 
+
+                    )            
+
+        if cache_key:
+            save_cached_jinx_result(
+                self.jinx_name,
+                cache_key,
+                {"output": context.get("output"), "llm_response": context.get("llm_response")},
+                self.cache["ttl"],
+            )
+        return context
+
+    def step_dependencies(self):
+        """
+        Indices of the earlier steps each step depends on. Taken from the step's
+        depends_on list when present. Without one, natural-language steps depend
+        on the steps their {{ step_name }} references name (every earlier step if
+        they read output/llm_response/results/messages), and python, bash and
+        other code steps depend on every earlier step, since they may share
+        files, globals or npc state; give them depends_on to run concurrently.
+        """
+        signature = tuple(
+            (step.get("name"), step.get("engine"), step.get("code"), tuple(step.get("depends_on") or ()))
+            for step in self.steps
+        )
+        cached = getattr(self, "_dependencies", None)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        dependencies = []
+        index = {}
         for i, step in enumerate(self.steps):
-            context = self._execute_step(
-                step, 
-                context,
-                jinja_env, 
-                npc=guardian, 
-                messages=messages, 
+            earlier = set(range(i))
+            if "depends_on" in step:
+                deps = set()
+                for name in step["depends_on"]:
+                    if name not in index:
+                        raise ValueError(
+                            f"Step {step.get('name')} of jinx {self.jinx_name} depends on unknown earlier step {name}"
+                        )
+                    deps.add(index[name])
+            elif step.get("engine", "natural") != "natural":
+                deps = earlier
+            else:
+                names = set()
+                for source in (step.get("code", ""), step.get("engine", "")):
+                    names |= _template_variables(source)
+                if names & _SHARED_STEP_KEYS:
+                    deps = earlier
+                else:
+                    deps = {index[name] for name in names if name in index}
+            dependencies.append(deps)
+            index[step.get("name")] = i
 
-            )            
+        self._dependencies = (signature, dependencies)
+        return dependencies
+
+    def _execute_graph(self, context, dependencies, jinja_env, npc, messages):
+        """
+        Runs steps as soon as the steps they depend on have finished, independent
+        ones concurrently. Each step sees the base context plus the updates of its
+        ancestors, and updates are merged back in step order, so the result does not
+        depend on which thread finishes first.
+        """
+        ancestors = []
+        for deps in dependencies:
+            closure = set(deps)
+            for dep in deps:
+                closure |= ancestors[dep]
+            ancestors.append(closure)
+
+        updates = {}
+        running = {}
+        pending = list(range(len(self.steps)))
+        with ThreadPoolExecutor(max_workers=JINX_MAX_WORKERS) as pool:
+            while pending or running:
+                for i in [i for i in pending if dependencies[i].issubset(updates)]:
+                    pending.remove(i)
+                    step_context = dict(context)
+                    for j in sorted(ancestors[i]):
+                        step_context.update(updates[j])
+                    step_messages = [dict(m) for m in messages] if messages else messages
+                    future = pool.submit(
+                        contextvars.copy_context().run,
+                        self._execute_step,
+                        self.steps[i],
+                        dict(step_context),
+                        jinja_env,
+                        npc=npc,
+                        messages=step_messages,
+                    )
+                    running[future] = (i, step_context)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, before = running.pop(future)
+                    after = future.result()
+                    updates[i] = {
+                        key: value for key, value in after.items()
+                        if key not in before or before[key] is not value
+                    }
 
+        for i in range(len(self.steps)):
+            context.update(updates[i])
         return context
             
     def _execute_step(self,
@@ -142,14 +427,14 @@ class Jinx:
         
         
 
+        code_template = engine_template = None
+        compiled = getattr(self, "_templates", {}).get(step_name)
+        # Steps edited after loading fall back to compiling through jinja_env
+        if compiled and compiled[0] == code and compiled[2] == engine:
+            _, code_template, _, engine_template = compiled
         try:
-            #print(code)
-            template = jinja_env.from_string(code)
-            rendered_code = template.render(**context)
-            
-            engine_template = jinja_env.from_string(engine)
-            rendered_engine = engine_template.render(**context)
-        
+            rendered_code = self._render(code_template, code, jinja_env, context)
+            rendered_engine = self._render(engine_template, engine, jinja_env, context)
         except Exception as e:
             print(f"Error rendering templates for step {step_name}: {e}")
             rendered_code = code
@@ -171,7 +456,24 @@ class Jinx:
                 context["results"] = response_text
                 context[step_name] = response_text
                 context['messages'] = response.get('messages')
+        elif rendered_engine == "python_worker" or (
+            rendered_engine == "python"
+            and python_workers_enabled()
+            and not _NPC_ACCESS.search(rendered_code)
+        ):
+            # Out of process: the step gets its own interpreter and time/memory limits
+            exec_locals, context_changes = get_python_worker_pool().run(rendered_code, context)
+            context.update(context_changes)
+            context.update(exec_locals)
+            if "output" in exec_locals:
+                context["output"] = exec_locals["output"]
+                context[step_name] = exec_locals["output"]
         elif rendered_engine == "python":
+            # Data libraries are only imported once a jinx runs python
+            import numpy as np
+            import pandas as pd
+            import matplotlib.pyplot as plt
+
             # Setup execution environment
             exec_globals = {
                 "__builtins__": __builtins__,
@@ -194,7 +496,8 @@ class Jinx:
             
             # Execute the code
             exec_locals = {}
-            exec(rendered_code, exec_globals, exec_locals)
+            compiled = compile_step_code(rendered_code, f"<jinx:{self.jinx_name}:{step_name}>")
+            exec(compiled, exec_globals, exec_locals)
             
             # Update context with results
             context.update(exec_locals)
@@ -215,16 +518,48 @@ class Jinx:
             "jinx_name": self.jinx_name,
             "description": self.description,
             "inputs": self.inputs,
+            **({"cache": self.cache} if getattr(self, "cache", None) else {}),
             "steps": [
                 {
                     "name": step.get("name", f"step_{i}"),
                     "engine": step.get("engine"),
-                    "code": step.get("code")
+                    "code": step.get("code"),
+                    **({"depends_on": step["depends_on"]} if "depends_on" in step else {}),
                 }
                 for i, step in enumerate(self.steps)
             ]
         }
         
+    def tool_name(self):
+        """Name usable as a function-calling tool name (letters, digits, _ and -, at most 64)"""
+        return re.sub(r"[^a-zA-Z0-9_-]", "_", self.jinx_name)[:64]
+
+    def to_tool_schema(self):
+        """OpenAI/ollama function-calling schema for this jinx's inputs"""
+        properties = {}
+        required = []
+        for inp in self.inputs:
+            if isinstance(inp, dict):
+                for name, default in inp.items():
+                    properties[name] = {"type": "string"}
+                    if default not in (None, ""):
+                        properties[name]["description"] = f"Defaults to {default!r}"
+            else:
+                properties[str(inp)] = {"type": "string"}
+                required.append(str(inp))
+        return {
+            "type": "function",
+            "function": {
+                "name": self.tool_name(),
+                "description": self.description or self.jinx_name,
+                "parameters": {
+                    "type": "object",
+                    "properties": properties,
+                    "required": required,
+                },
+            },
+        }
+
     def save(self, directory):
         """Save jinx to file"""
         jinx_path = os.path.join(directory, f"{self.jinx_name}.jinx")
@@ -281,23 +616,171 @@ output = {mcp_tool.__module__}.{name}(
         except: 
             pass    
 def load_jinxs_from_directory(directory):
-    """Load all jinxs from a directory"""
-    jinxs = []
-    directory = os.path.expanduser(directory)
-    
-    if not os.path.exists(directory):
-        return jinxs
-        
-    for filename in os.listdir(directory):
-        if filename.endswith(".jinx"):
+    """Load all jinxs from a directory (shared, cached objects from the file registry)"""
+    return get_file_registry().jinxs_in(directory)
+
+
+# ---------------------------------------------------------------------------
+# File registry
+# ---------------------------------------------------------------------------
+
+REGISTRY_POLL_SECONDS = float(os.environ.get("NPCSH_REGISTRY_POLL_SECONDS", "2"))
+
+
+class FileRegistry:
+    """
+    Process-wide cache of parsed .jinx, .npc and .ctx files keyed by path.
+
+    Each file is parsed once and re-parsed only when its mtime or size
+    changes. Files and directory listings are re-checked at most every
+    poll_interval seconds, so repeated Guardian and Team loads cost a
+    dictionary lookup. Jinx objects are shared between Guardians and must
+    be treated as read-only; YAML data is handed out as a copy.
+    """
+
+    def __init__(self, poll_interval: float = REGISTRY_POLL_SECONDS):
+        self.poll_interval = poll_interval
+        self._files = {}  # path -> [checked_at, (mtime_ns, size), value]
+        self._dirs = {}   # directory -> [checked_at, mtime_ns, sorted names]
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "loads": 0}
+
+    def _cached(self, path, parse=None):
+        path = os.path.abspath(os.path.expanduser(path))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._files.get(path)
+            if entry and now - entry[0] < self.poll_interval:
+                self.stats["hits"] += 1
+                return entry[2]
+        try:
+            st = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._files.pop(path, None)
+            return None
+        signature = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._files.get(path)
+            if entry and entry[1] == signature:
+                entry[0] = now
+                self.stats["hits"] += 1
+                return entry[2]
+        if parse is None:
+            return None
+        value = parse(path)
+        with self._lock:
+            self._files[path] = [now, signature, value]
+            self.stats["loads"] += 1
+        return value
+
+    def yaml(self, path):
+        """Parsed YAML for path, or None if it is missing or invalid"""
+        return copy.deepcopy(self._cached(path, load_yaml_file))
+
+    def cached_yaml(self, path):
+        """Parsed YAML for path if it was already loaded and is unchanged, else None; never parses"""
+        return copy.deepcopy(self._cached(path))
+
+    def signature(self, path):
+        """(mtime_ns, size) of path, from its entry while fresh, else from os.stat; None if missing"""
+        path = os.path.abspath(os.path.expanduser(path))
+        with self._lock:
+            entry = self._files.get(path)
+            if entry and time.monotonic() - entry[0] < self.poll_interval:
+                return entry[1]
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def jinx(self, path):
+        """The shared Jinx for path; raises if the file does not define a valid jinx"""
+        return self._cached(path, lambda p: Jinx(jinx_path=p))
+
+    def list_files(self, directory, suffix):
+        """Paths in directory ending with suffix, from a listing refreshed when the directory changes"""
+        directory = os.path.abspath(os.path.expanduser(directory))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._dirs.get(directory)
+            fresh = entry and now - entry[0] < self.poll_interval
+        if not fresh:
             try:
-                jinx_path = os.path.join(directory, filename)
-                jinx = Jinx(jinx_path=jinx_path)
-                jinxs.append(jinx)
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                with self._lock:
+                    self._dirs.pop(directory, None)
+                return []
+            if entry and entry[1] == mtime:
+                entry[0] = now
+            else:
+                entry = [now, mtime, sorted(os.listdir(directory))]
+                with self._lock:
+                    self._dirs[directory] = entry
+        return [os.path.join(directory, name) for name in entry[2] if name.endswith(suffix)]
+
+    def seed_yaml(self, path, data):
+        """Registers already-parsed YAML (e.g. from a compiled Guardian) for path"""
+        self._seed(path, lambda: copy.deepcopy(data))
+
+    def seed_jinx(self, path, jinx_data):
+        """Registers a jinx built from already-parsed data (e.g. a compiled Guardian) for path"""
+        return self._seed(path, lambda: Jinx(jinx_data=jinx_data))
+
+    def _seed(self, path, build):
+        path = os.path.abspath(os.path.expanduser(path))
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        signature = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._files.get(path)
+            if entry and entry[1] == signature:
+                return entry[2]
+        value = build()
+        with self._lock:
+            self._files[path] = [time.monotonic(), signature, value]
+        return value
+
+    def jinxs_in(self, directory):
+        """All jinxs in directory; files that fail to load are reported and skipped"""
+        jinxs = []
+        for path in self.list_files(directory, ".jinx"):
+            try:
+                jinx = self.jinx(path)
             except Exception as e:
-                print(f"Error loading jinx {filename}: {e}")
-                
-    return jinxs
+                print(f"Error loading jinx {os.path.basename(path)}: {e}")
+                continue
+            if jinx is not None:
+                jinxs.append(jinx)
+        return jinxs
+
+    def invalidate(self, path=None):
+        """Forget one file or directory (or everything) so the next lookup re-reads it"""
+        with self._lock:
+            if path is None:
+                self._files.clear()
+                self._dirs.clear()
+                return
+            path = os.path.abspath(os.path.expanduser(path))
+            self._files.pop(path, None)
+            self._dirs.pop(path, None)
+
+
+_file_registry = None
+_file_registry_lock = threading.Lock()
+
+
+def get_file_registry() -> FileRegistry:
+    """Returns the process-wide FileRegistry."""
+    global _file_registry
+    with _file_registry_lock:
+        if _file_registry is None:
+            _file_registry = FileRegistry()
+        return _file_registry
 
 # Guardian Class
 
@@ -383,7 +866,7 @@ class Guardian:
             
             
         # Load jinxs
-        self.jinxs = self._load_npc_jinxs(jinxs or "*")
+        self.jinxs = self._load_guardian_jinxs(jinxs or "*")
         
         # Set up shared context for Guardian
         self.shared_context = {
@@ -400,7 +883,7 @@ class Guardian:
         if db_conn is not None:
             init_db_tables()
     def _load_npc_memory(self):
-        memory = self.command_history.get_messages_by_guardian(self.name, n_last=self.memory_length)
+        memory = self.command_history.get_messages_by_npc(self.name, n_last=self.memory_length)
         #import pdb 
         #pdb.set_trace()
         memory = [{'role':mem['role'], 'content':mem['content']} for mem in memory]
@@ -413,7 +896,23 @@ class Guardian:
         if not os.path.isabs(file):
             file = os.path.abspath(file)
             
-        npc_data = load_yaml_file(file)
+        # Files already parsed in this process come from the registry. Otherwise a
+        # compiled copy in compiled_npcs is used while the .npc file and its jinxs
+        # keep the mtime and size they were compiled from.
+        registry = get_file_registry()
+        npc_data = registry.cached_yaml(file)
+        compiled = source_signature = None
+        if npc_data is None and COMPILED_NPCS_DB:
+            jinx_paths = registry.list_files(os.path.join(os.path.dirname(file), "jinxs"), ".jinx")
+            source_signature = compute_source_signature([file] + jinx_paths, registry)
+            compiled = load_compiled_npc(file, source_signature) if source_signature else None
+        if compiled is not None:
+            npc_data = compiled["npc"]
+            registry.seed_yaml(file, npc_data)
+            for jinx_path, jinx_data in compiled["jinxs"].items():
+                registry.seed_jinx(jinx_path, jinx_data)
+        elif npc_data is None:
+            npc_data = registry.yaml(file)
         if not npc_data:
             raise ValueError(f"Failed to load Guardian from {file}")
             
@@ -445,6 +944,20 @@ class Guardian:
         
         # Set Guardian-specific jinxs directory path
         self.npc_jinxs_directory = os.path.join(os.path.dirname(file), "jinxs")
+
+        # API keys are not written to the database, so Guardians with one are never compiled
+        if compiled is None and source_signature and "api_key" not in npc_data:
+            jinxs = {}
+            for jinx_path in jinx_paths:
+                try:
+                    jinxs[jinx_path] = registry.jinx(jinx_path).to_dict()
+                except Exception:
+                    continue
+            save_compiled_npc(self.name, file, {
+                "source_signature": source_signature,
+                "npc": npc_data,
+                "jinxs": jinxs,
+            })
     def get_system_prompt(self, simple=False):
         if simple:
             return self.primary_directive
@@ -453,6 +966,7 @@ class Guardian:
     def _setup_db(self):
         """Set up database tables and determine type"""
         try:
+            from sqlalchemy import text
 
             dialect = self.db_conn.dialect.name
 
@@ -492,9 +1006,6 @@ class Guardian:
             # Try to find jinxs in Guardian-specific jinxs dir first
             #print(self.npc_jinxs_directory)
             guardian_jinxs.extend(load_jinxs_from_directory(self.jinxs_directory))
-            #print(npc_jinxs)               
-            if os.path.exists(self.jinxs_directory):
-                guardian_jinxs.extend(load_jinxs_from_directory(self.jinxs_directory))                
             # Return all loaded jinxs
             self.jinxs_dict = {jinx.jinx_name: jinx for jinx in guardian_jinxs}
             #print(npc_jinxs)
@@ -523,7 +1034,7 @@ class Guardian:
                         
                 if jinx_path:
                     try:
-                        jinx_obj = Jinx(jinx_path=jinx_path)
+                        jinx_obj = get_file_registry().jinx(jinx_path)
                         guardian_jinxs.append(jinx_obj)
                     except Exception as e:
                         print(f"Error loading jinx {jinx_path}: {e}")
@@ -539,7 +1050,12 @@ class Guardian:
                          messages: Optional[List[Dict[str, str]]] = None,
                          **kwargs):
         """Get a response from the LLM"""
-        
+        if messages is None:
+            messages = self.memory
+        if messages:
+            # Trim the oldest turns if the history no longer fits the model
+            messages = get_context_window_manager().fit(messages, model=self.model)
+
         # Call the LLM
         response = npy.llm_funcs.get_llm_response(
             request, 
@@ -548,7 +1064,7 @@ class Guardian:
             npc=self, 
             jinxs=jinxs,
             tools = tools, 
-            messages=self.memory if messages is None else messages,
+            messages=messages,
             **kwargs
         )        
         
@@ -564,24 +1080,26 @@ class Guardian:
         else:
             return {"error": f"jinx '{jinx_name}' not found"}
         
+        start = time.perf_counter()
         result = jinx.execute(
             input_values=inputs,
-            context=self.shared_context,
+            jinxs_dict=self.jinxs_dict,
             jinja_env=self.jinja_env,
             npc=self
         )
-        if self.db_conn is not None:
-            self.db_conn.add_jinx_call(
+        if self.command_history is not None:
+            self.command_history.save_jinx_execution(
                 triggering_message_id=message_id,
                 conversation_id=conversation_id,
                 jinx_name=jinx_name,
                 jinx_inputs=inputs,
-                jinx_output=result,
+                jinx_output=result.get("output"),
                 status="success",
                 error_message=None,
-                duration_ms=None,
+                duration_ms=int((time.perf_counter() - start) * 1000),
                 npc_name=self.name,
                 team_name=team_name,
+                cache_hit=result.get("cache_hit", False),
             )
         return result
     
@@ -667,13 +1185,176 @@ class Guardian:
         """String representation of Guardian"""
         return f"Guardian: {self.name}\nDirective: {self.primary_directive}\nModel: {self.model}\nProvider: {self.provider}\nAPI URL: {self.api_url}\njinxs: {', '.join([jinx.jinx_name for jinx in self.jinxs])}"
 
+    def fork(self, db_conn=None, command_history=None):
+        """
+        Per-request copy of this Guardian. The parsed definition, jinxs and Jinja
+        env are shared; the shared context and memory are its own. Pass a
+        command_history owned by the calling thread when forking for a request.
+        """
+        forked = copy.copy(self)
+        forked.shared_context = copy.deepcopy(self.shared_context)
+        if db_conn is not None:
+            forked.db_conn = db_conn
+        if command_history is not None:
+            forked.command_history = command_history
+        if forked.command_history is not None:
+            forked.memory = forked._load_npc_memory()
+        return forked
+
+
+class GuardianPool:
+    """
+    LRU cache of Guardian definitions keyed by .npc path, mtime and size.
+
+    Definitions are built once, without a per-request DB connection. get()
+    hands out a fork() of the definition bound to a CommandHistory on db_path
+    owned by the calling thread, so concurrent requests never share a sqlite
+    cursor or see each other's context, and editing the .npc file takes
+    effect on the next request.
+    """
+
+    def __init__(self, db_path="~/npcsh_history.db", max_size=64):
+        self.db_path = db_path
+        self.max_size = max_size
+        self._definitions = OrderedDict()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "loads": 0}
+
+    def _history(self):
+        """The calling thread's CommandHistory on db_path"""
+        if not self.db_path:
+            return None
+        history = getattr(self._local, "command_history", None)
+        if history is None:
+            history = CommandHistory(self.db_path)
+            self._local.command_history = history
+        return history
+
+    def get(self, path, db_conn=None):
+        """A per-request Guardian for the .npc file at path; raises OSError if it does not exist"""
+        path = os.path.abspath(os.path.expanduser(path))
+        st = os.stat(path)
+        key = (path, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            definition = self._definitions.get(key)
+            if definition is not None:
+                self._definitions.move_to_end(key)
+                self.stats["hits"] += 1
+        if definition is None:
+            # The file changed since the registry last polled it
+            get_file_registry().invalidate(path)
+            definition = Guardian(file=path)
+            with self._lock:
+                for stale in [k for k in self._definitions if k[0] == path]:
+                    del self._definitions[stale]
+                self._definitions[key] = definition
+                self.stats["loads"] += 1
+                while len(self._definitions) > self.max_size:
+                    self._definitions.popitem(last=False)
+        return definition.fork(db_conn, command_history=self._history())
+
+    def clear(self):
+        with self._lock:
+            self._definitions.clear()
+
+def _summarize_entry(entry, width=200):
+    """One line describing a history entry or message"""
+    if isinstance(entry, dict):
+        if "role" in entry and "content" in entry:
+            who, text = entry["role"], entry["content"]
+        else:
+            who = entry.get("npc_name", "agent")
+            text = entry.get("output") if entry.get("output") is not None else entry.get("error", entry)
+    else:
+        who, text = "entry", entry
+    text = " ".join(str(text).split())
+    if len(text) > width:
+        text = text[:width - 3] + "..."
+    return f"{who}: {text}"
+
+
+class BoundedHistory(list):
+    """
+    List that keeps only its newest max_items entries. Evicted entries are folded
+    into `summary`, extractively (one truncated line each) or by a
+    summarizer(summary, evicted) callable, and the summary is capped at
+    summary_chars, so a history interpolated into prompts stays a constant size.
+
+    A summarizer may call a model, so it never runs inside append(); entries it
+    has yet to see wait in `pending` until summarize() is called.
+    """
+
+    def __init__(self, iterable=(), max_items=20, summary_chars=2000, summarizer=None):
+        super().__init__()
+        self.max_items = max_items
+        self.summary_chars = summary_chars
+        self.summarizer = summarizer
+        self.summary = ""
+        self.pending = []
+        self.evicted = 0
+        self.extend(iterable)
+
+    def append(self, item):
+        super().append(item)
+        self._evict()
+
+    def extend(self, items):
+        super().extend(items)
+        self._evict()
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def _evict(self):
+        # Unpickling appends items before restoring attributes
+        max_items = getattr(self, "max_items", None)
+        if max_items is None or len(self) <= max_items:
+            return
+        overflow = len(self) - max_items
+        evicted = self[:overflow]
+        del self[:overflow]
+        self.evicted += overflow
+        if self.summarizer is None:
+            self.summary = self._summarize(evicted)
+        else:
+            self.pending.extend(evicted)
+
+    def summarize(self):
+        """Fold the entries evicted since the last call into summary with the summarizer"""
+        if not self.pending:
+            return
+        evicted, self.pending = self.pending, []
+        self.summary = self._summarize(evicted)
+
+    def _summarize(self, evicted):
+        if self.summarizer is not None:
+            try:
+                return str(self.summarizer(self.summary, evicted))[-self.summary_chars:]
+            except Exception as e:
+                print(f"Error summarizing history, falling back to extractive summary: {e}")
+        text = "\n".join(([self.summary] if self.summary else []) + [_summarize_entry(e) for e in evicted])
+        if len(text) > self.summary_chars:
+            text = "..." + text[-(self.summary_chars - 3):]
+        return text
+
+    def __repr__(self):
+        summary = "\n".join(([self.summary] if self.summary else []) + [_summarize_entry(e) for e in self.pending])
+        if not summary:
+            return super().__repr__()
+        return f"[Summary of {self.evicted} earlier entries:\n{summary}\n] + {super().__repr__()}"
+
+
 class Team:
     def __init__(self, 
                  team_path=None, 
                  npcs=None, 
                  forenpc=None,
                  jinxs=None,                   
-                 db_conn=None):
+                 db_conn=None,
+                 control_model=None,
+                 control_provider=None):
         """
         Initialize an Guardian team from directory or list of Guardians
         
@@ -681,6 +1362,9 @@ class Team:
             team_path: Path to team directory
             npcs: List of Guardian objects
             db_conn: Database connection
+            control_model: Model for routing, relevance and debrief calls
+                (defaults to the team .ctx control_model, then NPCSH_CONTROL_MODEL)
+            control_provider: Provider for control_model
         """
         self.npcs = {}
         self.sub_teams = {}
@@ -689,6 +1373,9 @@ class Team:
         self.team_path = os.path.expanduser(team_path) if team_path else None
         self.databases = {}
         self.mcp_servers = {}
+        self.preferences = None
+        self.control_model = None
+        self.control_provider = None
         if forenpc is not None:
             self.forenpc = forenpc
         else:
@@ -704,7 +1391,10 @@ class Team:
             "intermediate_results": {},
             "dataframes": {},
             "memories": {},          
-            "execution_history": [],   
+            "execution_history": BoundedHistory(
+                max_items=TEAM_HISTORY_MAX_ITEMS,
+                summarizer=self._summarize_history if TEAM_HISTORY_SUMMARY == "llm" else None,
+            ),   
             "npc_messages": {}                 
             }
                 
@@ -719,6 +1409,12 @@ class Team:
 
         
         self.jinja_env = Environment(undefined=SilentUndefined)
+
+        # Control-plane model: small, fast model for orchestration decisions
+        self.control_model = control_model or self.control_model or os.environ.get("NPCSH_CONTROL_MODEL")
+        self.control_provider = control_provider or self.control_provider or os.environ.get("NPCSH_CONTROL_PROVIDER")
+        if self.control_model and not self.control_provider:
+            self.control_provider = lookup_provider(self.control_model)
         
             
         if db_conn is not None:
@@ -732,11 +1428,11 @@ class Team:
         
         # Load team context if available
 
-        for filename in os.listdir(self.team_path):
+        for npc_path in get_file_registry().list_files(self.team_path, ".npc"):
+            filename = os.path.basename(npc_path)
             print('filename: ', filename)
             if filename.endswith(".npc"):
                 try:
-                    npc_path = os.path.join(self.team_path, filename)
                     npc = Guardian(npc_path, db_conn=self.db_conn)
                     self.npcs[npc.name] = npc
                     
@@ -758,10 +1454,10 @@ class Team:
 
                                 
         #check if any .ctx file exists 
-        for fname in os.listdir(self.team_path):
-            if fname.endswith('.ctx'):
+        for ctx_path in get_file_registry().list_files(self.team_path, '.ctx'):
+            if ctx_path.endswith('.ctx'):
                 # do stuff on the file
-                ctx_data = load_yaml_file(os.path.join(self.team_path, fname))                
+                ctx_data = get_file_registry().yaml(ctx_path)
                 if ctx_data is not None:
                     if 'mcp_servers' in ctx_data:
                         self.mcp_servers = ctx_data['mcp_servers']
@@ -775,12 +1471,14 @@ class Team:
                         self.preferences = ctx_data['preferences']
                     else:
                         self.preferences = []
+                    self.control_model = ctx_data.get('control_model')
+                    self.control_provider = ctx_data.get('control_provider')
                     if 'forenpc' in ctx_data:
                         self.forenpc = self.npcs[ctx_data['forenpc']]
                     else:
                         self.forenpc = self.npcs[list(self.npcs.keys())[0]] if self.npcs else None
                     for key, item in ctx_data.items():
-                        if key not in ['name', 'mcp_servers', 'databases', 'context']:
+                        if key not in ['name', 'mcp_servers', 'databases', 'context', 'control_model', 'control_provider']:
                             self.shared_context[key] = item
                 return ctx_data
         return {}
@@ -857,161 +1555,319 @@ class Team:
         
         return None
     
-    def orchestrate(self, request):
-        """Orchestrate a request through the team"""
+    def orchestrate(self, request, mode="sequential", max_iterations=None, max_seconds=None, max_workers=None):
+        """
+        Orchestrate a request through the team.
+
+        mode="sequential" lets the forenpc handle the request (passing it along
+        as it sees fit); mode="parallel" has the forenpc split it into
+        sub-requests that team members work on concurrently, and checks the
+        combined result once per round. Either way the loop stops after
+        max_iterations rounds or max_seconds of wall time.
+        """
         forenpc = self.get_forenpc()
         if not forenpc:
             return {"error": "No forenpc available to coordinate the team"}
+        if max_iterations is None:
+            max_iterations = ORCHESTRATE_MAX_ITERATIONS
+        if max_seconds is None:
+            max_seconds = ORCHESTRATE_MAX_SECONDS
+        if max_workers is None:
+            max_workers = ORCHESTRATE_MAX_WORKERS
+        deadline = time.monotonic() + max_seconds
         
         # Log the orchestration start
         log_entry(
             self.name,
             "orchestration_start",
-            {"request": request}
-        )
-        
-        # Initial request goes to forenpc
-        result = forenpc.check_llm_command(request,
-            context=getattr(self, 'context', {}),
-            #shared_context=self.shared_context,
-            team = self, 
+            {"request": request, "mode": mode}
         )
-        
-        # Track execution until complete
-        while True:
-            # Save the result
-            completion_prompt= "" 
-            if isinstance(result, dict):
-                self.shared_context["execution_history"].append(result)
-                
-                # Track messages by Guardian
-                if result.get("messages") and result.get("npc_name"):
-                    if result["npc_name"] not in self.shared_context["npc_messages"]:
-                        self.shared_context["npc_messages"][result["npc_name"]] = []
-                    self.shared_context["npc_messages"][result["npc_name"]].extend(
-                        result["messages"]
-                    )
-                
-                completion_prompt += f"""Context:
-                    User request '{request}', previous agent
-                    
-                    previous agent returned:
-                    {result.get('output')}
 
-                    
-                Instructions:
-
-                    Check whether the response is relevant to the user's request.
-
-                """
-                if self.npcs is None or len(self.npcs) == 0:
-                    completion_prompt += f"""
-                    The team has no members, so the forenpc must handle the request alone.
-                    """
-                else:
-                    completion_prompt += f"""
-                    
-                    These are all the members of the team: {', '.join(self.npcs.keys())}
-
-                    Therefore, if you are trying to evaluate whether a request was fulfilled relevantly,
-                    consider that requests are made to the forenpc: {forenpc.name}
-                    and that the forenpc must pass those along to the other npcs. 
-                    """
-                completion_prompt += f"""
-
-                Mainly concern yourself with ensuring there are no
-                glaring errors nor fundamental mishaps in the response.
-                Do not consider stylistic hiccups as the answers being
-                irrelevant. By providing responses back to for the user to
-                comment on, they can can more efficiently iterate and resolve any issues by 
-                prompting more clearly.
-                natural language itself is very fuzzy so there will always be some level
-                of misunderstanding, but as long as the response is clearly relevant 
-                to the input request and along the user's intended direction,
-                it is considered relevant.
-                               
-
-                If there is enough information to begin a fruitful conversation with the user, 
-                please consider the request relevant so that we do not
-                arbritarily stall business logic which is more efficiently
-                determined by iterations than through unnecessary pedantry.
-
-                It is more important to get a response to the user
-                than to account for all edge cases, so as long as the response more or less tackles the
-                initial problem to first order, consider it relevant.
-
-                Return a JSON object with:
-                    -'relevant' with boolean value
-                    -'explanation' for irrelevance with quoted citations in your explanation noting why it is irrelevant to user input must be a single string.
-                Return only the JSON object."""
-            # Check if the result is complete
-            completion_check = npy.llm_funcs.get_llm_response(
-                completion_prompt, 
-                model=forenpc.model,
-                provider=forenpc.provider,
-                api_key=forenpc.api_key,
-                api_url=forenpc.api_url,
-                npc=forenpc,
-                format="json"
-            )
-            # Extract completion status
-            if isinstance(completion_check.get("response"), dict):
-                complete = completion_check["response"].get("relevant", False)
-                explanation = completion_check["response"].get("explanation", "")
+        current_request = request
+        explanation = ""
+        result = {}
+        for iteration in range(max_iterations):
+            if mode == "parallel":
+                result = self._fan_out(current_request, forenpc, deadline, max_workers)
             else:
-                # Default to incomplete if format is wrong
-                complete = False
-                explanation = "Could not determine completion status"
-            
-            #import pdb 
-            #pdb.set_trace()
-            if complete:
-                
-                debrief = npy.llm_funcs.get_llm_response(
-                    f"""Context:
-                    Original request: {request}
-                    Execution history: {self.shared_context['execution_history']}
-
-                    Instructions:
-                    Provide summary of actions taken and recommendations.
-                    Return a JSON object with:
-                    - 'summary': Overview of what was accomplished
-                    - 'recommendations': Suggested next steps
-                    Return only the JSON object.""",
-                    model=forenpc.model,
-                    provider=forenpc.provider,
-                    api_key=forenpc.api_key,
-                    api_url=forenpc.api_url,
-                    npc=forenpc,
-                    format="json"
+                result = forenpc.check_llm_command(current_request,
+                    context=getattr(self, 'context', {}),
+                    #shared_context=self.shared_context,
+                    stream = False,
+                    team = self, 
                 )
-                
-                
+            if not isinstance(result, dict):
+                result = {"output": result}
+            # A fan-out is recorded as its member results, not the combined output
+            for entry in result.get("results") or [result]:
+                self._record_result(entry)
+            history = self.shared_context["execution_history"]
+            if isinstance(history, BoundedHistory):
+                history.summarize()
+
+            if time.monotonic() >= deadline:
+                explanation = f"Stopped after {max_seconds}s without a completion check"
+                break
+
+            complete, explanation = self._check_completion(request, result, forenpc)
+            if complete:
                 return {
-                    "debrief": debrief.get("response"),
+                    "debrief": self._debrief(request, forenpc).get("response"),
                     "output": result.get("output"),
                     "execution_history": self.shared_context["execution_history"],
                 }
-            else:
-                # Continue with updated request
-                updated_request = (
-                    request
-                    + "\n\nThe request has not yet been fully completed. "
-                    + explanation
-                    + "\nPlease address only the remaining parts of the request."
-                )
-                print('updating request', updated_request)
 
-                
-                # Call forenpc again
-                result = forenpc.check_llm_command(
-                    updated_request,
-                    context=getattr(self, 'context', {}),
-                    stream = False,
-                    team = self
-                    
+            # Continue with updated request
+            current_request = (
+                request
+                + "\n\nThe request has not yet been fully completed. "
+                + explanation
+                + "\nPlease address only the remaining parts of the request."
+            )
+            print('updating request', current_request)
+            if time.monotonic() >= deadline:
+                break
+
+        return {
+            "debrief": None,
+            "output": result.get("output"),
+            "execution_history": self.shared_context["execution_history"],
+            "incomplete": explanation or f"Stopped after {max_iterations} iterations",
+        }
+
+    def control_llm_kwargs(self, forenpc):
+        """
+        Model settings for orchestration control calls (routing, relevance, debrief):
+        the team's control-plane model when one is configured, else the forenpc's.
+        """
+        if self.control_model:
+            return {"model": self.control_model, "provider": self.control_provider}
+        return {
+            "model": forenpc.model,
+            "provider": forenpc.provider,
+            "api_key": forenpc.api_key,
+            "api_url": forenpc.api_url,
+        }
+
+    def _record_result(self, result):
+        """Add an agent result to the execution history and per-Guardian messages"""
+        self.shared_context["execution_history"].append(result)
+        
+        # Track messages by Guardian
+        if result.get("messages") and result.get("npc_name"):
+            if result["npc_name"] not in self.shared_context["npc_messages"]:
+                self.shared_context["npc_messages"][result["npc_name"]] = BoundedHistory(
+                    max_items=TEAM_MESSAGES_MAX_ITEMS
                 )
-                
+            self.shared_context["npc_messages"][result["npc_name"]].extend(
+                result["messages"]
+            )
+
+    def _summarize_history(self, summary, evicted):
+        """Summarizer for the execution history that uses the team's control model"""
+        forenpc = self.get_forenpc()
+        if forenpc is None:
+            raise ValueError("No forenpc to summarize the execution history")
+        response = npy.llm_funcs.get_llm_response(
+            f"""Summary so far:
+            {summary}
+
+            New entries:
+            {chr(10).join(_summarize_entry(e, width=1000) for e in evicted)}
+
+            Instructions:
+            Update the summary so far with the new entries. Keep what was done, by whom,
+            and any results or errors that later steps may need, in under 200 words.
+            Return only the updated summary.""",
+            npc=forenpc,
+            **self.control_llm_kwargs(forenpc),
+        )
+        return response.get("response")
+
+    def _check_completion(self, request, result, forenpc):
+        """Ask the forenpc whether result answers request; returns (complete, explanation)"""
+        completion_prompt= "" 
+        completion_prompt += f"""Context:
+            User request '{request}', previous agent
+
+            previous agent returned:
+            {result.get('output')}
+
+
+        Instructions:
+
+            Check whether the response is relevant to the user's request.
+
+        """
+        if self.npcs is None or len(self.npcs) == 0:
+            completion_prompt += f"""
+            The team has no members, so the forenpc must handle the request alone.
+            """
+        else:
+            completion_prompt += f"""
+
+            These are all the members of the team: {', '.join(self.npcs.keys())}
+
+            Therefore, if you are trying to evaluate whether a request was fulfilled relevantly,
+            consider that requests are made to the forenpc: {forenpc.name}
+            and that the forenpc must pass those along to the other npcs. 
+            """
+        completion_prompt += f"""
+
+        Mainly concern yourself with ensuring there are no
+        glaring errors nor fundamental mishaps in the response.
+        Do not consider stylistic hiccups as the answers being
+        irrelevant. By providing responses back to for the user to
+        comment on, they can can more efficiently iterate and resolve any issues by 
+        prompting more clearly.
+        natural language itself is very fuzzy so there will always be some level
+        of misunderstanding, but as long as the response is clearly relevant 
+        to the input request and along the user's intended direction,
+        it is considered relevant.
+
+
+        If there is enough information to begin a fruitful conversation with the user, 
+        please consider the request relevant so that we do not
+        arbritarily stall business logic which is more efficiently
+        determined by iterations than through unnecessary pedantry.
+
+        It is more important to get a response to the user
+        than to account for all edge cases, so as long as the response more or less tackles the
+        initial problem to first order, consider it relevant.
+
+        Return a JSON object with:
+            -'relevant' with boolean value
+            -'explanation' for irrelevance with quoted citations in your explanation noting why it is irrelevant to user input must be a single string.
+        Return only the JSON object."""
+        completion_check = npy.llm_funcs.get_llm_response(
+            completion_prompt, 
+            npc=forenpc,
+            format="json",
+            cache=repeated_call_cache(),
+            **self.control_llm_kwargs(forenpc),
+        )
+        # Extract completion status
+        if isinstance(completion_check.get("response"), dict):
+            return (
+                completion_check["response"].get("relevant", False),
+                completion_check["response"].get("explanation", ""),
+            )
+        # Default to incomplete if format is wrong
+        return False, "Could not determine completion status"
+
+    def _debrief(self, request, forenpc):
+        """Ask the forenpc to summarize the execution history"""
+        debrief = npy.llm_funcs.get_llm_response(
+            f"""Context:
+            Original request: {request}
+            Execution history: {self.shared_context['execution_history']}
+
+            Instructions:
+            Provide summary of actions taken and recommendations.
+            Return a JSON object with:
+            - 'summary': Overview of what was accomplished
+            - 'recommendations': Suggested next steps
+            Return only the JSON object.""",
+            npc=forenpc,
+            format="json",
+            **self.control_llm_kwargs(forenpc),
+        )
+        return debrief
+
+    def _plan_assignments(self, request, forenpc):
+        """Ask the forenpc to split request into (member, sub-request) pairs"""
+        members = "\n".join(
+            f"- {name}: {npc.primary_directive}" for name, npc in self.npcs.items()
+        )
+        plan = npy.llm_funcs.get_llm_response(
+            f"""Context:
+            User request: {request}
+
+            Team members:
+            {members}
+
+            Instructions:
+            Split the request into independent sub-requests and assign each one
+            to the team member best suited for it. Only use the members listed.
+            If a single member can handle the whole request, return one assignment.
+            Return a JSON object with:
+            - 'assignments': a list of objects with 'npc' (member name) and 'request' (the sub-request)
+            Return only the JSON object.""",
+            npc=forenpc,
+            format="json",
+            **self.control_llm_kwargs(forenpc),
+        )
+        response = plan.get("response")
+        assignments = response.get("assignments", []) if isinstance(response, dict) else []
+        return [
+            (self.npcs[item["npc"]], str(item.get("request") or request))
+            for item in assignments
+            if isinstance(item, dict) and item.get("npc") in self.npcs
+        ]
+
+    def _fan_out(self, request, forenpc, deadline, max_workers):
+        """
+        Run the forenpc's assignments concurrently and combine the outputs in
+        assignment order. Members work in parallel with each other; sub-requests
+        assigned to the same member run one after another on it.
+        """
+        assignments = self._plan_assignments(request, forenpc)
+        if not assignments:
+            return forenpc.check_llm_command(
+                request,
+                context=getattr(self, 'context', {}),
+                stream = False,
+                team = self
+            )
+
+        groups = OrderedDict()
+        for index, (npc, sub_request) in enumerate(assignments):
+            groups.setdefault(npc.name, (npc, []))[1].append((index, sub_request))
+
+        context = getattr(self, 'context', {})
+        finished = [None] * len(assignments)
+        pool = ThreadPoolExecutor(max_workers=max(1, min(len(groups), max_workers)))
+        futures = [
+            pool.submit(
+                contextvars.copy_context().run,
+                self._run_member,
+                npc,
+                sub_requests,
+                context,
+                finished,
+            )
+            for npc, sub_requests in groups.values()
+        ]
+        wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+        # Members still running past the deadline are reported as such and left to finish
+        pool.shutdown(wait=False, cancel_futures=True)
+
+        results = [
+            member_result or {
+                "error": "Did not finish before the orchestration time limit",
+                "npc_name": npc.name,
+                "request": sub_request,
+            }
+            for (npc, sub_request), member_result in zip(assignments, finished)
+        ]
+
+        output = "\n\n".join(
+            f"{r['npc_name']}: {r.get('output') if r.get('output') is not None else r.get('error')}"
+            for r in results
+        )
+        return {"output": output, "npc_name": forenpc.name, "results": results}
+
+    def _run_member(self, npc, sub_requests, context, finished):
+        """Run a member's (index, sub-request) pairs in order, storing each result in finished[index]"""
+        for index, sub_request in sub_requests:
+            try:
+                member_result = npc.check_llm_command(sub_request, context=context, stream=False)
+            except Exception as e:
+                member_result = {"error": f"{type(e).__name__}: {e}"}
+            if not isinstance(member_result, dict):
+                member_result = {"output": member_result}
+            finished[index] = {**member_result, "npc_name": npc.name, "request": sub_request}
+
     def to_dict(self):
         """Convert team to dictionary representation"""
         return {
@@ -1258,6 +2114,9 @@ class Pipeline:
         """Fetch data from a database table"""
         db_path = "~/npcsh_history.db"
         try:
+            import pandas as pd
+            from sqlalchemy import create_engine
+
             engine = create_engine(f"sqlite:///{os.path.expanduser(db_path)}")
             df = pd.read_sql(f"SELECT * FROM {table_name}", engine)
             return df.to_json(orient="records")
@@ -1280,11 +2139,20 @@ class Pipeline:
         if num_voting_agents == 0:
             num_voting_agents = 3  # Default
             
+        max_concurrency = step.get("max_concurrency", 8)
+
         # Step 1: Initial Response Generation
-        round_responses = []
-        for _ in range(num_generating_agents):
-            response = npy.llm_funcs.get_llm_response(task, model=model, provider=provider, npc=npc)
-            round_responses.append(response.get("response", ""))
+        # Every agent gets the same task, so opt out of coalescing to get
+        # independent drafts rather than one shared answer
+        responses = npy.llm_funcs.get_llm_responses(
+            [task] * num_generating_agents,
+            model=model,
+            provider=provider,
+            npc=npc,
+            max_concurrency=max_concurrency,
+            coalesce=False,
+        )
+        round_responses = [response.get("response") or "" for response in responses]
             
         # Loop for each round of voting and refining
         for turn in range(1, mixa_turns + 1):
@@ -1295,7 +2163,7 @@ class Pipeline:
                 votes[voted_index] += 1
                 
             # Step 3: Refinement feedback
-            refined_responses = []
+            feedback_prompts = []
             for i, resp in enumerate(round_responses):
                 feedback = (
                     f"Current responses and their votes:\n" + 
@@ -1303,12 +2171,20 @@ class Pipeline:
                              for j, r in enumerate(round_responses)]) +
                     f"\n\nRefine your response #{i+1}: {resp}"
                 )
-                
-                response = npy.llm_funcs.get_llm_response(feedback, model=model, provider=provider, npc=npc)
-                refined_responses.append(response.get("response", ""))
-                
+                feedback_prompts.append(feedback)
+
+            # Refinements are independent within a round, and identical
+            # feedback prompts are coalesced into a single call
+            responses = npy.llm_funcs.get_llm_responses(
+                feedback_prompts,
+                model=model,
+                provider=provider,
+                npc=npc,
+                max_concurrency=max_concurrency,
+            )
+
             # Update responses for next round
-            round_responses = refined_responses
+            round_responses = [response.get("response") or "" for response in responses]
             
         # Final synthesis
         synthesis_prompt = (
@@ -1327,6 +2203,9 @@ class Pipeline:
         try:
             # Fetch data
             db_path = "~/npcsh_history.db"
+            import pandas as pd
+            from sqlalchemy import create_engine
+
             engine = create_engine(f"sqlite:///{os.path.expanduser(db_path)}")
             df = pd.read_sql(f"SELECT * FROM {table_name}", engine)
             
@@ -1342,17 +2221,28 @@ class Pipeline:
                 return response.get("response", "")
             else:
                 # Process each row individually
-                results = []
+                row_tasks = []
                 for _, row in df.iterrows():
                     # Replace source reference with row data
                     row_data = json.dumps(row.to_dict())
                     row_task = task_template.replace(f"{{{{ source('{table_name}') }}}}", row_data)
-                    row_task = self._render_template(row_task, context)
-                    
-                    # Process row
-                    response = npy.llm_funcs.get_llm_response(row_task, model=model, provider=provider, npc=npc)
-                    results.append(response.get("response", ""))
-                    
+                    row_tasks.append(self._render_template(row_task, context))
+
+                # Process rows concurrently, results come back in row order
+                responses = npy.llm_funcs.get_llm_responses(
+                    row_tasks,
+                    model=model,
+                    provider=provider,
+                    npc=npc,
+                    max_concurrency=step.get("max_concurrency", 8),
+                )
+                results = []
+                for response in responses:
+                    if response.get("response") is None and response.get("error"):
+                        results.append(f"Error: {response['error']}")
+                    else:
+                        results.append(response.get("response", ""))
+
                 return results
         except Exception as e:
             print(f"Error processing data source {table_name}: {e}")
@@ -1360,6 +2250,115 @@ class Pipeline:
 
 
 
+COMPILED_NPCS_DB = os.environ.get("NPCSH_COMPILED_NPCS_DB", "~/npcsh_history.db")
+_compiled_npcs_initialized = set()
+
+
+def compute_source_signature(paths, registry=None):
+    """[path, mtime_ns, size] for each file a compiled Guardian was built from, or None if one is missing"""
+    registry = registry or get_file_registry()
+    signature = []
+    for path in sorted(paths):
+        stat = registry.signature(path)
+        if stat is None:
+            return None
+        signature.append([path, *stat])
+    return signature
+
+
+def load_compiled_npc(source_path, source_signature, db_path=None):
+    """Compiled content stored for source_path, or None if missing or built from other sources"""
+    db_path = os.path.expanduser(db_path or COMPILED_NPCS_DB)
+    if not os.path.exists(db_path):
+        return None
+    try:
+        with sqlite3.connect(db_path) as conn:
+            row = conn.execute(
+                "SELECT compiled_content FROM compiled_npcs WHERE source_path = ? ORDER BY timestamp DESC LIMIT 1",
+                (source_path,),
+            ).fetchone()
+        compiled = json.loads(row[0]) if row else None
+    except (sqlite3.Error, ValueError):
+        return None
+    if not compiled or compiled.get("source_signature") != source_signature:
+        return None
+    return compiled
+
+
+def save_compiled_npc(name, source_path, compiled, db_path=None):
+    """
+    Stores compiled Guardian content, replacing the previous entry for the same
+    source_path. Only Guardians are compiled: a team's .ctx file is still parsed,
+    while its members and the jinxs beside them come from their compiled records.
+    """
+    db_path = os.path.expanduser(db_path or COMPILED_NPCS_DB)
+    try:
+        if db_path not in _compiled_npcs_initialized:
+            init_db_tables(db_path)
+            _compiled_npcs_initialized.add(db_path)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(
+                """
+                INSERT INTO compiled_npcs (name, source_path, compiled_content, timestamp)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(source_path) DO UPDATE SET
+                    name = excluded.name,
+                    compiled_content = excluded.compiled_content,
+                    timestamp = excluded.timestamp
+                """,
+                (name, source_path, json.dumps(compiled, default=str)),
+            )
+            conn.commit()
+    except sqlite3.Error as e:
+        print(f"Could not store compiled Guardian {name}: {e}")
+
+
+JINX_CACHE_DB = os.environ.get("NPCSH_JINX_CACHE_DB", "~/npcsh_history.db")
+_jinx_cache_initialized = set()
+
+
+def load_cached_jinx_result(cache_key, db_path=None):
+    """Cached {output, llm_response} for cache_key, or None if missing or expired"""
+    db_path = os.path.expanduser(db_path or JINX_CACHE_DB)
+    if not os.path.exists(db_path):
+        return None
+    try:
+        with sqlite3.connect(db_path) as conn:
+            row = conn.execute(
+                "SELECT result, expires_at FROM jinx_result_cache WHERE cache_key = ?",
+                (cache_key,),
+            ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return json.loads(row[0])
+    except (sqlite3.Error, ValueError):
+        return None
+
+
+def save_cached_jinx_result(jinx_name, cache_key, result, ttl=None, db_path=None):
+    """Stores a jinx result; results that are not JSON-serializable are not cached"""
+    try:
+        payload = json.dumps(result)
+    except (TypeError, ValueError):
+        return
+    db_path = os.path.expanduser(db_path or JINX_CACHE_DB)
+    try:
+        if db_path not in _jinx_cache_initialized:
+            init_db_tables(db_path)
+            _jinx_cache_initialized.add(db_path)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO jinx_result_cache (cache_key, jinx_name, result, expires_at, timestamp)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                """,
+                (cache_key, jinx_name, payload, time.time() + ttl if ttl is not None else None),
+            )
+            conn.commit()
+    except sqlite3.Error as e:
+        print(f"Could not cache result of jinx {jinx_name}: {e}")
+
+
 def log_entry(entity_id, entry_type, content, metadata=None, db_path="~/npcsh_history.db"):
     """Log an entry for an Guardian or team"""
     db_path = os.path.expanduser(db_path)
@@ -1506,6 +2505,55 @@ def execute_jinx_command(
 
 
 
+def parse_jinx_arguments(command: str, jinx: Jinx) -> Dict[str, Any]:
+    """
+    Inputs that can be read without a model from a command addressed to the
+    jinx (`name ...` or `/name ...`): `key=value` pairs and `--key value` flags
+    naming its inputs, and leading positional words, which go to the first input
+    not otherwise given. A value is one shell word, so values with spaces must
+    be quoted. Returns {} unless every required input is filled unambiguously;
+    defaults are not filled in.
+    """
+    import shlex
+
+    try:
+        args = shlex.split(command)
+    except ValueError:
+        return {}
+    if not args or args[0].lstrip("/") != jinx.jinx_name:
+        return {}
+    args = args[1:]
+    names = [inp if isinstance(inp, str) else list(inp.keys())[0] for inp in jinx.inputs]
+
+    inputs = {}
+    positional = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        key, sep, value = arg.partition("=")
+        if sep and key.lstrip("-") in names:
+            inputs[key.lstrip("-")] = value
+        elif arg.startswith("--") and arg[2:] in names and i + 1 < len(args):
+            inputs[arg[2:]] = args[i + 1]
+            i += 1
+        elif inputs:
+            # Unquoted words after a named value, e.g. `query=SELECT * FROM t`
+            return {}
+        else:
+            positional.append(arg)
+        i += 1
+
+    if positional:
+        remaining = [name for name in names if name not in inputs]
+        if not remaining:
+            return {}
+        inputs[remaining[0]] = " ".join(positional)
+    required = [inp for inp in jinx.inputs if not isinstance(inp, dict)]
+    if any(inputs.get(name) in (None, "") for name in required):
+        return {}
+    return inputs
+
+
 def extract_jinx_inputs(args: List[str], jinx: Jinx) -> Dict[str, Any]:
     inputs = {}
 
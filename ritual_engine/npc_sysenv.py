@@ -1,4 +1,5 @@
 from datetime import datetime
+from functools import lru_cache
 from dotenv import load_dotenv
 import logging
 import re
@@ -32,16 +33,6 @@ except ImportError:
     readline = None
     print('no readline support, some features may not work as desired.')
 
-# Try/except for rich imports
-try:
-    from rich.console import Console
-    from rich.markdown import Markdown
-    from rich.syntax import Syntax
-except ImportError:
-    Console = None
-    Markdown = None
-    Syntax = None
-
 import warnings
 import time
 
@@ -221,6 +212,10 @@ def render_markdown(text: str) -> None:
     """
     Renders markdown text, but handles code blocks as plain syntax-highlighted text.
     """
+    from rich.console import Console
+    from rich.markdown import Markdown
+    from rich.syntax import Syntax
+
     lines = text.split("\n")
     console = Console()
 
@@ -344,12 +339,48 @@ def init_db_tables(db_path="~/npcsh_history.db"):
         conn.execute("""
             CREATE TABLE IF NOT EXISTS compiled_npcs (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE,
-                source_path TEXT,
+                name TEXT,
+                source_path TEXT UNIQUE,
                 compiled_content TEXT,
                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        # Tables created before compiled Guardians were keyed on source_path
+        # have name UNIQUE instead; rebuild them, keeping the newest row per path
+        unique_columns = set()
+        for index in conn.execute("PRAGMA index_list(compiled_npcs)").fetchall():
+            if index[2]:
+                unique_columns.update(
+                    row[2] for row in conn.execute(f"PRAGMA index_info('{index[1]}')").fetchall()
+                )
+        if "source_path" not in unique_columns:
+            conn.execute("ALTER TABLE compiled_npcs RENAME TO compiled_npcs_old")
+            conn.execute("""
+                CREATE TABLE compiled_npcs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT,
+                    source_path TEXT UNIQUE,
+                    compiled_content TEXT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute("""
+                INSERT OR REPLACE INTO compiled_npcs (name, source_path, compiled_content, timestamp)
+                SELECT name, source_path, compiled_content, timestamp FROM compiled_npcs_old
+                ORDER BY timestamp, id
+            """)
+            conn.execute("DROP TABLE compiled_npcs_old")
+
+        # Results of jinxs that declare `cache:`, keyed by jinx source and inputs
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jinx_result_cache (
+                cache_key TEXT PRIMARY KEY,
+                jinx_name TEXT,
+                result TEXT,
+                expires_at REAL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
         
         conn.commit()
 
@@ -514,18 +545,20 @@ def print_and_process_stream(response, model, provider):
                 
     return conversation_result   
                  
-def get_system_message(npc) -> str:
-    """
-    Function Description:
-        This function generates a system message for the Guardian.
-    Args:
-        npc (Any): The Guardian object.
-    Keyword Args:
-        None
-    Returns:
-        str: The system message for the Guardian.
-    """
+# The date and time close the newest user turn rather than the system message,
+# so the system message and the history before that turn stay byte-identical
+# across requests and can be served from provider prompt caches.
+VOLATILE_CONTEXT_MARKER = "\n    The current date and time are : "
+_VOLATILE_CONTEXT = re.compile(re.escape(VOLATILE_CONTEXT_MARKER) + r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}\n?")
+
+# Providers that take explicit cache_control markers on message content blocks.
+# OpenAI and deepseek cache stable prefixes automatically; ollama reuses its KV
+# cache for an unchanged prefix.
+PROMPT_CACHE_PROVIDERS = {"anthropic"}
+
 
+@lru_cache(maxsize=256)
+def _system_message_prefix(name, primary_directive, tables) -> str:
     system_message = f"""
     .
     ..
@@ -540,14 +573,10 @@ def get_system_message(npc) -> str:
     Hello!
     Welcome to the team.
     You are an Guardian working as part of our team.
-    You are the {npc.name} Guardian with the following primary directive: {npc.primary_directive}.
-    Users may refer to you by your assistant name, {npc.name} and you should
+    You are the {name} Guardian with the following primary directive: {primary_directive}.
+    Users may refer to you by your assistant name, {name} and you should
     consider this to be your core identity.
 
-    The current date and time are : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-
-
     If you ever need to produce markdown texts for the user, please do so
     with less than 80 characters width for each line.
     """
@@ -562,15 +591,101 @@ def get_system_message(npc) -> str:
                         They understand that you can view them multimodally.
                         You only need to answer the user's request based on the attached image(s).
                         """
-    if npc.tables is not None:
+    if tables is not None:
         system_message += f'''
         
             Here is information abuot the attached npcsh_history database that you can use to write queries if needed
-            {npc.tables}
+            {tables}
         '''
     return system_message
 
 
+def get_system_message_prefix(npc) -> str:
+    """
+    Function Description:
+        Returns the stable part of the Guardian's system message (identity,
+        directive, table schema). It is memoized per Guardian definition.
+    Args:
+        npc (Any): The Guardian object.
+    Returns:
+        str: The system message prefix.
+    """
+    tables = str(npc.tables) if npc.tables is not None else None
+    return _system_message_prefix(npc.name, npc.primary_directive, tables)
+
+
+def get_system_message(npc) -> str:
+    """
+    Function Description:
+        This function generates a system message for the Guardian.
+    Args:
+        npc (Any): The Guardian object.
+    Keyword Args:
+        None
+    Returns:
+        str: The system message for the Guardian. It is the memoized stable
+        prefix; the date and time are added to the user turn instead (see
+        get_volatile_context).
+    """
+    return get_system_message_prefix(npc)
+
+
+def get_volatile_context() -> str:
+    """
+    Function Description:
+        Returns the current date and time line appended to the newest user turn.
+    Returns:
+        str: The volatile context line.
+    """
+    return VOLATILE_CONTEXT_MARKER + datetime.now().strftime('%Y-%m-%d %H:%M') + "\n"
+
+
+def strip_volatile_context(messages: List[Dict]) -> List[Dict]:
+    """
+    Function Description:
+        Returns a copy of messages without the date and time lines, for building
+        request keys that stay equal across minutes.
+    Args:
+        messages (List[Dict]): Chat messages.
+    Returns:
+        List[Dict]: Messages with the volatile context removed.
+    """
+    stripped = []
+    for message in messages or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str) and VOLATILE_CONTEXT_MARKER in content:
+            message = {**message, "content": _VOLATILE_CONTEXT.sub("", content)}
+        elif isinstance(content, list):
+            message = {**message, "content": [
+                {**block, "text": _VOLATILE_CONTEXT.sub("", block["text"])}
+                if isinstance(block, dict) and isinstance(block.get("text"), str) else block
+                for block in content
+            ]}
+        stripped.append(message)
+    return stripped
+
+
+def add_prompt_cache_markers(messages: List[Dict]) -> List[Dict]:
+    """
+    Function Description:
+        Returns a copy of messages where each string system message becomes a
+        content block carrying an ephemeral cache_control marker.
+    Args:
+        messages (List[Dict]): Chat messages.
+    Returns:
+        List[Dict]: Messages to send to a provider in PROMPT_CACHE_PROVIDERS.
+    """
+    marked = []
+    for message in messages:
+        content = message.get("content")
+        if message.get("role") != "system" or not isinstance(content, str) or not content:
+            marked.append(message)
+            continue
+        blocks = [{"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}]
+        marked.append({**message, "content": blocks})
+    return marked
+
+
 
 # Load environment variables from .env file
 def load_env_from_execution_dir() -> None:
@@ -646,9 +761,36 @@ def lookup_provider(model: str) -> str:
 
 
 
-load_env_from_execution_dir()
-deepseek_api_key = os.getenv("DEEPSEEK_API_KEY", None)
-gemini_api_key = os.getenv("GEMINI_API_KEY", None)
+_env_loaded = False
+
 
-anthropic_api_key = os.getenv("ANTHROPIC_API_KEY", None)
-openai_api_key = os.getenv("OPENAI_API_KEY", None)
+def ensure_env_loaded() -> None:
+    """
+    Function Description:
+        Loads the execution directory's .env file once, on the first LLM call
+        rather than at import time.
+    Args:
+        None
+    Returns:
+        None
+    """
+    global _env_loaded
+    if not _env_loaded:
+        _env_loaded = True
+        load_env_from_execution_dir()
+
+
+_API_KEY_ENV_VARS = {
+    "deepseek_api_key": "DEEPSEEK_API_KEY",
+    "gemini_api_key": "GEMINI_API_KEY",
+    "anthropic_api_key": "ANTHROPIC_API_KEY",
+    "openai_api_key": "OPENAI_API_KEY",
+}
+
+
+def __getattr__(name):
+    # The *_api_key names were read at import time; resolve them on access instead
+    if name in _API_KEY_ENV_VARS:
+        ensure_env_loaded()
+        return os.getenv(_API_KEY_ENV_VARS[name], None)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
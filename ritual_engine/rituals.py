@@ -1,23 +1,46 @@
-from ritual_engine.npc_compiler import Guardian
-import os 
-from sqlalchemy import create_engine
+import importlib
+import os
+import pathlib
+import threading
 
 sibiji_path = os.path.expanduser("~/.npcsh/npc_team/sibiji.npc")
 
-if os.path.exists(os.path.expanduser('~/npcsh_history.db')):
-    db = create_engine("sqlite:///"+os.path.expanduser('~/npcsh_history.db'))
-else: 
-    db = None
-try:
-    if not os.path.exists(sibiji_path):
-        sibiji_path = __file__.getparent() / "npc_team/sibiji.npc"
-    sibiji = Guardian(file = sibiji_path, db_conn = db)
-        
-except Exception as e:
-    print(f"Error finding sibiji.npc: {e}")
-    sibiji = Guardian(primary_directive='You are sibiji, the master planner for all Guardians and genius of the Guardian team', 
-                 model='llama3.2', 
-                 provider='ollama', )
-    
+_sibiji = None
+_sibiji_lock = threading.Lock()
 
 
+def get_sibiji():
+    """Builds the sibiji planner Guardian on first use, attached to ~/npcsh_history.db when it exists."""
+    global _sibiji
+    with _sibiji_lock:
+        if _sibiji is not None:
+            return _sibiji
+        from sqlalchemy import create_engine
+        from ritual_engine.npc_compiler import Guardian
+
+        if os.path.exists(os.path.expanduser('~/npcsh_history.db')):
+            db = create_engine("sqlite:///"+os.path.expanduser('~/npcsh_history.db'))
+        else:
+            db = None
+        path = sibiji_path
+        try:
+            if not os.path.exists(path):
+                path = pathlib.Path(__file__).parent / "npc_team/sibiji.npc"
+            _sibiji = Guardian(file = str(path), db_conn = db)
+        except Exception as e:
+            print(f"Error finding sibiji.npc: {e}")
+            _sibiji = Guardian(primary_directive='You are sibiji, the master planner for all Guardians and genius of the Guardian team',
+                         model='llama3.2',
+                         provider='ollama', )
+        return _sibiji
+
+
+def __getattr__(name):
+    # `sibiji` and `llm_funcs` used to be created at import time; build them on first access
+    if name == "sibiji":
+        return get_sibiji()
+    if name == "llm_funcs":
+        module = importlib.import_module("ritual_engine.llm_funcs")
+        globals()["llm_funcs"] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
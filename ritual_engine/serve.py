@@ -19,11 +19,12 @@ from PIL import ImageFile
 from io import BytesIO
 
 from ritual_engine.npc_sysenv import get_locally_available_models
+from ritual_engine.gen.context_window import get_context_window_manager
 from ritual_engine.vault.command_history import (
     CommandHistory,
     save_conversation_message,
 )
-from ritual_engine.npc_compiler import  Jinx, Guardian
+from ritual_engine.npc_compiler import  Jinx, Guardian, GuardianPool
 
 from ritual_engine.codex import (
     get_llm_response, check_llm_command
@@ -46,6 +47,11 @@ user_npc_directory = os.path.expanduser("~/.npcsh/npc_team")
 # instead of a static path relative to server launch directory
 
 
+# Shared across request threads so per-message token counts are computed once
+context_window = get_context_window_manager()
+# Parsed Guardians reused across requests; each request gets its own fork
+guardian_pool = GuardianPool(db_path)
+
 # --- NEW: Global dictionary to track stream cancellation requests ---
 cancellation_flags = {}
 cancellation_lock = threading.Lock()
@@ -189,8 +195,7 @@ def load_npc_by_name_and_source(name, source, db_conn=None, current_path=None):
     
     if os.path.exists(npc_path):
         try:
-            npc = Guardian(file=npc_path, db_conn=db_conn)
-            return npc
+            return guardian_pool.get(npc_path, db_conn=db_conn)
         except Exception as e:
             print(f"Error loading Guardian {name} from {source}: {str(e)}")
             return None
@@ -203,7 +208,7 @@ def fetch_messages_for_conversation(conversation_id):
     cursor = conn.cursor()
 
     query = """
-        SELECT role, content, timestamp
+        SELECT message_id, role, content, timestamp
         FROM conversation_history
         WHERE conversation_id = ?
         ORDER BY timestamp ASC
@@ -214,6 +219,7 @@ def fetch_messages_for_conversation(conversation_id):
 
     return [
         {
+            "message_id": message["message_id"],
             "role": message["role"],
             "content": message["content"],
             "timestamp": message["timestamp"],
@@ -914,6 +920,8 @@ def stream():
         messages[0]['content'] = npc_object.get_system_prompt()
     if npc_object is not None and messages and messages[0]['role'] == 'system':
         messages[0]['content'] = npc_object.get_system_prompt()
+    # Keep long conversations inside the model's context window
+    messages = context_window.fit(messages, model=model)
 
     message_id = command_history.generate_message_id()
     save_conversation_message(
@@ -1094,6 +1102,8 @@ def execute():
         messages[0]['content'] = npc_object.get_system_prompt()
     if npc_object is not None and messages and messages[0]['role'] == 'system':
         messages[0]['content'] = npc_object.get_system_prompt()
+    # Keep long conversations inside the model's context window
+    messages = context_window.fit(messages, model=model)
 
     message_id = command_history.generate_message_id()
     save_conversation_message(
@@ -1413,7 +1423,7 @@ def fetch_messages_for_conversation(conversation_id):
     cursor = conn.cursor()
 
     query = """
-        SELECT role, content, timestamp
+        SELECT message_id, role, content, timestamp
         FROM conversation_history
         WHERE conversation_id = ?
         ORDER BY timestamp ASC
@@ -1424,6 +1434,7 @@ def fetch_messages_for_conversation(conversation_id):
 
     return [
         {
+            "message_id": message["message_id"],
             "role": message["role"],
             "content": message["content"],
             "timestamp": message["timestamp"],
@@ -1,24 +1,30 @@
 import os
 import sqlite3
+import sys
 import json
 from datetime import datetime
 import uuid
 from typing import Optional, List, Dict, Any, Tuple, Union
-import pandas as pd
-import numpy as np
-
-try:
-    import sqlalchemy
-    from sqlalchemy import create_engine, text
-    from sqlalchemy.engine import Engine, Connection as SQLAlchemyConnection
-    from sqlalchemy.exc import SQLAlchemyError
-    _HAS_SQLALCHEMY = True
-except ImportError:
-    _HAS_SQLALCHEMY = False
-    Engine = type(None) # Define dummy types if sqlalchemy not installed
-    SQLAlchemyConnection = type(None)
-    create_engine = None
-    text = None
+
+# sqlalchemy is only needed when CommandHistory is handed an Engine, in which
+# case the caller has already imported it; it is not loaded at import time.
+
+
+def text(sql):
+    from sqlalchemy import text as sqlalchemy_text
+    return sqlalchemy_text(sql)
+
+
+def _sqlalchemy_errors() -> tuple:
+    """(SQLAlchemyError,) once sqlalchemy is loaded, else () since nothing can raise it."""
+    exc = sys.modules.get("sqlalchemy.exc")
+    return (exc.SQLAlchemyError,) if exc is not None else ()
+
+
+def _is_sqlalchemy_engine(db) -> bool:
+    engine = sys.modules.get("sqlalchemy.engine")
+    return engine is not None and isinstance(db, engine.Engine)
+
 
 def flush_messages(n: int, messages: list) -> dict:
     if n <= 0:
@@ -117,16 +123,6 @@ def query_history_for_llm(command_history, query):
     return "\n\n".join(formatted_results)
 
 
-try:
-    import chromadb
-except ModuleNotFoundError:
-    print("chromadb not installed")
-except OSError as e:
-    print('os error importing chromadb:', e)
-except NameError as e:
-    print('name error importing chromadb:', e)
-    chromadb = None
-import numpy as np
 import os
 from typing import Optional, Dict, List, Union, Tuple
 
@@ -137,6 +133,9 @@ def setup_chroma_db(collection, description='', db_path: str= ''):
         db_path = os.path.expanduser('~/npcsh_chroma_db')
         
     try:
+        # chromadb is slow to import, so it is loaded on first use
+        import chromadb
+
         # Create or connect to Chroma client with persistent storage
         client = chromadb.PersistentClient(path=db_path)
 
@@ -159,8 +158,20 @@ def setup_chroma_db(collection, description='', db_path: str= ''):
         raise
 
 
+def _named_params(sql, params):
+    """Rewrites ? placeholders and tuple params as :param_N names and a dict for SQLAlchemy"""
+    if not params or not isinstance(params, tuple):
+        return sql, params
+    dict_params = {}
+    for i, value in enumerate(params):
+        param_name = f"param_{i}"
+        sql = sql.replace('?', f":{param_name}", 1)
+        dict_params[param_name] = value
+    return sql, dict_params
+
+
 class CommandHistory:
-    def __init__(self, db: Union[str, sqlite3.Connection, Engine] = "~/npcsh_history.db"):
+    def __init__(self, db: Union[str, sqlite3.Connection, "Engine"] = "~/npcsh_history.db"):
 
         self._is_sqlalchemy = False
         self.cursor = None
@@ -194,7 +205,7 @@ class CommandHistory:
                 print(f"Warning: Could not set PRAGMA foreign_keys on provided sqlite3 connection: {e}")
 
 
-        elif _HAS_SQLALCHEMY and isinstance(db, Engine):
+        elif _is_sqlalchemy_engine(db):
             self.db_path = str(db.url)
             self.conn = db
             self._is_sqlalchemy = True
@@ -223,7 +234,7 @@ class CommandHistory:
                     with connection.begin():
                         if requires_fk and self.conn.url.drivername == 'sqlite':
                              try: connection.execute(text("PRAGMA foreign_keys=ON"))
-                             except SQLAlchemyError as e: print(f"Warning: SQLAlchemy PRAGMA foreign_keys=ON failed: {e}")
+                             except _sqlalchemy_errors() as e: print(f"Warning: SQLAlchemy PRAGMA foreign_keys=ON failed: {e}")
 
                         if script:
                              statements = [s.strip() for s in sql.split(';') if s.strip()]
@@ -231,6 +242,7 @@ class CommandHistory:
                                   result_proxy = connection.execute(text(statement))
                                   if result_proxy.lastrowid is not None: last_row_id = result_proxy.lastrowid
                         else:
+                             sql, params = _named_params(sql, params)
                              result_proxy = connection.execute(text(sql), params or {})
                              if result_proxy.lastrowid is not None: last_row_id = result_proxy.lastrowid
             else:
@@ -244,7 +256,7 @@ class CommandHistory:
 
             return last_row_id
 
-        except (sqlite3.Error, SQLAlchemyError) as e:
+        except (sqlite3.Error, *_sqlalchemy_errors()) as e:
              error_type = "SQLAlchemy" if self._is_sqlalchemy else "SQLite"
              print(f"{error_type} Error executing: {sql[:100]}... Error: {e}")
              if not self._is_sqlalchemy:
@@ -263,6 +275,7 @@ class CommandHistory:
             if self._is_sqlalchemy:
                  with self.conn.connect() as connection:
                       # No need for transaction for SELECT
+                      sql, params = _named_params(sql, params)
                       result = connection.execute(text(sql), params or {})
                       row = result.fetchone()
                       return dict(row._mapping) if row else None
@@ -270,7 +283,7 @@ class CommandHistory:
                  self.cursor.execute(sql, params or ())
                  row = self.cursor.fetchone()
                  return dict(row) if row else None
-        except (sqlite3.Error, SQLAlchemyError) as e:
+        except (sqlite3.Error, *_sqlalchemy_errors()) as e:
              error_type = "SQLAlchemy" if self._is_sqlalchemy else "SQLite"
              print(f"{error_type} Error fetching one: {sql[:100]}... Error: {e}")
              return None # Return None on error
@@ -283,24 +296,7 @@ class CommandHistory:
         try:
             if self._is_sqlalchemy:
                 with self.conn.connect() as connection:
-                    # Convert tuple params to a dictionary format for SQLAlchemy
-                    if params and isinstance(params, tuple):
-                        # Extract parameter placeholders from SQL
-                        placeholders = []
-                        for i, char in enumerate(sql):
-                            if char == '?':
-                                placeholders.append(i)
-                        
-                        # Convert tuple params to dict format
-                        dict_params = {}
-                        for i, value in enumerate(params):
-                            param_name = f"param_{i}"
-                            # Replace ? with :param_name in SQL
-                            sql = sql.replace('?', f":{param_name}", 1)
-                            dict_params[param_name] = value
-                        
-                        params = dict_params
-                    
+                    sql, params = _named_params(sql, params)
                     result = connection.execute(text(sql), params or {})
                     rows = result.fetchall()
                     return [dict(row._mapping) for row in rows]
@@ -308,7 +304,7 @@ class CommandHistory:
                 self.cursor.execute(sql, params or ())
                 rows = self.cursor.fetchall()
                 return [dict(row) for row in rows]
-        except (sqlite3.Error, SQLAlchemyError) as e:
+        except (sqlite3.Error, *_sqlalchemy_errors()) as e:
             error_type = "SQLAlchemy" if self._is_sqlalchemy else "SQLite"
             print(f"{error_type} Error fetching all: {sql[:100]}... Error: {e}")
             return [] # Return empty list on error
@@ -350,11 +346,17 @@ class CommandHistory:
             response_message_id TEXT, conversation_id TEXT NOT NULL, timestamp TEXT NOT NULL,
             npc_name TEXT, team_name TEXT, jinx_name TEXT NOT NULL, jinx_inputs TEXT,
             jinx_output TEXT, status TEXT NOT NULL, error_message TEXT, duration_ms INTEGER,
+            cache_hit INTEGER DEFAULT 0,
             FOREIGN KEY (triggering_message_id) REFERENCES conversation_history(message_id) ON DELETE CASCADE,
             FOREIGN KEY (response_message_id) REFERENCES conversation_history(message_id) ON DELETE SET NULL
         );
         '''
         self._execute(table_query, requires_fk=True)
+        # Logs created before cache_hit was recorded
+        if not self._is_sqlalchemy or self.conn.url.drivername == 'sqlite':
+            columns = [row["name"] for row in self._fetch_all("PRAGMA table_info(jinx_execution_log)")]
+            if columns and "cache_hit" not in columns:
+                self._execute("ALTER TABLE jinx_execution_log ADD COLUMN cache_hit INTEGER DEFAULT 0")
 
         index_queries = [
             "CREATE INDEX IF NOT EXISTS idx_jinx_log_trigger_msg ON jinx_execution_log (triggering_message_id);",
@@ -427,7 +429,8 @@ class CommandHistory:
         self, triggering_message_id: str, conversation_id: str, npc_name: Optional[str],
         jinx_name: str, jinx_inputs: Dict, jinx_output: Any, status: str,
         team_name: Optional[str] = None, error_message: Optional[str] = None,
-        response_message_id: Optional[str] = None, duration_ms: Optional[int] = None
+        response_message_id: Optional[str] = None, duration_ms: Optional[int] = None,
+        cache_hit: bool = False,
     ):
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         try: inputs_json = json.dumps(jinx_inputs, cls=CustomJSONEncoder)
@@ -440,10 +443,11 @@ class CommandHistory:
 
         sql = """INSERT INTO jinx_execution_log
             (triggering_message_id, conversation_id, timestamp, npc_name, team_name,
-             jinx_name, jinx_inputs, jinx_output, status, error_message, response_message_id, duration_ms)
-             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+             jinx_name, jinx_inputs, jinx_output, status, error_message, response_message_id, duration_ms, cache_hit)
+             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
         params = (triggering_message_id, conversation_id, timestamp, npc_name, team_name,
-                  jinx_name, inputs_json, outputs_json, status, error_message, response_message_id, duration_ms)
+                  jinx_name, inputs_json, outputs_json, status, error_message, response_message_id, duration_ms,
+                  int(bool(cache_hit)))
         try:
              return self._execute(sql, params) # Return lastrowid if available
         except Exception as e:
@@ -537,7 +541,9 @@ class CommandHistory:
              if attachments: message_dict["attachments"] = attachments
         return results
 
-    def get_npc_conversation_stats(self, start_date=None, end_date=None) -> pd.DataFrame:
+    def get_npc_conversation_stats(self, start_date=None, end_date=None) -> "pd.DataFrame":
+        import pandas as pd
+
         date_filter = ""
         params = {} # Use dict for named parameters with SQLAlchemy/read_sql
         if start_date and end_date:
@@ -587,7 +593,9 @@ class CommandHistory:
              ])
 
 
-    def get_command_patterns(self, timeframe='day') -> pd.DataFrame:
+    def get_command_patterns(self, timeframe='day') -> "pd.DataFrame":
+        import pandas as pd
+
         time_group_formats = {
             'hour': "strftime('%Y-%m-%d %H', timestamp)",
             'day': "strftime('%Y-%m-%d', timestamp)",
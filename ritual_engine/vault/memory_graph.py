@@ -11,7 +11,10 @@ except ModuleNotFoundError:
 from typing import Optional, Dict, List, Union, Tuple, Any, Set
 
 
-from ritual_engine.llm_funcs import get_llm_response
+from ritual_engine.llm_funcs import get_llm_response, get_llm_responses
+from ritual_engine.gen.cache import repeated_call_cache
+from ritual_engine.gen.json_stream import iter_json_stream
+from ritual_engine.gen.response import iter_stream_text
 from ritual_engine.npc_compiler import Guardian
 import sqlite3
 
@@ -133,15 +136,8 @@ def init_db(db_path: str, drop=False):
         print(f"Fatal error initializing database: {str(e)}")
         traceback.print_exc()
         return None
-def extract_facts(
-    text: str,
-    model: str,
-    provider: str,
-    npc: Guardian = None,
-    context: str = ""
-) -> List[str]:
-    """Extract concise facts from text using LLM (as defined earlier)"""
-    # Implementation from your previous code
+def _fact_extraction_prompt(text: str, context: str = "") -> str:
+    """Build the fact extraction prompt shared by extract_facts and iter_facts"""
     prompt = """Extract concise facts from this text.
         A fact is a piece of information that makes a statement about the world.
         A fact is typically a sentence that is true or false.
@@ -218,17 +214,49 @@ def extract_facts(
     Return only the JSON object.
     Do not include any additional markdown formatting.
     """
+    return prompt + f"HERE BEGINS THE TEXT TO INVESTIGATE:\n\nText: {text}"
+
 
+def extract_facts(
+    text: str,
+    model: str,
+    provider: str,
+    npc: Guardian = None,
+    context: str = ""
+) -> List[str]:
+    """Extract concise facts from text using LLM (as defined earlier)"""
     response = get_llm_response(
-        prompt + f"HERE BEGINS THE TEXT TO INVESTIGATE:\n\nText: {text}",
+        _fact_extraction_prompt(text, context),
         model=model,
         provider=provider,
         format="json",
+        cache=repeated_call_cache(),
     )
     response = response["response"]
     return response.get("fact_list", [])
 
 
+def iter_facts(
+    text: str,
+    model: str,
+    provider: str,
+    npc: Guardian = None,
+    context: str = ""
+):
+    """Streaming variant of extract_facts that yields each fact as soon as the
+    model has finished writing it, so downstream work can start before the
+    response is complete."""
+    response = get_llm_response(
+        _fact_extraction_prompt(text, context),
+        model=model,
+        provider=provider,
+        format="json",
+        stream=True,
+    )
+    for _, fact in iter_json_stream(iter_stream_text(response["response"]), path=("fact_list",)):
+        yield fact
+
+
 # --- Breathe (Context Condensation) ---
 def breathe(
     messages: List[Dict[str, str]],
@@ -303,7 +331,8 @@ def generate_group_candidates(
 ) -> List[str]:
     """Generate candidate groups for items (facts or groups) based on core semantic meaning."""
     all_candidates = []
-    
+    prompts = []
+
     for pass_num in range(n_passes):
         if len(items) > subset_size:
             item_subset = random.sample(items, min(subset_size, len(items)))
@@ -338,17 +367,23 @@ def generate_group_candidates(
         }}
         """
         # --- END PROMPT MODIFICATION ---
-        
-        response = get_llm_response(
-            prompt,
-            model=model,
-            provider=provider,
-            format="json",
-            npc=npc,
-        )
-        
-        candidates = response["response"].get("groups", [])
-        all_candidates.extend(candidates)
+        prompts.append(prompt)
+
+    # The passes are independent, so send them concurrently. With few items
+    # every pass sends the same prompt, so opt out of coalescing to keep
+    # independent samples.
+    responses = get_llm_responses(
+        prompts,
+        model=model,
+        provider=provider,
+        format="json",
+        npc=npc,
+        coalesce=False,
+    )
+    for response in responses:
+        if isinstance(response.get("response"), dict):
+            candidates = response["response"].get("groups", [])
+            all_candidates.extend(candidates)
     print(all_candidates)
     return list(set(all_candidates))
 
@@ -1,6 +1,6 @@
 from ritual_engine.data.load import load_file_contents
 from ritual_engine.data.web import search_web
-from ritual_engine.memory.command_history import setup_chroma_db
+from ritual_engine.vault.command_history import setup_chroma_db
 from ritual_engine.gen.embeddings import get_ollama_embeddings
 from ritual_engine.llm_funcs import get_llm_response
 from ritual_engine.npc_sysenv import render_markdown
@@ -0,0 +1,301 @@
+import atexit
+import importlib
+import multiprocessing
+import os
+import pickle
+import queue
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+DEFAULT_PRELOAD = ("numpy", "pandas", "matplotlib.pyplot")
+
+
+class PythonWorkerError(RuntimeError):
+    """A python step failed in a worker; the message carries the worker's traceback."""
+
+
+def _pickle_values(values: Dict[str, Any]) -> Dict[str, bytes]:
+    """Pickles each value on its own, dropping the ones that cannot cross a process boundary."""
+    packed = {}
+    for key, value in values.items():
+        if key.startswith("__"):
+            continue
+        try:
+            packed[key] = pickle.dumps(value)
+        except Exception:
+            continue
+    return packed
+
+
+class _PipeWriter:
+    """stdout replacement in a worker: every write is sent to the parent as it happens."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def write(self, text):
+        if text:
+            self.conn.send(("stdout", text))
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def _worker_globals(context):
+    import fnmatch
+    import json
+    import pathlib
+    import re
+    import subprocess
+
+    exec_globals = {
+        "__builtins__": __builtins__,
+        "npc": None,
+        "context": context,
+        "os": os,
+        "re": re,
+        "json": json,
+        "Path": pathlib.Path,
+        "fnmatch": fnmatch,
+        "pathlib": pathlib,
+        "subprocess": subprocess,
+    }
+    for name, module in (("np", "numpy"), ("pd", "pandas"), ("plt", "matplotlib.pyplot")):
+        if module in sys.modules:
+            exec_globals[name] = sys.modules[module]
+    try:
+        from ritual_engine.codex import get_llm_response
+
+        exec_globals["get_llm_response"] = get_llm_response
+    except Exception:
+        pass
+    return exec_globals
+
+
+def _worker_main(conn, preload, memory_limit_mb):
+    """Worker loop: import the data stack once, then run (code, context) tasks until told to stop."""
+    if memory_limit_mb and resource is not None:
+        limit = int(memory_limit_mb) * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+    from ritual_engine.npc_compiler import compile_step_code
+
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        if task is None:
+            break
+        code, packed = task
+        stdout = sys.stdout
+        try:
+            context = {key: pickle.loads(value) for key, value in packed.items()}
+            exec_locals = {}
+            sys.stdout = _PipeWriter(conn)
+            try:
+                exec(compile_step_code(code, "<jinx:worker>"), _worker_globals(context), exec_locals)
+            finally:
+                sys.stdout = stdout
+            after = _pickle_values(context)
+            changed = {
+                key: pickle.loads(value) for key, value in after.items()
+                if packed.get(key) != value
+            }
+            result = {key: pickle.loads(value) for key, value in _pickle_values(exec_locals).items()}
+            conn.send(("result", result, changed))
+        except BaseException:
+            sys.stdout = stdout
+            conn.send(("error", traceback.format_exc()))
+
+
+class _Worker:
+    def __init__(self, mp_context, preload, memory_limit_mb):
+        self.conn, child = mp_context.Pipe()
+        self.process = mp_context.Process(
+            target=_worker_main,
+            args=(child, preload, memory_limit_mb),
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+        self.pid = None
+        self.tasks = 0
+
+    def wait_ready(self, timeout):
+        if self.pid is not None:
+            return
+        if not self.conn.poll(timeout):
+            raise PythonWorkerError(f"Python worker did not start within {timeout}s")
+        _, self.pid = self.conn.recv()
+
+    def stop(self, kill=False):
+        try:
+            if kill:
+                self.process.kill()
+            else:
+                self.conn.send(None)
+                self.process.join(1)
+                if self.process.is_alive():
+                    self.process.kill()
+        except Exception:
+            pass
+        finally:
+            self.conn.close()
+
+
+class PythonWorkerPool:
+    """
+    Pre-started interpreters that run python jinx steps out of process.
+
+    Each worker imports numpy, pandas and matplotlib once and then serves
+    steps one at a time, so a step costs a pipe round trip instead of a
+    process spawn and never holds the caller's GIL. Steps exceeding the
+    time limit get their worker killed and replaced; the memory limit is
+    applied with RLIMIT_AS where the platform supports it. Workers are
+    recycled after max_tasks steps to bound leaks from user code.
+
+    Workers use the spawn start method (safe under a threaded server), so
+    scripts that create a pool need the usual `if __name__ == "__main__":` guard.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        timeout: float = 60.0,
+        memory_limit_mb: int = 0,
+        preload=DEFAULT_PRELOAD,
+        max_tasks: int = 500,
+        startup_timeout: float = 60.0,
+    ):
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.preload = tuple(preload)
+        self.max_tasks = max_tasks
+        self.startup_timeout = startup_timeout
+        self._mp = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {"runs": 0, "timeouts": 0, "restarts": 0}
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._mp, self.preload, self.memory_limit_mb)
+
+    def _release(self, worker: _Worker, healthy: bool):
+        if self._closed:
+            worker.stop(kill=not healthy)
+            return
+        if healthy and worker.tasks < self.max_tasks:
+            self._idle.put(worker)
+            return
+        worker.stop(kill=not healthy)
+        with self._lock:
+            self.stats["restarts"] += 1
+        self._idle.put(self._spawn())
+
+    def run(
+        self,
+        code: str,
+        context: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        on_output: Optional[Callable[[str], Any]] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Executes code in a worker with `context` available as in an in-process
+        step. Printed text is passed to on_output (default: this process's stdout)
+        as it is produced. Returns (locals, changed context entries); values that
+        cannot be pickled are left out.
+        """
+        if self._closed:
+            raise PythonWorkerError("Python worker pool is closed")
+        timeout = self.timeout if timeout is None else timeout
+        on_output = on_output or sys.stdout.write
+        worker = self._idle.get()
+        healthy = False
+        try:
+            worker.wait_ready(self.startup_timeout)
+            worker.tasks += 1
+            worker.conn.send((code, _pickle_values(context or {})))
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not worker.conn.poll(remaining):
+                    with self._lock:
+                        self.stats["timeouts"] += 1
+                    raise TimeoutError(f"Python step exceeded its {timeout}s limit")
+                message = worker.conn.recv()
+                if message[0] == "stdout":
+                    on_output(message[1])
+                    continue
+                healthy = True
+                with self._lock:
+                    self.stats["runs"] += 1
+                if message[0] == "error":
+                    raise PythonWorkerError(message[1])
+                return message[1], message[2]
+        except (EOFError, ConnectionError) as e:
+            raise PythonWorkerError(
+                f"Python worker exited while running a step (memory limit {self.memory_limit_mb or 'none'} MB): {e}"
+            )
+        finally:
+            self._release(worker, healthy)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def python_workers_enabled() -> bool:
+    """True when NPCSH_PYTHON_WORKERS asks for python steps to run in the worker pool."""
+    try:
+        return int(os.environ.get("NPCSH_PYTHON_WORKERS", "0")) > 0
+    except ValueError:
+        return False
+
+
+def get_python_worker_pool() -> PythonWorkerPool:
+    """
+    Returns the process-wide pool, sized by NPCSH_PYTHON_WORKERS (default 2), with
+    NPCSH_PYTHON_WORKER_TIMEOUT seconds and NPCSH_PYTHON_WORKER_MEMORY_MB limits.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = PythonWorkerPool(
+                size=int(os.environ.get("NPCSH_PYTHON_WORKERS", "0")) or 2,
+                timeout=float(os.environ.get("NPCSH_PYTHON_WORKER_TIMEOUT", "60")),
+                memory_limit_mb=int(os.environ.get("NPCSH_PYTHON_WORKER_MEMORY_MB", "0")),
+            )
+            atexit.register(_default_pool.close)
+        return _default_pool
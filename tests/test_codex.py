@@ -0,0 +1,169 @@
+from types import SimpleNamespace
+
+from ritual_engine import codex
+from ritual_engine.gen import cache, response
+from ritual_engine.npc_compiler import Jinx, parse_jinx_arguments
+
+
+def _adder():
+    return Jinx(jinx_data={
+        "jinx_name": "adder",
+        "inputs": ["a", "b", {"scale": "1"}],
+        "steps": [{"name": "add", "engine": "python", "code": "output = ({{ a }} + {{ b }}) * {{ scale }}"}],
+    })
+
+
+def _npc(jinx, tmp_path):
+    return SimpleNamespace(
+        name="helper", primary_directive="help", tables=None, model="m", provider="openai",
+        api_url=None, jinxs_dict={jinx.jinx_name: jinx}, shared_context={},
+        npc_directory=str(tmp_path), jinxs_directory=str(tmp_path),
+    )
+
+
+def test_jinx_input_extraction_uses_the_response_cache_when_enabled(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_litellm(prompt, **kwargs):
+        calls.append(prompt)
+        return {"response": {"a": "3", "b": "4"}, "messages": kwargs["messages"] + [{"role": "assistant", "content": "{}"}]}
+
+    monkeypatch.setattr(response, "_get_litellm_response", fake_litellm)
+    monkeypatch.setattr(cache, "_default_cache", cache.ResponseCache(use_disk=False))
+    monkeypatch.setattr(cache, "CACHE_REPEATED_CALLS", True)
+    jinx = _adder()
+    npc = _npc(jinx, tmp_path)
+    for _ in range(2):
+        result = codex.handle_jinx_call("add three and four", "adder", npc=npc, stream=True)
+        assert result["output"]["output"] == 7
+    assert len(calls) == 1
+
+    monkeypatch.setattr(cache, "CACHE_REPEATED_CALLS", False)
+    codex.handle_jinx_call("add three and four", "adder", npc=npc, stream=True)
+    assert len(calls) == 2
+
+
+def test_jinx_tool_schema_and_native_routing(monkeypatch, tmp_path):
+    jinx = Jinx(jinx_data={
+        "jinx_name": "add numbers",
+        "description": "Add two numbers",
+        "inputs": ["a", {"b": "2"}],
+        "steps": [{"name": "add", "engine": "python", "code": "output = {{ a }} + {{ b }}"}],
+    })
+    function = jinx.to_tool_schema()["function"]
+    assert function["name"] == "add_numbers"
+    assert function["parameters"]["required"] == ["a"]
+    assert set(function["parameters"]["properties"]) == {"a", "b"}
+
+    calls = []
+
+    def fake_llm(prompt, tools=None, tool_map=None, **kwargs):
+        calls.append(tools)
+        if tools:
+            output = tool_map["add_numbers"](a="3")
+            return {"messages": [], "tool_results": [{"tool_name": "add_numbers", "result": output}]}
+        return {"messages": [], "response": f"formatted {prompt.count('5')}"}
+
+    monkeypatch.setattr(codex, "get_llm_response", fake_llm)
+    monkeypatch.setattr(codex, "NATIVE_JINX_TOOLS", "on")
+    npc = SimpleNamespace(
+        jinxs_dict={"add numbers": jinx}, jinja_env=None, model="m", provider="p", shared_context={},
+        npc_directory=str(tmp_path), jinxs_directory=str(tmp_path),
+    )
+    result = codex.check_llm_command("add 3", npc=npc, jinx_top_k=0)
+    assert len(calls) == 2 and calls[0][0]["function"]["name"] == "add_numbers"
+    assert result["output"].startswith("formatted")
+
+
+def test_colliding_jinx_tool_names_are_suffixed(tmp_path):
+    jinxs = {
+        name: Jinx(jinx_data={
+            "jinx_name": name,
+            "inputs": [],
+            "steps": [{"name": "s", "engine": "python", "code": f"output = {value}"}],
+        })
+        for name, value in (("a b", 1), ("a_b", 2))
+    }
+    npc = SimpleNamespace(
+        jinxs_dict=jinxs, jinja_env=None, shared_context={},
+        npc_directory=str(tmp_path), jinxs_directory=str(tmp_path),
+    )
+    tools, tool_map = codex.jinx_tools(jinxs, npc)
+    assert [tool["function"]["name"] for tool in tools] == ["a_b", "a_b_2"]
+    assert tool_map["a_b"]() == 1 and tool_map["a_b_2"]() == 2
+
+
+def test_explicit_jinx_arguments_skip_the_model(monkeypatch, tmp_path):
+    jinx = _adder()
+    assert parse_jinx_arguments("adder 3 b=4", jinx) == {"a": "3", "b": "4"}
+    assert parse_jinx_arguments("/adder --b 4 a='1 + 2' --scale 2", jinx) == {"b": "4", "a": "1 + 2", "scale": "2"}
+    assert parse_jinx_arguments("please add three and four", jinx) == {}
+    # Only commands addressed to the jinx, only long flags, and nothing ambiguous
+    assert parse_jinx_arguments("add a=3 b=4", jinx) == {}
+    assert parse_jinx_arguments("adder a=3 -s 2 b=4", jinx) == {}
+    assert parse_jinx_arguments("adder a=3 b=4 plus some words", jinx) == {}
+    assert parse_jinx_arguments("adder a=3", jinx) == {}
+
+    prompts = []
+
+    def fake_llm(prompt, **kwargs):
+        prompts.append(prompt)
+        return {"messages": [], "response": '{"a": "8", "b": "4"}'}
+
+    monkeypatch.setattr(codex, "get_llm_response", fake_llm)
+    npc = SimpleNamespace(
+        jinxs_dict={"adder": jinx}, shared_context={}, npc_directory=str(tmp_path), jinxs_directory=str(tmp_path),
+    )
+    result = codex.handle_jinx_call("adder a=3 b=4", "adder", npc=npc, stream=True)
+    assert result["output"]["output"] == 7 and prompts == []
+
+    # Anything else is left to the model, whose inputs are not overridden
+    result = codex.handle_jinx_call("adder a=3 to four", "adder", npc=npc, stream=True)
+    assert result["output"]["output"] == 12
+    assert len(prompts) == 1 and "<value for a>" in prompts[0]
+
+
+def test_ollama_requests_keep_the_context_and_date_line(monkeypatch, tmp_path):
+    import ollama
+
+    sent = []
+
+    def fake_chat(**kwargs):
+        sent.append(kwargs["messages"])
+        return {"message": {"role": "assistant", "content": "hi"}}
+
+    monkeypatch.setattr(ollama, "chat", fake_chat)
+    npc = SimpleNamespace(**{**vars(_npc(_adder(), tmp_path)), "provider": "ollama", "model": "llama3.2"})
+    result = codex.get_llm_response("hello", npc=npc, context="the sky is green")
+    assert result["response"] == "hi"
+    system, user = sent[0]
+    assert "The current date and time are" not in system["content"]
+    assert user["content"].startswith("hello")
+    assert "User Provided Context: the sky is green" in user["content"]
+    assert "The current date and time are" in user["content"]
+
+
+def test_only_tool_rejections_turn_native_tools_off(monkeypatch, tmp_path):
+    class UnsupportedParamsError(Exception):
+        pass
+
+    monkeypatch.setattr(codex, "_models_without_tools", set())
+    monkeypatch.setattr(codex, "NATIVE_JINX_TOOLS", "on")
+    jinx = _adder()
+    npc = _npc(jinx, tmp_path)
+    for error, rejected in (
+        (TimeoutError("timed out"), False),
+        (Exception("429 Too Many Requests"), False),
+        (Exception("registry.ollama.ai/library/gemma does not support tools"), True),
+        (UnsupportedParamsError("openai does not support parameters: tools"), True),
+    ):
+        codex._models_without_tools.clear()
+
+        def fake_llm(prompt, error=error, **kwargs):
+            raise error
+
+        monkeypatch.setattr(codex, "get_llm_response", fake_llm)
+        assert codex._check_llm_command_with_tools(
+            "add 3 and 4", npc.jinxs_dict, "m", "openai", None, None, npc, [], None, False, None
+        ) is None
+        assert codex._native_tools_supported("m", "openai") is not rejected
@@ -0,0 +1,43 @@
+from ritual_engine.gen.context_window import ContextWindowManager
+
+
+def _history(turns):
+    messages = [{"role": "system", "content": "You are a helpful assistant."}]
+    for i in range(turns):
+        role = "user" if i % 2 == 0 else "assistant"
+        messages.append({"role": role, "content": f"turn {i} " + "x" * 200, "message_id": f"m{i}"})
+    return messages
+
+
+def test_fit_keeps_system_prompt_and_latest_message_under_budget():
+    manager = ContextWindowManager()
+    messages = _history(20)
+    fitted = manager.fit(messages, budget=300)
+    assert fitted[0] == messages[0]
+    assert fitted[-1] == messages[-1]
+    assert len(fitted) < len(messages)
+    assert manager.count_messages(fitted) <= 300
+    # The kept turns are the most recent ones, in order
+    assert fitted[1:] == messages[len(messages) - len(fitted) + 1:]
+
+    short = messages[:3]
+    assert manager.fit(short, budget=10000) is short
+
+
+def test_fit_summarizes_evicted_turns_and_caches_counts():
+    evicted = []
+
+    def summarize(messages):
+        evicted.extend(messages)
+        return "earlier turns"
+
+    manager = ContextWindowManager(summarizer=summarize)
+    messages = _history(20)
+    fitted = manager.fit(messages, budget=400)
+    assert fitted[1]["content"].endswith("earlier turns")
+    assert manager.count_messages(fitted) <= 400
+    assert evicted and evicted[0] == messages[1]
+
+    counted = len(manager._counts)
+    manager.fit(messages, budget=400)
+    assert len(manager._counts) == counted
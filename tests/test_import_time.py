@@ -0,0 +1,61 @@
+"""
+Import-time checks. Run this file directly to benchmark cold start:
+
+    python tests/test_import_time.py
+"""
+import statistics
+import subprocess
+import sys
+import time
+
+# Modules that take hundreds of milliseconds to seconds to import and are
+# only needed once an LLM call, jinx or data step actually runs.
+HEAVY_MODULES = [
+    "litellm",
+    "openai",
+    "ollama",
+    "pandas",
+    "matplotlib",
+    "sqlalchemy",
+    "chromadb",
+    "torch",
+    "pygame",
+]
+
+ENTRY_POINTS = [
+    "ritual_engine",
+    "ritual_engine.codex",
+    "ritual_engine.npc_compiler",
+]
+
+
+def _loaded_heavy_modules(module):
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()
+    return output[-1].split(",") if output and output[-1] else []
+
+
+def test_import_does_not_load_heavy_dependencies():
+    for module in ENTRY_POINTS:
+        assert _loaded_heavy_modules(module) == [], module
+
+
+def _cold_import_seconds(module, runs=5):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], capture_output=True, check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":
+    baseline = _cold_import_seconds("json")
+    print(f"{'interpreter startup':<32}{baseline:8.3f}s")
+    for module in ENTRY_POINTS:
+        print(f"{module:<32}{_cold_import_seconds(module) - baseline:8.3f}s")
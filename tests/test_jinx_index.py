@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+from ritual_engine.gen.jinx_index import JinxIndex
+
+
+VOCAB = ["weather", "file", "screenshot", "search"]
+
+
+def _embed(texts):
+    return [[float(word in text.lower()) for word in VOCAB] for text in texts]
+
+
+def _jinxs():
+    return {
+        name: SimpleNamespace(jinx_name=name, description=description)
+        for name, description in [
+            ("forecast", "Get the weather for a city"),
+            ("reader", "Read a file from disk"),
+            ("snap", "Take a screenshot"),
+            ("web", "Search the web"),
+        ]
+    }
+
+
+def test_selects_closest_jinxs_and_caches_descriptions():
+    calls = []
+    index = JinxIndex(embed=lambda texts: calls.append(len(texts)) or _embed(texts))
+    assert list(index.select("what is the weather in tokyo", _jinxs(), k=1)) == ["forecast"]
+    assert list(index.select("open that file", _jinxs(), k=1)) == ["reader"]
+    assert calls == [4, 1, 1]
+
+
+def test_falls_back_to_all_jinxs():
+    def broken(texts):
+        raise ConnectionError("no embedding server")
+
+    index = JinxIndex(embed=broken)
+    assert len(index.select("weather", _jinxs(), k=2)) == 4
+    # Embedding stays off after a failure instead of failing every request
+    assert len(index.select("weather", _jinxs(), k=2)) == 4
+    assert index.stats["fallbacks"] == 1
+    assert len(JinxIndex(embed=_embed).select("weather", _jinxs(), k=0)) == 4
+
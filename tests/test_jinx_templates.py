@@ -0,0 +1,150 @@
+from types import SimpleNamespace
+
+from ritual_engine import npc_compiler
+from ritual_engine.npc_compiler import Jinx, compile_step_code
+
+
+def _jinx():
+    return Jinx(jinx_data={
+        "jinx_name": "adder",
+        "inputs": ["a", "b"],
+        "steps": [
+            {"name": "add", "engine": "{{ 'python' }}", "code": "output = {{ a }} + {{ b }}"},
+        ],
+    })
+
+
+def test_step_templates_are_compiled_once(monkeypatch, tmp_path):
+    monkeypatch.setattr(npc_compiler, "JINJA_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(npc_compiler, "_template_env", None)
+    jinx = _jinx()
+    env = npc_compiler.get_template_env()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("step template re-parsed at execution time")
+
+    monkeypatch.setattr(env, "from_string", fail)
+    assert jinx.execute({"a": 1, "b": 2}, {}, jinja_env=env)["output"] == 3
+    assert jinx.execute({"a": 5, "b": 2}, {}, jinja_env=env)["output"] == 7
+
+
+def test_edited_steps_fall_back_to_jinja_env():
+    jinx = _jinx()
+    jinx.steps[0]["code"] = "output = {{ a }} * {{ b }}"
+    assert jinx.execute({"a": 3, "b": 4}, {}, jinja_env=npc_compiler.get_template_env())["output"] == 12
+
+
+def test_compiled_code_is_reused():
+    first = compile_step_code("output = 1 + 1", "<jinx:test:a>")
+    assert compile_step_code("output = 1 + 1", "<jinx:test:b>") is first
+    assert compile_step_code("output = 2 + 2") is not first
+
+
+def _pipeline():
+    return Jinx(jinx_data={
+        "jinx_name": "fan_out",
+        "inputs": ["x"],
+        "steps": [
+            {"name": "left", "engine": "python", "depends_on": [],
+             "code": "import time\ntime.sleep(0.3)\noutput = {{ x }} + 1"},
+            {"name": "right", "engine": "python", "depends_on": [],
+             "code": "import time\ntime.sleep(0.3)\noutput = {{ x }} + 2"},
+            {"name": "total", "engine": "python", "code": "output = {{ left }} + {{ right }}"},
+        ],
+    })
+
+
+def test_step_dependencies_from_references():
+    jinx = _pipeline()
+    assert jinx.step_dependencies() == [set(), set(), {0, 1}]
+    jinx.steps[1]["depends_on"] = ["left"]
+    assert jinx.step_dependencies()[1] == {0}
+
+    # Code steps stay in order unless they opt in with depends_on
+    del jinx.steps[1]["depends_on"]
+    assert jinx.step_dependencies()[1] == {0}
+    jinx.steps.append({"name": "ask", "engine": "natural", "code": "Explain {{ left }}"})
+    jinx.steps.append({"name": "say", "engine": "natural", "code": "Summarize {{ output }}"})
+    assert jinx.step_dependencies()[3:] == [{0}, {0, 1, 2, 3}]
+
+
+def test_independent_steps_run_concurrently():
+    import time
+
+    start = time.perf_counter()
+    context = _pipeline().execute({"x": 10}, {}, jinja_env=npc_compiler.get_template_env())
+    elapsed = time.perf_counter() - start
+    assert (context["left"], context["right"], context["total"]) == (11, 12, 23)
+    assert context["output"] == 23
+    assert elapsed < 0.55
+
+
+def test_declared_pure_jinxs_are_served_from_the_result_cache(monkeypatch, tmp_path):
+    import sqlite3
+    from ritual_engine.vault.command_history import CommandHistory
+
+    monkeypatch.setattr(npc_compiler, "JINX_CACHE_DB", str(tmp_path / "cache.db"))
+    jinx = Jinx(jinx_data={
+        "jinx_name": "lookup",
+        "inputs": ["a", {"verbose": "no"}],
+        "cache": {"ttl": 60, "key": ["a"]},
+        "steps": [{"name": "look", "engine": "python", "code": "output = {{ a }} * 2"}],
+    })
+    env = npc_compiler.get_template_env()
+    runs = []
+    execute_step = Jinx._execute_step
+    monkeypatch.setattr(Jinx, "_execute_step", lambda self, *a, **k: runs.append(1) or execute_step(self, *a, **k))
+
+    assert jinx.execute({"a": 2, "verbose": "no"}, {}, jinja_env=env)["output"] == 4
+    cached = jinx.execute({"a": 2, "verbose": "yes"}, {}, jinja_env=env)
+    assert cached["output"] == 4 and cached["cache_hit"] and len(runs) == 1
+    assert jinx.execute({"a": 3}, {}, jinja_env=env)["output"] == 6 and len(runs) == 2
+
+    # Editing the steps changes the key
+    jinx.steps[0]["code"] = "output = {{ a }} * 3"
+    assert jinx.execute({"a": 2}, {}, jinja_env=env)["output"] == 6
+
+    expired = Jinx(jinx_data={**jinx.to_dict(), "cache": {"ttl": -1}})
+    expired.execute({"a": 5}, {}, jinja_env=env)
+    assert "cache_hit" not in expired.execute({"a": 5}, {}, jinja_env=env)
+
+    # Existing logs gain the cache_hit column
+    db_path = str(tmp_path / "history.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE jinx_execution_log (execution_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "triggering_message_id TEXT NOT NULL, response_message_id TEXT, conversation_id TEXT NOT NULL, "
+            "timestamp TEXT NOT NULL, npc_name TEXT, team_name TEXT, jinx_name TEXT NOT NULL, jinx_inputs TEXT, "
+            "jinx_output TEXT, status TEXT NOT NULL, error_message TEXT, duration_ms INTEGER)"
+        )
+    history = CommandHistory(db_path)
+    history.save_jinx_execution("m1", "c1", "npc", "lookup", {"a": 2}, 4, "success", duration_ms=1, cache_hit=True)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT duration_ms, cache_hit FROM jinx_execution_log").fetchall() == [(1, 1)]
+
+
+def test_guardian_execute_jinx_logs_through_command_history(monkeypatch, tmp_path):
+    import sqlite3
+    from sqlalchemy import create_engine
+
+    monkeypatch.setattr(npc_compiler, "JINX_CACHE_DB", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(npc_compiler, "init_db_tables", lambda *args, **kwargs: None)
+    db_path = tmp_path / "history.db"
+    npc = npc_compiler.Guardian(
+        name="helper",
+        primary_directive="help",
+        jinxs=[Jinx(jinx_data={
+            "jinx_name": "double",
+            "inputs": ["a"],
+            "steps": [{"name": "double", "engine": "python", "code": "output = {{ a }} * 2"}],
+        })],
+        db_conn=create_engine(f"sqlite:///{db_path}"),
+        npc_directory=str(tmp_path),
+        jinxs_directory=str(tmp_path),
+    )
+    npc.command_history.add_conversation("user", "double 4", "c1", str(tmp_path), npc="helper", message_id="m1")
+    result = npc.execute_jinx("double", {"a": 4}, conversation_id="c1", message_id="m1")
+    assert result["output"] == 8
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT conversation_id, npc_name, jinx_name, jinx_output, status FROM jinx_execution_log").fetchall()
+    assert rows == [("c1", "helper", "double", "8", "success")]
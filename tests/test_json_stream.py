@@ -0,0 +1,38 @@
+import json
+
+from ritual_engine.gen.json_stream import IncrementalJSONParser, iter_json_stream
+
+
+def _chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_parser_matches_json_loads_for_any_chunking():
+    doc = {
+        "fact_list": ['a "quoted" fact', "unicode é and \\ backslash"],
+        "numbers": [1, -2.5e3, True, False, None],
+        "nested": {"k": [[], {}]},
+    }
+    text = "```json\n" + json.dumps(doc, indent=2) + "\n```"
+    for size in (1, 3, 7, len(text)):
+        parser = IncrementalJSONParser()
+        for chunk in _chunks(text, size):
+            parser.feed(chunk)
+        assert parser.done
+        assert parser.result == doc
+
+
+def test_array_elements_are_emitted_as_they_close():
+    parser = IncrementalJSONParser()
+    events = parser.feed('{"fact_list": ["first", "sec')
+    assert (("fact_list", 0), "first") in events
+    assert parser.partial == {"fact_list": ["first"]}
+    events = parser.feed('ond"]}')
+    assert (("fact_list", 1), "second") in events
+    assert parser.done
+
+
+def test_iter_json_stream_filters_by_path():
+    text = '{"fact_list": [{"f": 1}, {"f": 2}], "other": [3]}'
+    facts = [value for _, value in iter_json_stream(_chunks(text, 5), path=("fact_list",))]
+    assert facts == [{"f": 1}, {"f": 2}]
@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+
+from ritual_engine.gen import metrics
+from ritual_engine.gen.metrics import (
+    JSONLMetricsSink,
+    LLMCallTimer,
+    SQLiteMetricsSink,
+    add_llm_hook,
+    llm_metrics_labels,
+    remove_llm_hook,
+)
+
+
+def test_metrics_sink_is_configured_on_first_use_not_import(tmp_path):
+    code = (
+        "import os, ritual_engine.gen.metrics as m; "
+        "db = os.path.expanduser('~/npcsh_history.db'); "
+        "print(os.path.exists(db), m.llm_hooks_enabled(), os.path.exists(db))"
+    )
+    env = {**os.environ, "HOME": str(tmp_path), "NPCSH_LLM_METRICS": "sqlite"}
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env
+    ).stdout.split()
+    assert output[-3:] == ["False", "True", "True"]
+
+
+def test_hooks_receive_call_records():
+    records = []
+    hook = add_llm_hook(records.append)
+    try:
+        with llm_metrics_labels(jinx="lookup"):
+            timer = LLMCallTimer("helper", "ollama", "llama3.2")
+        timer.finish({"raw_response": {"prompt_eval_count": 12, "eval_count": 30}, "cache_hit": True})
+
+        timer = LLMCallTimer("helper", "ollama", "llama3.2", stream=True)
+        result = timer.finish({"response": iter([{"message": {"content": "a"}}] * 3)})
+        assert len(list(result["response"])) == 3
+
+        LLMCallTimer("helper", "openai", "m").finish(error=TimeoutError("slow"))
+    finally:
+        remove_llm_hook(hook)
+
+    first, streamed, failed = records
+    assert first["npc"] == "helper" and first["jinx"] == "lookup"
+    assert (first["prompt_tokens"], first["completion_tokens"]) == (12, 30)
+    assert first["cache_hit"] and first["wall_time"] >= 0 and first["tokens_per_sec"] > 0
+    assert streamed["stream"] and streamed["ttft"] is not None and streamed["completion_tokens"] == 3
+    assert streamed["jinx"] is None
+    assert failed["error"] == "TimeoutError: slow"
+
+
+def test_sqlite_and_jsonl_sinks(tmp_path):
+    sqlite_sink = SQLiteMetricsSink(str(tmp_path / "metrics.db"))
+    jsonl_sink = JSONLMetricsSink(str(tmp_path / "metrics.jsonl"))
+    for wall_time, error in [(1.0, None), (3.0, "boom")]:
+        record = dict.fromkeys(metrics.METRICS_COLUMNS)
+        record.update(npc="helper", provider="openai", model="m", wall_time=wall_time, cache_hit=False, error=error)
+        sqlite_sink(record)
+        jsonl_sink(record)
+
+    (summary,) = sqlite_sink.summary()
+    assert summary["npc"] == "helper" and summary["calls"] == 2
+    assert summary["avg_wall_time"] == 2.0 and summary["errors"] == 1
+    lines = (tmp_path / "metrics.jsonl").read_text().splitlines()
+    assert [json.loads(line)["wall_time"] for line in lines] == [1.0, 3.0]
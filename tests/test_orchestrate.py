@@ -0,0 +1,145 @@
+import time
+
+from ritual_engine import npc_compiler
+from ritual_engine.npc_compiler import Guardian, Team
+
+
+class _Member(Guardian):
+    def __init__(self, name):
+        super().__init__(name=name, primary_directive=f"{name} things", model="test", provider="test")
+
+    def check_llm_command(self, command, messages=None, context=None, team=None, stream=False):
+        time.sleep(0.3)
+        return {"output": f"{self.name} did {command}"}
+
+
+def test_parallel_orchestration_fans_out_and_checks_once(monkeypatch):
+    calls = []
+
+    def fake_llm(prompt, **kwargs):
+        calls.append(prompt)
+        if "assignments" in prompt:
+            return {"response": {"assignments": [
+                {"npc": "alpha", "request": "part one"},
+                {"npc": "beta", "request": "part two"},
+            ]}}
+        if "relevant" in prompt:
+            return {"response": {"relevant": True, "explanation": ""}}
+        return {"response": {"summary": "done"}}
+
+    monkeypatch.setattr(npc_compiler, "log_entry", lambda *args, **kwargs: None)
+    monkeypatch.setattr(npc_compiler.npy.llm_funcs, "get_llm_response", fake_llm)
+    team = Team(npcs=[_Member("alpha"), _Member("beta")])
+
+    start = time.perf_counter()
+    result = team.orchestrate("do both parts", mode="parallel")
+    assert time.perf_counter() - start < 0.55
+    assert result["output"] == "alpha: alpha did part one\n\nbeta: beta did part two"
+    assert result["debrief"] == {"summary": "done"}
+    assert sum("relevant" in prompt for prompt in calls) == 1
+    assert [entry["npc_name"] for entry in result["execution_history"]] == ["alpha", "beta"]
+
+
+def test_member_assigned_twice_runs_its_sub_requests_in_turn(monkeypatch):
+    running = []
+    overlap = []
+
+    class _Exclusive(_Member):
+        def check_llm_command(self, command, **kwargs):
+            running.append(command)
+            if len(running) > 1:
+                overlap.append(command)
+            time.sleep(0.1)
+            running.remove(command)
+            return {"output": command}
+
+    def fake_llm(prompt, **kwargs):
+        if "assignments" in prompt:
+            return {"response": {"assignments": [
+                {"npc": "alpha", "request": "one"},
+                {"npc": "alpha", "request": "two"},
+            ]}}
+        return {"response": {"relevant": True, "explanation": ""}}
+
+    monkeypatch.setattr(npc_compiler, "log_entry", lambda *args, **kwargs: None)
+    monkeypatch.setattr(npc_compiler.npy.llm_funcs, "get_llm_response", fake_llm)
+    team = Team(npcs=[_Exclusive("alpha")])
+    result = team.orchestrate("do it", mode="parallel")
+    assert overlap == []
+    assert result["output"] == "alpha: one\n\nalpha: two"
+    assert [entry["request"] for entry in result["execution_history"]] == ["one", "two"]
+
+
+def test_explicit_zero_limits_are_honoured(monkeypatch):
+    monkeypatch.setattr(npc_compiler, "log_entry", lambda *args, **kwargs: None)
+    team = Team(npcs=[_Member("alpha")])
+    result = team.orchestrate("do it", max_iterations=0)
+    assert result["incomplete"] == "Stopped after 0 iterations"
+    assert result["execution_history"] == []
+
+
+def test_orchestration_stops_at_iteration_cap(monkeypatch):
+    monkeypatch.setattr(npc_compiler, "log_entry", lambda *args, **kwargs: None)
+    monkeypatch.setattr(
+        npc_compiler.npy.llm_funcs,
+        "get_llm_response",
+        lambda prompt, **kwargs: {"response": {"relevant": False, "explanation": "not yet"}},
+    )
+    team = Team(npcs=[_Member("alpha")])
+    result = team.orchestrate("never done", max_iterations=2)
+    assert result["incomplete"] == "not yet"
+    assert len(result["execution_history"]) == 2
+
+
+def test_control_calls_use_the_control_model(monkeypatch):
+    models = []
+
+    def fake_llm(prompt, **kwargs):
+        models.append((kwargs["model"], kwargs["provider"]))
+        if "assignments" in prompt:
+            return {"response": {"assignments": [{"npc": "alpha", "request": "part one"}]}}
+        return {"response": {"relevant": True, "explanation": ""}}
+
+    monkeypatch.setattr(npc_compiler, "log_entry", lambda *args, **kwargs: None)
+    monkeypatch.setattr(npc_compiler.npy.llm_funcs, "get_llm_response", fake_llm)
+    team = Team(npcs=[_Member("alpha")], control_model="llama3.2:1b", control_provider="ollama")
+    team.orchestrate("do it", mode="parallel")
+    assert models == [("llama3.2:1b", "ollama")] * 3
+
+
+def test_bounded_history_summarizes_evicted_entries():
+    import pickle
+
+    from ritual_engine.npc_compiler import BoundedHistory
+
+    history = BoundedHistory(max_items=2, summary_chars=60)
+    for i in range(5):
+        history.append({"npc_name": "alpha", "output": f"result {i}"})
+    assert [entry["output"] for entry in history] == ["result 3", "result 4"]
+    assert history.evicted == 3
+    assert history.summary.endswith("alpha: result 2")
+    assert len(history.summary) <= 60
+    assert "Summary of 3 earlier entries" in f"{history}"
+
+    restored = pickle.loads(pickle.dumps(history))
+    assert list(restored) == list(history) and restored.summary == history.summary
+
+
+def test_history_summarizer_runs_outside_append():
+    from ritual_engine.npc_compiler import BoundedHistory
+
+    calls = []
+
+    def summarizer(summary, evicted):
+        calls.append([entry["output"] for entry in evicted])
+        return f"{summary} +{len(evicted)}".strip()
+
+    history = BoundedHistory(max_items=1, summarizer=summarizer)
+    for i in range(3):
+        history.append({"npc_name": "alpha", "output": f"result {i}"})
+    assert calls == []
+    assert "alpha: result 1" in f"{history}"
+
+    history.summarize()
+    assert calls == [["result 0", "result 1"]]
+    assert history.summary == "+2" and history.pending == []
@@ -0,0 +1,39 @@
+import pytest
+
+from ritual_engine.work.python_pool import PythonWorkerError, PythonWorkerPool
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = PythonWorkerPool(size=1, timeout=5, preload=())
+    yield pool
+    pool.close()
+
+
+def test_runs_code_and_streams_output(pool):
+    printed = []
+    result, changed = pool.run(
+        "print('hello')\ncontext['seen'] = True\noutput = context['x'] * 2",
+        {"x": 21, "unpicklable": lambda: None},
+        on_output=printed.append,
+    )
+    assert result == {"output": 42}
+    assert changed == {"seen": True}
+    assert "".join(printed) == "hello\n"
+
+
+def test_reuses_interpreter_and_reports_errors(pool):
+    first, _ = pool.run("import os\noutput = os.getpid()")
+    with pytest.raises(PythonWorkerError, match="ZeroDivisionError"):
+        pool.run("output = 1 / 0")
+    second, _ = pool.run("import os\noutput = os.getpid()")
+    assert first["output"] == second["output"]
+
+
+def test_timeout_replaces_worker(pool):
+    before, _ = pool.run("import os\noutput = os.getpid()")
+    with pytest.raises(TimeoutError):
+        pool.run("import time\ntime.sleep(10)", timeout=0.5)
+    after, _ = pool.run("import os\noutput = os.getpid()")
+    assert after["output"] != before["output"]
+    assert pool.stats["timeouts"] == 1
@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import pytest
+
+from ritual_engine.gen.ratelimit import RateLimiter, TokenBucket, retry_after_seconds
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__("429 Too Many Requests")
+        self.retry_after = retry_after
+
+
+def test_token_bucket_queues_reservations():
+    bucket = TokenBucket(per_minute=60, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    # One token per second: the third and fourth callers wait about 1s and 2s
+    assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+    assert bucket.reserve() == pytest.approx(2.0, abs=0.05)
+    bucket.refund(2)
+    assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+    bucket.block(5)
+    assert bucket.reserve(0) >= 4.9
+
+
+def test_rate_limiter_waits_for_request_budget():
+    limiter = RateLimiter(limits={("openai", "m"): {"rpm": 600}})
+    limiter._buckets_for("openai", "m")[0].capacity = 1
+    limiter._buckets_for("openai", "m")[0].level = 1
+    start = time.monotonic()
+    for _ in range(3):
+        assert limiter.call(lambda: "ok", provider="openai", model="m") == "ok"
+    # 600 rpm is one request per 0.1s after the first
+    assert time.monotonic() - start >= 0.18
+    assert limiter.stats["waits"] == 2
+    # Other models are unlimited
+    assert limiter._buckets_for("openai", "other") == (None, None)
+
+
+def test_token_estimate_is_lazy():
+    estimates = []
+
+    def estimate():
+        estimates.append(1)
+        return 10
+
+    RateLimiter().call(lambda: "ok", provider="openai", model="m", tokens=estimate)
+    assert estimates == []
+    RateLimiter(default_tpm=10000).call(lambda: "ok", provider="openai", model="m", tokens=estimate)
+    assert estimates == [1]
+
+
+def test_rate_limit_errors_are_retried_with_retry_after():
+    attempts = []
+
+    def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise RateLimitError(retry_after=0.1)
+        return "ok"
+
+    limiter = RateLimiter(default_rpm=6000, max_retries=3)
+    assert limiter.call(flaky, provider="openai", model="m") == "ok"
+    assert len(attempts) == 3 and attempts[2] - attempts[0] >= 0.19
+    assert limiter.stats["retries"] == 2
+    assert retry_after_seconds(RateLimitError(retry_after="2")) == 2.0
+
+    def always_limited():
+        raise RateLimitError(retry_after=0.01)
+
+    with pytest.raises(RateLimitError):
+        RateLimiter(max_retries=1).call(always_limited)
+
+    def broken():
+        raise ValueError("bad input")
+
+    with pytest.raises(ValueError):
+        limiter.call(broken)
+
+
+def test_async_calls_back_off_with_jitter():
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 2:
+            raise RateLimitError()
+        return "ok"
+
+    limiter = RateLimiter(base_delay=0.05, max_retries=2)
+    assert asyncio.run(limiter.acall(flaky, provider="openai", model="m")) == "ok"
+    assert len(attempts) == 2 and limiter.stats["retries"] == 1
+
+
+def test_only_429s_count_as_rate_limits():
+    from types import SimpleNamespace
+
+    from ritual_engine.gen.ratelimit import is_rate_limit_error
+
+    class APIError(Exception):
+        def __init__(self, status_code):
+            super().__init__("failed")
+            self.response = SimpleNamespace(status_code=status_code)
+
+    assert is_rate_limit_error(RateLimitError())
+    assert is_rate_limit_error(APIError(429))
+    assert not is_rate_limit_error(APIError(500))
+    assert not is_rate_limit_error(ValueError("request 4291 failed: rate limit docs at ..."))
+
+
+def test_litellm_calls_are_limited_on_the_bare_model(monkeypatch):
+    from ritual_engine.gen import response
+
+    limiter = RateLimiter(limits={("openai", "gpt-4o-mini"): {"rpm": 60}})
+    monkeypatch.setattr(response, "get_rate_limiter", lambda: limiter)
+    monkeypatch.setattr(response, "completion", lambda **kwargs: "ok")
+    params = {"model": "openai/gpt-4o-mini", "messages": []}
+    assert response._limited_completion(params, "openai", "gpt-4o-mini") == "ok"
+    # Without a provider (as from handle_streaming_json) the prefix is split off
+    assert response._limited_completion(params) == "ok"
+    assert set(limiter._buckets) == {("openai", "gpt-4o-mini")}
+    assert limiter._buckets_for("openai", "gpt-4o-mini")[0] is not None
@@ -0,0 +1,167 @@
+import os
+
+import pytest
+
+from ritual_engine.npc_compiler import FileRegistry, Guardian
+
+
+JINX = """jinx_name: {name}
+description: test jinx
+inputs: []
+steps:
+  - name: step
+    engine: python
+    code: output = {value}
+"""
+
+
+def _write(path, text, mtime=None):
+    with open(path, "w") as f:
+        f.write(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_files_are_parsed_once_and_reloaded_on_change(tmp_path):
+    registry = FileRegistry(poll_interval=0)
+    path = tmp_path / "echo.jinx"
+    _write(path, JINX.format(name="echo", value=1), mtime=1_000_000)
+
+    first = registry.jinx(path)
+    assert registry.jinx(path) is first
+    assert registry.stats == {"hits": 1, "loads": 1}
+
+    _write(path, JINX.format(name="echo", value=22), mtime=1_000_100)
+    reloaded = registry.jinx(path)
+    assert reloaded is not first
+    assert reloaded.steps[0]["code"] == "output = 22"
+
+
+def test_directory_listing_picks_up_new_files(tmp_path):
+    registry = FileRegistry(poll_interval=0)
+    _write(tmp_path / "a.jinx", JINX.format(name="a", value=1))
+    assert [j.jinx_name for j in registry.jinxs_in(tmp_path)] == ["a"]
+
+    _write(tmp_path / "b.jinx", JINX.format(name="b", value=2))
+    os.utime(tmp_path, (2_000_000, 2_000_000))
+    assert [j.jinx_name for j in registry.jinxs_in(tmp_path)] == ["a", "b"]
+
+
+def test_guardians_share_jinx_objects(tmp_path, monkeypatch):
+    from ritual_engine import npc_compiler
+
+    monkeypatch.setattr(npc_compiler, "COMPILED_NPCS_DB", str(tmp_path / "history.db"))
+    (tmp_path / "jinxs").mkdir()
+    _write(tmp_path / "jinxs" / "echo.jinx", JINX.format(name="echo", value=1))
+    _write(tmp_path / "helper.npc", "name: helper\nprimary_directive: help\njinxs: '*'\n")
+
+    first = Guardian(file=str(tmp_path / "helper.npc"))
+    second = Guardian(file=str(tmp_path / "helper.npc"))
+    assert list(first.jinxs_dict) == ["echo"]
+    assert first.jinxs_dict["echo"] is second.jinxs_dict["echo"]
+
+
+def test_guardian_pool_forks_cached_definitions(tmp_path, monkeypatch):
+    from ritual_engine import npc_compiler
+    from ritual_engine.npc_compiler import GuardianPool
+
+    monkeypatch.setattr(npc_compiler, "COMPILED_NPCS_DB", str(tmp_path / "history.db"))
+    npc_path = tmp_path / "helper.npc"
+    _write(npc_path, "name: helper\nprimary_directive: help\n", mtime=1_000_000)
+    pool = GuardianPool(db_path=str(tmp_path / "history.db"))
+
+    first = pool.get(npc_path)
+    second = pool.get(npc_path)
+    assert pool.stats == {"hits": 1, "loads": 1}
+    assert first is not second
+    assert first.command_history is second.command_history
+    first.shared_context["dataframes"]["x"] = 1
+    assert second.shared_context["dataframes"] == {}
+
+    _write(npc_path, "name: helper\nprimary_directive: help more\n", mtime=1_000_100)
+    assert pool.get(npc_path).primary_directive == "help more"
+    assert pool.stats["loads"] == 2
+
+
+def test_guardian_pool_gives_each_thread_its_own_history(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    import threading
+
+    from ritual_engine import npc_compiler
+
+    monkeypatch.setattr(npc_compiler, "COMPILED_NPCS_DB", str(tmp_path / "history.db"))
+    npc_path = tmp_path / "helper.npc"
+    _write(npc_path, "name: helper\nprimary_directive: help\n")
+    pool = npc_compiler.GuardianPool(db_path=str(tmp_path / "history.db"))
+    pool.get(npc_path)
+    barrier = threading.Barrier(4)
+
+    def request(i):
+        barrier.wait()
+        npc = pool.get(npc_path)
+        npc.command_history.add_conversation("user", f"req{i}", f"c{i}", "/tmp", npc="helper")
+        return npc.command_history, npc.memory
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(request, range(4)))
+
+    assert len({id(history) for history, _ in results}) == 4
+    assert all(memory is not None for _, memory in results)
+    assert pool.stats["loads"] == 1
+
+
+def test_compiled_guardians_skip_yaml_parsing(tmp_path, monkeypatch):
+    from ritual_engine import npc_compiler
+
+    monkeypatch.setattr(npc_compiler, "COMPILED_NPCS_DB", str(tmp_path / "history.db"))
+    monkeypatch.setattr(npc_compiler, "_file_registry", None)
+    (tmp_path / "jinxs").mkdir()
+    _write(tmp_path / "jinxs" / "echo.jinx", JINX.format(name="echo", value=1))
+    _write(tmp_path / "helper.npc", "name: helper\nprimary_directive: help\n")
+    Guardian(file=str(tmp_path / "helper.npc"))
+
+    def no_yaml(path):
+        raise AssertionError(f"{path} parsed again")
+
+    monkeypatch.setattr(npc_compiler, "_file_registry", None)
+    monkeypatch.setattr(npc_compiler, "load_yaml_file", no_yaml)
+    npc = Guardian(file=str(tmp_path / "helper.npc"))
+    assert npc.primary_directive == "help"
+    assert npc.jinxs_dict["echo"].steps[0]["code"] == "output = 1"
+
+
+@pytest.mark.parametrize("legacy_table", [False, True])
+def test_compiled_guardians_are_keyed_on_source_path(tmp_path, monkeypatch, legacy_table):
+    import sqlite3
+
+    from ritual_engine import npc_compiler
+
+    db_path = str(tmp_path / "history.db")
+    if legacy_table:
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(
+                "CREATE TABLE compiled_npcs (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE, "
+                "source_path TEXT, compiled_content TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)"
+            )
+    monkeypatch.setattr(npc_compiler, "COMPILED_NPCS_DB", db_path)
+    monkeypatch.setattr(npc_compiler, "_compiled_npcs_initialized", set())
+    for team, directive in (("a", "first"), ("b", "second")):
+        (tmp_path / team).mkdir()
+        _write(tmp_path / team / "helper.npc", f"name: helper\nprimary_directive: {directive}\n")
+        monkeypatch.setattr(npc_compiler, "_file_registry", None)
+        Guardian(file=str(tmp_path / team / "helper.npc"))
+
+    def no_yaml(path):
+        raise AssertionError(f"{path} parsed again")
+
+    monkeypatch.setattr(npc_compiler, "_file_registry", None)
+    monkeypatch.setattr(npc_compiler, "load_yaml_file", no_yaml)
+    for team, directive in (("a", "first"), ("b", "second")):
+        assert Guardian(file=str(tmp_path / team / "helper.npc")).primary_directive == directive
+
+    def no_db(*args, **kwargs):
+        raise AssertionError("compiled_npcs queried again")
+
+    # Later loads in the same process are served by the registry
+    monkeypatch.setattr(npc_compiler, "load_compiled_npc", no_db)
+    assert Guardian(file=str(tmp_path / "a" / "helper.npc")).primary_directive == "first"
@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+
+from ritual_engine.gen.replay import ReplayProvider, cassette_key
+
+
+def test_cassette_match_and_sequential_fallback():
+    messages = [{"role": "system", "content": "s"}, {"role": "user", "content": "2+2?"}]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cassette.jsonl")
+        with open(path, "w") as f:
+            f.write(json.dumps({"key": "other", "response": "first"}) + "\n")
+            f.write(json.dumps({"key": cassette_key(messages), "response": "4"}) + "\n")
+        replay = ReplayProvider(cassette=path)
+        resp = replay.completion(model="replay/x", messages=messages)
+        assert resp.choices[0].message.content == "4"
+        unmatched = replay.completion(model="replay/x", messages=[{"role": "user", "content": "?"}])
+        assert unmatched.choices[0].message.content == "first"
+
+
+def test_stream_chunk_shapes():
+    messages = [{"role": "user", "content": "hello"}]
+    chunks = list(ReplayProvider().completion(model="replay/x", messages=messages, stream=True))
+    text = "".join(c.choices[0].delta.content for c in chunks)
+    assert text == "Replay response to: hello"
+    assert chunks[-1].usage.completion_tokens == len(chunks) - 1
+
+    ollama_chunks = list(
+        ReplayProvider(chunk_format="ollama").completion(messages=messages, stream=True)
+    )
+    assert ollama_chunks[-1]["done"] is True
+    assert "".join(c["message"]["content"] for c in ollama_chunks) == text
+
+
+def test_cassette_keys_ignore_the_date_line(monkeypatch):
+    from datetime import datetime
+
+    from ritual_engine import npc_sysenv
+
+    def user_turn(now):
+        class _Clock(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return now
+
+        monkeypatch.setattr(npc_sysenv, "datetime", _Clock)
+        return [{"role": "user", "content": "hello" + npc_sysenv.get_volatile_context()}]
+
+    first = user_turn(datetime(2024, 1, 1, 12, 0))
+    later = user_turn(datetime(2024, 1, 2, 9, 41))
+    assert first != later
+    assert cassette_key(first) == cassette_key(later) == cassette_key([{"role": "user", "content": "hello"}])
@@ -0,0 +1,87 @@
+import os
+import tempfile
+
+from ritual_engine.gen.cache import ResponseCache, make_cache_key
+
+
+def test_cache_key_is_stable_and_content_addressed():
+    messages = [{"role": "user", "content": "hello"}]
+    key_a = make_cache_key("openai", "gpt-4o-mini", messages, "json", None, 0)
+    key_b = make_cache_key("openai", "gpt-4o-mini", list(messages), "json", None, 0)
+    key_c = make_cache_key("openai", "gpt-4o-mini", messages, "json", None, 0.7)
+    assert key_a == key_b
+    assert key_a != key_c
+
+
+def test_memory_and_disk_tiers():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "cache.db")
+        cache = ResponseCache(db_path=db_path)
+        assert cache.get("k") is None
+        cache.set("k", {"response": {"a": 1}, "messages": []})
+        assert cache.get("k")["response"] == {"a": 1}
+
+        # A fresh instance has an empty LRU and must fall through to SQLite
+        cold = ResponseCache(db_path=db_path)
+        assert cold.get("k")["response"] == {"a": 1}
+        stats = cold.get_stats()
+        assert stats["disk_hits"] == 1
+        assert stats["memory_hits"] == 0
+
+
+def test_ttl_and_size_eviction():
+    with tempfile.TemporaryDirectory() as tmp:
+        expired = ResponseCache(db_path=os.path.join(tmp, "ttl.db"), ttl=-1)
+        expired.set("k", {"response": "x"})
+        assert expired.get("k") is None
+
+        small = ResponseCache(
+            db_path=os.path.join(tmp, "small.db"),
+            max_memory_entries=1,
+            max_disk_bytes=100,
+        )
+        for i in range(5):
+            small.set(str(i), {"response": "x" * 40})
+        assert small.get("4") is not None
+        assert small.get("0") is None
+        assert small.get_stats()["evictions"] > 0
+
+
+def test_request_keys_ignore_the_time_line():
+    from types import SimpleNamespace
+
+    from ritual_engine.codex import _prepare_llm_call
+    from ritual_engine.gen import response
+    from ritual_engine.npc_sysenv import VOLATILE_CONTEXT_MARKER
+
+    npc = SimpleNamespace(
+        name="helper", primary_directive="help", tables=None,
+        model="m", provider="openai", api_url=None,
+    )
+    _, _, _, messages = _prepare_llm_call("hi", npc=npc)
+    assert VOLATILE_CONTEXT_MARKER not in messages[0]["content"]
+    assert VOLATILE_CONTEXT_MARKER in messages[-1]["content"]
+
+    later = [messages[0], {"role": "user", "content": "hi" + VOLATILE_CONTEXT_MARKER + "2031-01-01 09:30\n"}]
+    key = response._request_key("hi", "m", "openai", messages, None, None, None, False, {})
+    assert key == response._request_key("hi", "m", "openai", later, None, None, None, False, {})
+
+
+def test_request_keys_cover_credentials_options_and_files():
+    from ritual_engine.gen import response
+
+    messages = [{"role": "user", "content": "describe"}]
+
+    def key(**extra):
+        kwargs = extra.pop("kwargs", {})
+        return response._request_key("describe", "m", "openai", messages, None, None, None, False, kwargs, **extra)
+
+    base = key()
+    assert key(kwargs={"temperature": 0}) != base
+    assert key(api_key="other") != base
+    assert key(api_url="http://localhost:1234") != base
+    assert key(kwargs={"max_tokens": 10}) != key(kwargs={"max_tokens": 20})
+    assert key(kwargs={"stop": ["\n"]}) != base
+    assert key(kwargs={"top_p": 0.5}) != base
+    assert key(images=["a.png"]) is None
+    assert key(attachments=["a.pdf"]) is None
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ritual_engine.gen.response import _share_result
+from ritual_engine.gen.singleflight import SingleFlight
+
+
+def _run_concurrently(flight, fn, n=5):
+    started = threading.Barrier(n)
+
+    def caller():
+        started.wait()
+        return flight.do("key", fn, share=_share_result)
+
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        futures = [executor.submit(caller) for _ in range(n)]
+        return [f.exception() or f.result() for f in futures]
+
+
+def test_identical_calls_share_one_execution_with_independent_messages():
+    flight = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def call():
+        runs.append(1)
+        release.wait(5)
+        return {"response": "hi", "messages": [{"role": "assistant", "content": "hi"}]}
+
+    threading.Timer(0.5, release.set).start()
+    results = _run_concurrently(flight, call)
+    assert len(runs) == 1
+    assert all(r["response"] == "hi" for r in results)
+    assert sum(bool(r.get("coalesced")) for r in results) == 4
+    message_lists = [r["messages"] for r in results]
+    assert len({id(m) for m in message_lists}) == 5
+    message_lists[0].append({"role": "user", "content": "more"})
+    assert all(len(m) == 1 for m in message_lists[1:])
+    assert flight.stats == {"calls": 1, "coalesced": 4}
+
+    # Nothing is kept once the call finishes
+    flight.do("key", call)
+    assert len(runs) == 2
+
+
+def test_leader_exception_reaches_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def call():
+        release.wait(5)
+        raise ConnectionError("provider down")
+
+    threading.Timer(0.5, release.set).start()
+    results = _run_concurrently(flight, call)
+    assert len(results) == 5
+    assert all(isinstance(r, ConnectionError) for r in results)
+    assert flight.stats["calls"] == 1
+
+
+def test_async_waiters_share_the_leader_result_and_errors():
+    flight = SingleFlight()
+    runs = []
+
+    async def call():
+        runs.append(1)
+        await asyncio.sleep(0.1)
+        return {"response": "hi", "messages": []}
+
+    async def failing():
+        await asyncio.sleep(0.1)
+        raise ValueError("bad request")
+
+    async def main():
+        results = await asyncio.gather(*(flight.ado("key", call, share=_share_result) for _ in range(3)))
+        errors = await asyncio.gather(*(flight.ado("bad", failing) for _ in range(3)), return_exceptions=True)
+        return results, errors
+
+    results, errors = asyncio.run(main())
+    assert len(runs) == 1 and [r["response"] for r in results] == ["hi"] * 3
+    assert all(isinstance(e, ValueError) for e in errors)
+
+
+def test_group_candidate_passes_are_sampled_independently(monkeypatch):
+    import time
+
+    from ritual_engine.gen import response
+    from ritual_engine.vault.memory_graph import generate_group_candidates
+
+    calls = []
+
+    def fake_litellm(prompt, **kwargs):
+        calls.append(prompt)
+        name = f"group {len(calls)}"
+        time.sleep(0.2)
+        return {"response": {"groups": [name]}, "messages": []}
+
+    monkeypatch.setattr(response, "_get_litellm_response", fake_litellm)
+    groups = generate_group_candidates(["a fact", "another fact"], "facts", "m", "openai", n_passes=3)
+    assert len(calls) == 3
+    assert len(set(groups)) == 3
@@ -0,0 +1,67 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ritual_engine.gen.response import aprocess_tool_calls, process_tool_calls
+
+
+def _call(call_id, name, **arguments):
+    return {"id": call_id, "function": {"name": name, "arguments": json.dumps(arguments)}}
+
+
+def _response():
+    return {
+        "messages": [],
+        "tool_calls": [_call("1", "slow", value="a"), _call("2", "fast", value="b"), _call("3", "hang")],
+    }
+
+
+def _tool_map(release):
+    def slow(value):
+        time.sleep(0.3)
+        return value.upper()
+
+    def fast(value):
+        time.sleep(0.1)
+        return {"value": value}
+
+    def hang():
+        release.wait(5)
+        return "late"
+
+    return {"slow": slow, "fast": fast, "hang": hang}
+
+
+def test_tool_calls_run_concurrently_in_order_with_timeouts():
+    release = threading.Event()
+    start = time.monotonic()
+    try:
+        result = process_tool_calls(
+            _response(), _tool_map(release), "m", "p", [], tool_timeout={"hang": 0.5},
+        )
+    finally:
+        release.set()
+    # Sequential execution would take at least 0.9s
+    assert time.monotonic() - start < 0.85
+    assert [r["tool_name"] for r in result["tool_results"]] == ["slow", "fast", "hang"]
+    assert [r["result"] for r in result["tool_results"][:2]] == ["A", {"value": "b"}]
+    assert "timed out after 0.5s" in result["tool_results"][2]["result"]
+    assert [m["tool_call_id"] for m in result["messages"] if m["role"] == "tool"] == ["1", "2", "3"]
+
+
+def test_async_tool_calls_keep_order_and_report_timeouts():
+    release = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=3)
+    try:
+        result = asyncio.run(aprocess_tool_calls(
+            _response(), _tool_map(release), "m", "p", [],
+            tool_executor=executor, tool_timeout={"hang": 0.5},
+        ))
+    finally:
+        release.set()
+        executor.shutdown()
+    assert [r["tool_name"] for r in result["tool_results"]] == ["slow", "fast", "hang"]
+    assert result["tool_results"][0]["result"] == "A"
+    assert "timed out" in result["tool_results"][2]["result"]